@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Just enough of the World of Tanks client to load the mod outside the game
+
+installFakeGame() registers stand-ins for the BigWorld, messenger and
+PlayerEvents modules the mod imports. BigWorld.callback() goes into a
+timer heap that only runs when the benchmark pumps the loop, like the
+client's main thread does between frames. The fake chat controllers
+record every message they display and when.
+"""
+import heapq
+import sys
+import threading
+import time
+import types
+
+class CallbackLoop(object):
+    """BigWorld.callback() timers, run on whichever thread calls pump()"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = []  # (due, sequence, callback)
+        self.sequence = 0
+        self.ran = 0
+
+    def callback(self, delay, func):
+        with self.lock:
+            self.sequence += 1
+            heapq.heappush(self.timers, (time.time() + delay, self.sequence, func))
+            return self.sequence
+
+    def cancelCallback(self, callback_id):
+        with self.lock:
+            self.timers = [timer for timer in self.timers if timer[1] != callback_id]
+            heapq.heapify(self.timers)
+
+    def runDue(self):
+        """Run every timer that is due now and return how many ran"""
+        ran = 0
+        while True:
+            with self.lock:
+                if not self.timers or self.timers[0][0] > time.time():
+                    return ran
+                func = heapq.heappop(self.timers)[2]
+            func()
+            ran += 1
+            self.ran += 1
+
+    def pump(self, duration, frame=0.002):
+        """Run due timers for duration seconds, sleeping a frame when idle"""
+        end = time.time() + duration
+        while time.time() < end:
+            if not self.runDue():
+                time.sleep(frame)
+
+class Event(object):
+    """PlayerEvents-style event: handlers are added with += and run on call"""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        for handler in list(self.handlers):
+            handler(*args, **kwargs)
+
+class ChatMessage(object):
+    """A chat message as the controllers receive it"""
+
+    def __init__(self, text, player_name, channel):
+        self.text = text
+        self.playerName = player_name
+        self.channel = channel
+        self.original_text = text
+        self.sent_at = time.time()
+        self.displayed_at = None
+
+displayed = []  # ChatMessage in display order
+
+class ChannelController(object):
+    """Fake chat controller; the mod hooks addMessage on the class"""
+    channel = None
+
+    def addMessage(self, message, *args, **kwargs):
+        message.displayed_at = time.time()
+        displayed.append(message)
+        return True
+
+class TrainingChannelController(ChannelController):
+    channel = 'Training'
+
+class TeamChannelController(ChannelController):
+    channel = 'BattleTeam'
+
+class CommonChannelController(ChannelController):
+    channel = 'BattleAll'
+
+class UnitChannelController(ChannelController):
+    channel = 'Platoon'
+
+class BWUnitChannelEntity(ChannelController):
+    channel = 'Platoon'
+
+def addModule(name, **attributes):
+    """Register a module (and attach it to its parent package)"""
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+def installFakeGame():
+    """Register the fake client modules and return (loop, player_events)"""
+    loop = CallbackLoop()
+    player_events = types.ModuleType('g_playerEvents')
+    player_events.onAvatarBecomePlayer = Event()
+    player_events.onAvatarBecomeNonPlayer = Event()
+
+    addModule('BigWorld', callback=loop.callback, cancelCallback=loop.cancelCallback)
+    addModule('PlayerEvents', g_playerEvents=player_events)
+    for package in ('messenger', 'messenger.gui', 'messenger.gui.Scaleform', 'messenger.gui.Scaleform.channels',
+                    'messenger.gui.Scaleform.channels.bw_chat2', 'messenger.proto', 'messenger.proto.bw_chat2'):
+        addModule(package)
+    addModule('messenger.gui.Scaleform.channels.bw_chat2.lobby_controllers',
+              TrainingChannelController=TrainingChannelController, UnitChannelController=UnitChannelController)
+    addModule('messenger.gui.Scaleform.channels.bw_chat2.battle_controllers',
+              TeamChannelController=TeamChannelController, CommonChannelController=CommonChannelController)
+    addModule('messenger.proto.bw_chat2.entities', BWUnitChannelEntity=BWUnitChannelEntity)
+    return loop, player_events
+
+# Controller instance per replayed channel, created by newControllers()
+CONTROLLER_CLASSES = {
+    'Training': TrainingChannelController,
+    'BattleTeam': TeamChannelController,
+    'BattleAll': CommonChannelController,
+    'Platoon': BWUnitChannelEntity
+}
+
+def newControllers():
+    return dict((channel, cls()) for channel, cls in CONTROLLER_CLASSES.items())
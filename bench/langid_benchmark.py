@@ -0,0 +1,127 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""Measure the offline language identifier against labeled chat lines
+
+Loads mod_MicrosoftTranslator.py outside the game (bench/fakegame.py)
+and runs detectLanguage over bench/data/langid_chat_sample.tsv, printing
+per-language precision/recall, how well English is skipped, how often a
+from= language would be sent and whether it was right (over every line,
+English included), and the cost per call. It also checks that the short
+English chat in SHORT_ENGLISH_CHAT is skipped and never sent with a
+from= language, and exits with 1 if any of it is not. Run it after
+retraining the model or changing LANGID_CONFIG:
+
+    python bench/langid_benchmark.py
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PATH = os.path.join(ROOT, 'bench', 'data', 'langid_chat_sample.tsv')
+TIMING_ROUNDS = 200
+
+# One- and two-word English chat that has too few trigrams to score; each
+# must be skipped as English, as the old word list did, and never get from=
+SHORT_ENGLISH_CHAT = (u'hold', u'lag', u'ok', u'lol', u'2 min', u'no', u'gg', u'gl hf', u'gg wp', u'wp', u'sorry')
+
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+import fakegame
+
+def loadMod():
+    """Import the mod against the fake client, keeping its files in a temp dir"""
+    fakegame.installFakeGame()
+    sys.path.insert(0, ROOT)
+    os.chdir(tempfile.mkdtemp(prefix='langid_bench_'))
+    import mod_MicrosoftTranslator
+    # init() builds the identifier on a thread; score only once it is ready
+    mod_MicrosoftTranslator.buildLangIdIndex()
+    return mod_MicrosoftTranslator
+
+def loadSample():
+    """Return [(expected language, text)] from the sample file"""
+    sample = []
+    with io.open(SAMPLE_PATH, encoding='utf-8') as sample_file:
+        for line in sample_file:
+            line = line.rstrip(u'\n')
+            if line and not line.startswith(u'#'):
+                lang, text = line.split(u'\t', 1)
+                sample.append((lang, text))
+    return sample
+
+def ratio(part, whole):
+    return float(part) / whole if whole else 0.0
+
+def main():
+    mod = loadMod()
+    sample = loadSample()
+
+    predicted = defaultdict(int)
+    expected = defaultdict(int)
+    correct = defaultdict(int)
+    skipped = {'english': 0, 'other': 0}
+    sources = {'sent': 0, 'right': 0}
+    misses = []
+
+    for lang, text in sample:
+        guess, confidence = mod.detectLanguage(text)
+        expected[lang] += 1
+        predicted[guess] += 1
+        if guess == lang:
+            correct[lang] += 1
+        else:
+            misses.append((lang, guess, confidence, text))
+
+        if mod.isEnglish(guess, confidence):
+            skipped['english' if lang == 'en' else 'other'] += 1
+        source = mod.sourceLanguage(guess, confidence)
+        if source:
+            sources['sent'] += 1
+            sources['right'] += source == lang
+
+    print('%-8s %5s %9s %6s' % ('lang', 'lines', 'precision', 'recall'))
+    for lang in sorted(expected):
+        print('%-8s %5d %9.2f %6.2f' % (lang, expected[lang], ratio(correct[lang], predicted[lang]),
+                                        ratio(correct[lang], expected[lang])))
+
+    total = len(sample)
+    print('')
+    print('Accuracy: %.3f (%d/%d)' % (ratio(sum(correct.values()), total), sum(correct.values()), total))
+    print('English skipped: precision %.3f, recall %.3f' % (
+        ratio(skipped['english'], skipped['english'] + skipped['other']), ratio(skipped['english'], expected['en'])))
+    print('from= sent for %.3f of non-English lines, correct %.3f of %d sent' % (
+        ratio(sources['right'], total - expected['en']), ratio(sources['right'], sources['sent']), sources['sent']))
+
+    failures = []
+    for text in SHORT_ENGLISH_CHAT:
+        guess, confidence = mod.detectLanguage(text)
+        source = mod.sourceLanguage(guess, confidence)
+        if not mod.isEnglish(guess, confidence) or source:
+            failures.append((text, guess, confidence, source))
+    print('Short English chat: %d/%d skipped without from=' % (len(SHORT_ENGLISH_CHAT) - len(failures),
+                                                                 len(SHORT_ENGLISH_CHAT)))
+
+    start = time.time()
+    for _ in range(TIMING_ROUNDS):
+        for lang, text in sample:
+            mod.detectLanguage(text)
+    print('Cost: %.1f us per call' % ((time.time() - start) * 1e6 / (TIMING_ROUNDS * total)))
+
+    if misses:
+        print('')
+        print('Misses:')
+        for lang, guess, confidence, text in misses:
+            print(('  %s -> %s (%.2f) %s' % (lang, guess, confidence, text)).encode('utf-8'))
+    if failures:
+        print('')
+        print('Short English chat not skipped:')
+        for text, guess, confidence, source in failures:
+            print(('  %s -> %s (%.2f), from=%s' % (text, guess, confidence, source)).encode('utf-8'))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
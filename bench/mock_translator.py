@@ -0,0 +1,190 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""Local stand-in for the Microsoft Translator v3 /translate endpoint
+
+Answers POST /translate?api-version=3.0&to=en[&from=xx] with the v3
+response shape: one {"detectedLanguage", "translations"} object per input
+text. A LibreTranslate-style body ({"q": [...], "source", "target"}) gets
+a {"translatedText", "detectedLanguage"} answer instead, so the same
+server can stand in for a self-hosted backend. The "translation" is the
+text wrapped as EN(...), except that English comes back unchanged. The
+detected language is looked up in KNOWN_LANGUAGES, which the bench fills
+from its labeled corpus; other plain-ASCII text is English and anything
+else is "ru". A from= that does not match it gets the text back
+untranslated, as the real service does, and is counted as wrong_source.
+Latency, jitter, server errors and 429 throttling are configurable so the
+mod's failure paths can be exercised, and --connect-latency stands in for
+the DNS lookup, TCP connect and TLS handshake a new connection costs.
+HEAD requests (the mod's keep-alive pings) get an empty 200. Run standalone with:
+
+    python bench/mock_translator.py --port 18080 --latency 0.15
+"""
+import BaseHTTPServer
+import SocketServer
+import argparse
+import json
+import random
+import threading
+import time
+import urlparse
+
+KNOWN_LANGUAGES = {}  # corpus line -> language, filled by bench/replay.py
+
+class MockTranslatorServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.15, jitter=0.05, error_rate=0.0, throttle_rate=0.0, seed=1,
+                 connect_latency=0.0):
+        BaseHTTPServer.HTTPServer.__init__(self, address, TranslateHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'texts': 0, 'chars': 0, 'errors': 0, 'throttled': 0, 'connections': 0,
+                      'hangups': 0, 'pings': 0, 'wrong_source': 0}
+
+    def count(self, **amounts):
+        with self.stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def handle_error(self, request, client_address):
+        # The client gave up (timed out) before the answer was written
+        self.count(hangups=1)
+
+    def pickFailure(self):
+        """Return the HTTP status to fail this request with, or None"""
+        with self.stats_lock:
+            roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def delay(self):
+        with self.stats_lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+class TranslateHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoint
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.count(connections=1)
+        time.sleep(self.server.connect_latency)
+
+    def do_HEAD(self):
+        self.server.count(pings=1)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        url = urlparse.urlsplit(self.path)
+        query = urlparse.parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if url.path != '/translate':
+            return self.reply(404, {'error': {'code': 404000, 'message': 'Not found'}})
+
+        try:
+            payload = json.loads(body)
+            libre = isinstance(payload, dict)
+            texts = payload['q'] if libre else [item['Text'] for item in payload]
+        except (ValueError, KeyError, TypeError):
+            return self.reply(400, {'error': {'code': 400074, 'message': 'The body of the request is not valid JSON.'}})
+
+        time.sleep(self.server.delay())
+        self.server.count(requests=1, texts=len(texts), chars=sum(len(text) for text in texts))
+
+        status = self.server.pickFailure()
+        if status == 429:
+            self.server.count(throttled=1)
+            return self.reply(429, {'error': {'code': 429001, 'message': 'The server rejected the request because '
+                                                                        'the client has exceeded request limits.'}})
+        if status:
+            self.server.count(errors=1)
+            return self.reply(500, {'error': {'code': 500000, 'message': 'An unexpected error occurred.'}})
+
+        if libre:
+            translated = [translate(text) for text in texts]
+            result = {'translatedText': [text for text, language in translated]}
+            if payload.get('source', 'auto') == 'auto':
+                result['detectedLanguage'] = [{'language': language, 'confidence': 90.0} for text, language in translated]
+            return self.reply(200, result)
+
+        source = query.get('from', [None])[0]
+        target = query.get('to', ['en'])[0]
+        result = []
+        for text in texts:
+            translation, language = translate(text)
+            if source and source != language:
+                self.server.count(wrong_source=1)
+                translation = text
+            item = {'translations': [{'text': translation, 'to': target}]}
+            if not source:
+                item['detectedLanguage'] = {'language': language, 'score': 1.0}
+            result.append(item)
+        self.reply(200, result)
+
+    def reply(self, status, payload):
+        data = json.dumps(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def translate(text):
+    """Return (translation, detected language) for one text"""
+    language = detectLanguage(text)
+    if language == 'en':
+        return text, language
+    return u'EN(%s)' % text, language
+
+def detectLanguage(text):
+    """Language of the longest known corpus line text starts with, else 'en' for ASCII or 'ru'"""
+    best = None
+    for known, language in KNOWN_LANGUAGES.items():
+        if text.startswith(known) and (best is None or len(known) > len(best[0])):
+            best = (known, language)
+    if best:
+        return best[1]
+    return 'en' if all(ord(ch) < 128 for ch in text) else 'ru'
+
+def startServer(port=0, **options):
+    """Serve on 127.0.0.1 in a daemon thread; port 0 picks a free port"""
+    server = MockTranslatorServer(('127.0.0.1', port), **options)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency', type=float, default=0.15, help='seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.05, help='+/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests failing with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests failing with 429')
+    parser.add_argument('--connect-latency', type=float, default=0.0, help='seconds added to each new connection')
+    args = parser.parse_args()
+
+    server = MockTranslatorServer(('127.0.0.1', args.port), args.latency, args.jitter, args.error_rate,
+                                  args.throttle_rate, connect_latency=args.connect_latency)
+    print('Mock translator on http://127.0.0.1:%d/translate' % server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
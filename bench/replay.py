@@ -0,0 +1,362 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""Replay a chat trace through the mod's real hooks and report how it performed
+
+Runs entirely offline: the game client is faked (bench/fakegame.py) and
+the API is a local mock server (bench/mock_translator.py). The mod is
+loaded from the repository root in a temporary working directory so its
+log, cache and quota files stay out of the tree.
+
+A trace is JSON lines, one chat message or event each, with t in seconds
+from the start of the trace:
+
+    {"t": 0.0, "event": "arena_start"}
+    {"t": 0.4, "channel": "BattleAll", "player": "tanker_1", "text": "..."}
+    {"t": 95.0, "event": "arena_end"}
+
+Channels are Training, BattleTeam, BattleAll and Platoon. Without --trace
+a synthetic battle is generated from bench/data/langid_chat_sample.tsv.
+
+    python bench/replay.py --messages 500 --rate 20
+    python bench/replay.py --trace bench/data/sample_trace.jsonl --latency 0.3 --throttle-rate 0.05
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SAMPLE_PATH = os.path.join(BENCH_DIR, 'data', 'langid_chat_sample.tsv')
+DRAIN_SECONDS = 10.0  # Longer than any fallback timeout, so every held message resolves
+LOADING_SECONDS = 1.0  # Synthetic battles start this long after arena_start, like a loading screen
+
+# The client runs with a utf-8 default encoding, which the mod relies on when
+# it mixes chat byte strings with unicode API results
+reload(sys)
+sys.setdefaultencoding('utf-8')
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+import build_phrasebook
+import fakegame
+import mock_translator
+
+def loadMod(loop, verbose):
+    """Import the mod against the fake client and let init() install its hooks"""
+    os.chdir(tempfile.mkdtemp(prefix='mstranslator_bench_'))
+    sys.path.insert(0, ROOT)
+    stdout = sys.stdout
+    if not verbose:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        import mod_MicrosoftTranslator
+        # init() hooks the controllers from a 1 s callback
+        loop.pump(1.2)
+    finally:
+        sys.stdout = stdout
+    return mod_MicrosoftTranslator
+
+def loadTrace(path):
+    records = []
+    with io.open(path, encoding='utf-8') as trace_file:
+        for line in trace_file:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record['t'])
+    return records
+
+def syntheticTrace(messages, rate, seed):
+    """A battle's worth of chat: repeated phrases, stock calls, grid calls and English mixed with foreign text
+    
+    Some messages combine a phrase with a grid call or a stock call with a
+    phrase, as players do, which only the segment cache can partly reuse.
+    Each player has a home language nearly all of their sentences are in.
+    """
+    rng = random.Random(seed)
+    by_language = loadCorpus(SAMPLE_PATH)
+    phrases = sorted(text for texts in by_language.values() for text in texts)
+    rng.shuffle(phrases)
+    stock_by_language = loadCorpus(build_phrasebook.PHRASEBOOK_SOURCE)
+    stock_calls = sorted(text for texts in stock_by_language.values() for text in texts)
+    # Zipf-like popularity, so some phrases repeat often as in real chat
+    weights = [1.0 / (rank + 1) for rank in range(len(phrases))]
+    for texts in by_language.values():
+        rng.shuffle(texts)
+    grid_calls = [u'%s%d' % (row, column) for row in u'ABCDEFGHJK' for column in range(10)] + [u'+', u'?', u'!!', u':)']
+    channels = [('BattleAll', 0.35), ('BattleTeam', 0.35), ('Platoon', 0.15), ('Training', 0.15)]
+    players = [u'tanker_%d' % index for index in range(30)]
+    home_languages = dict((player, rng.choice(sorted(by_language))) for player in players)
+
+    def sentence(player):
+        texts = by_language[home_languages[player]]
+        if rng.random() < 0.05:
+            return weightedChoice(rng, phrases, weights)
+        return weightedChoice(rng, texts, weights[:len(texts)])
+
+    def stockCall(player):
+        return rng.choice(stock_by_language.get(home_languages[player]) or stock_calls)
+
+    records = [{'t': 0.0, 'event': 'arena_start'}]
+    now = LOADING_SECONDS
+    for _ in range(messages):
+        now += rng.expovariate(rate)
+        player = rng.choice(players)
+        roll = rng.random()
+        if roll < 0.15:
+            text = rng.choice(grid_calls)
+        elif roll < 0.35:
+            text = stockCall(player)
+        elif roll < 0.45:
+            text = u'%s %s' % (sentence(player), rng.choice(grid_calls[:-4]))
+        elif roll < 0.5:
+            text = u'%s. %s' % (stockCall(player), sentence(player))
+        else:
+            text = sentence(player)
+        records.append({'t': round(now, 3), 'channel': weightedChoice(rng, *zip(*channels)),
+                        'player': player, 'text': text})
+    return records
+
+def loadCorpus(path):
+    """{language: [text]} from a "lang<TAB>text[<TAB>...]" file, in file order"""
+    by_language = {}
+    with io.open(path, encoding='utf-8') as corpus_file:
+        for line in corpus_file:
+            if line.strip() and not line.startswith(u'#'):
+                lang, text = line.rstrip(u'\n').split(u'\t')[:2]
+                by_language.setdefault(lang, []).append(text)
+    return by_language
+
+def weightedChoice(rng, items, weights):
+    target = rng.random() * sum(weights)
+    for item, weight in zip(items, weights):
+        target -= weight
+        if target <= 0:
+            return item
+    return items[-1]
+
+def residentKilobytes():
+    """Current RSS from /proc, or the peak from getrusage where /proc is missing"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def replay(mod, loop, player_events, records, speed):
+    """Push the trace through the hooked controllers; return (messages, hook seconds each, wall seconds)"""
+    controllers = fakegame.newControllers()
+    hook_times = []
+    sent = []
+    start = time.time()
+    for record in records:
+        due = start + record['t'] / speed if speed else time.time()
+        while time.time() < due:
+            if not loop.runDue():
+                time.sleep(min(0.002, max(0.0, due - time.time())))
+        loop.runDue()
+
+        if record.get('event') == 'arena_start':
+            player_events.onAvatarBecomePlayer()
+            continue
+        if record.get('event') == 'arena_end':
+            player_events.onAvatarBecomeNonPlayer()
+            continue
+
+        # The client hands the mod utf-8 byte strings
+        message = fakegame.ChatMessage(record['text'].encode('utf-8'), record['player'], record['channel'])
+        hook_start = time.time()
+        controllers[record['channel']].addMessage(message)
+        hook_times.append(time.time() - hook_start)
+        sent.append(message)
+
+    # Let every held-back message be translated or fall back
+    drain_end = time.time() + DRAIN_SECONDS
+    while time.time() < drain_end and (mod.pending_messages or any(m.displayed_at is None for m in sent[-50:])):
+        loop.pump(0.05)
+    return sent, hook_times, time.time() - start
+
+def report(mod, server, sent, hook_times, wall_seconds, rss_before, rss_after):
+    displayed = [message for message in sent if message.displayed_at is not None]
+    # Held-back messages are translated in place, immediate mode adds follow-up lines
+    translated = [message for message in fakegame.displayed if u'\u2192en]' in message.text]
+
+    print('Messages:        %d sent, %d displayed, %d translated, %d never shown' % (
+        len(sent), len(displayed), len(translated), len(sent) - len(displayed)))
+    print('Wall time:       %.1f s, throughput %.1f messages/s' % (wall_seconds, len(sent) / wall_seconds))
+    print('Hook cost:       mean %.0f us, p99 %.0f us, max %.0f us on the game thread' % (
+        sum(hook_times) / max(len(hook_times), 1) * 1e6, percentile(hook_times, 0.99) * 1e6,
+        max(hook_times or [0]) * 1e6))
+    stats = server.stats
+    print('API:             %d requests, %d texts, %d characters, %.3f calls and %.3f texts per message' % (
+        stats['requests'], stats['texts'], stats['chars'], float(stats['requests']) / max(len(sent), 1),
+        float(stats['texts']) / max(len(sent), 1)))
+    print('                 %d server errors, %d throttled, %d connections opened, %d abandoned by the client' % (
+        stats['errors'], stats['throttled'], stats['connections'], stats['hangups']))
+    print('                 %d texts sent with the wrong from= language' % stats['wrong_source'])
+    first = mod.first_request_stats
+    if first['cold'] or first['warm']:
+        kind = 'warm' if first['warm'] else 'cold'
+        print('First request:   %s connection, %.0f ms; %d prewarmed, %d keep-alive pings, %d DNS lookups' % (
+            kind, first[kind + '_seconds'] * 1000, mod.connection_stats['prewarmed'], stats['pings'],
+            mod.dns_stats['lookups']))
+    print('Segments:        %d messages assembled from cached sentences, %d sentences reused in requests, '
+          '%d characters not sent' % (mod.segment_stats['assembled'], mod.segment_stats['reused'],
+                                      mod.segment_stats['chars_saved']))
+    if mod.player_profiles:
+        trusted = [profile.language() for profile in mod.player_profiles.values() if profile.language()]
+        print('Profiles:        %d of %d players trusted, %d English detections skipped, %d from= sent from a profile' % (
+            len(trusted), len(mod.player_profiles), mod.profile_stats['english_skips'], mod.profile_stats['sources']))
+    print('Memory:          RSS %d KB -> %d KB (%+d KB), cache %d entries' % (
+        rss_before, rss_after, rss_after - rss_before, len(mod.translation_cache)))
+
+    print('')
+    print('%-11s %6s %8s %8s %8s %8s' % ('End to end', 'count', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms'))
+    channels = sorted(set(message.channel for message in displayed))
+    for channel in channels + ['all']:
+        values = [message.displayed_at - message.sent_at for message in displayed
+                  if channel == 'all' or message.channel == channel]
+        print('%-11s %6d %8.0f %8.0f %8.0f %8.0f' % (channel, len(values), percentile(values, 0.5) * 1000,
+                                                    percentile(values, 0.95) * 1000, percentile(values, 0.99) * 1000,
+                                                    max(values or [0]) * 1000))
+
+    stalls = mod.snapshotStalls()
+    if stalls['sites']:
+        print('')
+        print('%-26s %6s %8s %8s %8s %6s' % ('Game thread', 'calls', 'mean us', 'p99 us', 'max us', 'over'))
+        for site, value in sorted(stalls['sites'].items()):
+            print('%-26s %6d %8.0f %8s %8.0f %6d' % (site, value['count'], value['mean_us'],
+                                                     value['p99_us'] or '>max', value['max_us'], value['over_budget']))
+        for stall in stalls['slowest'][:3]:
+            print('  slowest %s %.2f ms: %s' % (stall['site'], stall['ms'], ', '.join(
+                '%s %.2f' % (phase, ms) for phase, ms in stall['phases']) or 'no phases'))
+
+    outcomes = {}
+    for (name, channel, outcome), count in mod.metrics_counters.items():
+        if name == 'messages':
+            outcomes.setdefault(channel, []).append('%s %d' % (outcome, count))
+    if outcomes:
+        print('')
+        print('Outcomes:')
+        for channel in sorted(outcomes):
+            print('  %-10s %s' % (channel, ', '.join(sorted(outcomes[channel]))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--trace', help='JSON lines chat trace (default: synthetic)')
+    parser.add_argument('--messages', type=int, default=300, help='synthetic trace length')
+    parser.add_argument('--rate', type=float, default=10.0, help='synthetic messages per second')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save-trace', help='write the trace that was replayed to this file')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier, 0 for as fast as possible')
+    parser.add_argument('--latency', type=float, default=0.15, help='mock API seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests failing with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests failing with 429')
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help='mock seconds per new connection, standing in for DNS, TCP and TLS setup')
+    parser.add_argument('--hedge-latency', type=float,
+                        help="serve a second mock API with this latency as TIMEOUT_CONFIG['HEDGE_URL']")
+    parser.add_argument('--libre-latency', type=float,
+                        help='serve a LibreTranslate-style mock with this latency as a second backend')
+    parser.add_argument('--routing', choices=('failover', 'latency'), default='failover',
+                        help="BACKEND_CONFIG['ROUTING'] to replay with")
+    parser.add_argument('--display-mode', choices=('hold', 'immediate'), default='hold',
+                        help="DISPLAY_CONFIG['MODE'] to replay with")
+    parser.add_argument('--no-prewarm', action='store_true', help="replay with CONNECTION_CONFIG['PREWARM'] off")
+    parser.add_argument('--no-profiles', action='store_true', help="replay with PROFILE_CONFIG['ENABLED'] off")
+    parser.add_argument('--no-segments', action='store_true', help="replay with SEGMENT_CONFIG['ENABLED'] off")
+    parser.add_argument('--no-phrasebook', action='store_true', help='replay without tools/phrasebook.tsv')
+    parser.add_argument('--verbose', action='store_true', help="show the mod's console output")
+    args = parser.parse_args()
+
+    records = loadTrace(args.trace) if args.trace else syntheticTrace(args.messages, args.rate, args.seed)
+    if args.save_trace:
+        with io.open(args.save_trace, 'w', encoding='utf-8') as trace_file:
+            for record in records:
+                trace_file.write(json.dumps(record, ensure_ascii=False, sort_keys=True) + u'\n')
+
+    # The mock API reports the labeled language of corpus lines, as a real detector would
+    for path in (SAMPLE_PATH, build_phrasebook.PHRASEBOOK_SOURCE):
+        for lang, texts in loadCorpus(path).items():
+            mock_translator.KNOWN_LANGUAGES.update((text, lang) for text in texts)
+    server = mock_translator.startServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                         throttle_rate=args.throttle_rate, seed=args.seed,
+                                         connect_latency=args.connect_latency)
+    loop, player_events = fakegame.installFakeGame()
+    mod = loadMod(loop, args.verbose)
+    mod.API_URL = 'http://127.0.0.1:%d/translate' % server.server_address[1]
+    mod.DISPLAY_CONFIG['MODE'] = args.display_mode
+    mod.BACKEND_CONFIG['ROUTING'] = args.routing
+    mod.CONNECTION_CONFIG['PREWARM'] = not args.no_prewarm
+    mod.SEGMENT_CONFIG['ENABLED'] = not args.no_segments
+    mod.PROFILE_CONFIG['ENABLED'] = not args.no_profiles
+    if args.no_phrasebook:
+        mod.PHRASEBOOK_CONFIG['ENABLED'] = False
+    else:
+        # Outside the game the mod reads the phrasebook from its working directory
+        with open(mod.PHRASEBOOK_CONFIG['FILE'], 'wb') as phrasebook_file:
+            phrasebook_file.write(build_phrasebook.compilePhrasebook())
+    hedge_server = libre_server = None
+    if args.hedge_latency is not None:
+        hedge_server = mock_translator.startServer(latency=args.hedge_latency, jitter=args.jitter, seed=args.seed + 1,
+                                                   connect_latency=args.connect_latency)
+        mod.TIMEOUT_CONFIG['HEDGE_URL'] = 'http://127.0.0.1:%d/translate' % hedge_server.server_address[1]
+    if args.libre_latency is not None:
+        libre_server = mock_translator.startServer(latency=args.libre_latency, jitter=args.jitter, seed=args.seed + 2,
+                                                   connect_latency=args.connect_latency)
+        mod.BACKEND_CONFIG['LIBRETRANSLATE_URL'] = 'http://127.0.0.1:%d/translate' % libre_server.server_address[1]
+
+    gc.collect()
+    rss_before = residentKilobytes()
+    stdout = sys.stdout
+    if not args.verbose:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        sent, hook_times, wall_seconds = replay(mod, loop, player_events, records, args.speed)
+    finally:
+        sys.stdout = stdout
+    gc.collect()
+
+    report(mod, server, sent, hook_times, wall_seconds, rss_before, residentKilobytes())
+    if mod.phrasebook:
+        print('')
+        print('Phrasebook:      %d of %d lookups answered from %d entries (loaded in %.1f ms)' % (
+            mod.phrasebook_stats['hits'], mod.phrasebook_stats['hits'] + mod.phrasebook_stats['misses'],
+            len(mod.phrasebook), mod.phrasebook_stats['load_ms']))
+    if libre_server:
+        print('')
+        for backend in mod.getBackends():
+            print('Backend %-15s %d requests, %d failed, avg %.0f ms' % (
+                backend.name + ':', backend.stats['requests'], backend.stats['failures'], (backend.latency or 0) * 1000))
+    if hedge_server:
+        print('')
+        print('Hedging:         %d of %d requests duplicated, %d answered first by the second endpoint' % (
+            mod.hedge_stats['hedged'], mod.hedge_stats['requests'], mod.hedge_stats['won']))
+
+    # Close the mod's keep-alive connections so the server threads exit cleanly
+    for connection, last_used in mod.idle_connections:
+        connection.close()
+    for running in (server, hedge_server, libre_server):
+        if running:
+            running.shutdown()
+            running.server_close()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
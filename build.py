@@ -6,6 +6,13 @@ import os
 import py_compile
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+try:
+    from build_phrasebook import PHRASEBOOK_FILE, loadPhrases, packPhrases
+except ImportError:
+    # Source bundles without tools/ still build; the mod runs without a phrasebook
+    loadPhrases = None
+
 def build_translator():
     """Build the Chat Translator .wotmod package"""
     
@@ -63,6 +70,15 @@ def build_translator():
             zf.write(mod_py, 'res/scripts/client/gui/mods/mod_MicrosoftTranslator.py')
             print('  Added: res/scripts/client/gui/mods/mod_MicrosoftTranslator.py (source)')
         
+        # Add the phrasebook next to the mod; it is read through ResMgr at runtime
+        phrases = []
+        if loadPhrases is None:
+            print('  WARNING: tools/build_phrasebook.py not found, building without the phrasebook')
+        else:
+            phrases = loadPhrases()
+            zf.writestr('res/scripts/client/gui/mods/' + PHRASEBOOK_FILE, packPhrases(phrases))
+            print('  Added: res/scripts/client/gui/mods/%s (%d phrases)' % (PHRASEBOOK_FILE, len(phrases)))
+        
         # Create meta.xml
         meta_xml = '''<root>
 	<id>wot.chatTranslator</id>
@@ -86,9 +102,10 @@ def build_translator():
     print('\nFeatures:')
     print('  ✓ Microsoft Translator API')
     print('  ✓ Automatic language detection')
-    print('  ✓ Async for battle/training chat (no lag)')
-    print('  ✓ Sync for platoon chat')
+    print('  ✓ Async for battle/training/platoon chat (no lag)')
     print('  ✓ Smart English detection')
+    if phrases:
+        print('  ✓ Built-in phrasebook (%d common phrases, no API call)' % len(phrases))
     print('  ✓ Translation caching (4 hour expiry)')
     print('  ✓ Rate limiting (200 translations/hour per player)')
     print('\nInstall to: World_of_Tanks/mods/<game_version>/')
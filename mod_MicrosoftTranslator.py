@@ -7,14 +7,28 @@ Open Source Version - Configure via environment variables
 import BigWorld
 import urllib2  
 import urllib
+import urlparse
+import httplib
+import socket
 import json
 import threading
 import time
 import os
 import re
+import sys
+import weakref
+import math
+import heapq
+import bisect
+import itertools
+import atexit
+import copy
+import Queue
+import zlib
 from threading import RLock
-from datetime import datetime
-from collections import deque, defaultdict
+from datetime import datetime, timedelta
+from collections import deque, defaultdict, OrderedDict
+from StringIO import StringIO
 
 # Configuration - Replace these with your actual Microsoft Translator API credentials
 API_KEY = 'YOUR_API_KEY_HERE'  # Replace with your API key from Azure Portal
@@ -29,7 +43,179 @@ RATE_LIMITS = {
     'PER_PLAYER_HOURLY': 200,      # Per player per hour (generous for legit use)
     'CACHE_EXPIRE_HOURS': 4,       # How long to cache translations
     'BLACKLIST_THRESHOLD': 400,    # Hourly attempts before blacklisting
-    'WARNING_THRESHOLD': 0.8       # Warn at 80% of limit
+    'BLACKLIST_HOURS': 1,          # How long a blacklisted player stays blocked
+    'WARNING_THRESHOLD': 0.8,      # Warn at 80% of limit
+    'BUCKET_SECONDS': 300          # Hourly window granularity (12 buckets per hour)
+}
+
+# CHARACTER QUOTA CONFIGURATION (the API bills every source character sent)
+QUOTA_CONFIG = {
+    'MONTHLY_CHARS': 2000000,      # Free tier (F0) allowance per calendar month
+    'DAILY_CHARS': 100000,         # Keeps one long session from eating the month
+    'FILE': 'microsoft_translator_quota.json',
+    'SAVE_INTERVAL': 30.0,         # Seconds between meter writes (also saved on exit)
+    'STOP_AT': {                   # Budget fraction used at which each chat stops translating
+        'BattleAll': 0.7,
+        'Training': 0.7,
+        'BattleTeam': 0.9,
+        'Platoon': 1.0
+    }
+}
+
+# METRICS CONFIGURATION
+METRICS_CONFIG = {
+    'ENABLED': True,               # Each counter or histogram update costs about a microsecond
+    'FILE': 'microsoft_translator_metrics.json',
+    'DUMP_INTERVAL': 60.0,         # Seconds between rewrites of the metrics file
+    'LATENCY_BUCKETS_MS': (50, 100, 200, 350, 500, 750, 1000, 1500, 2000, 3000, 5000, 8000)
+}
+
+# DISPLAY DISPATCHER CONFIGURATION (one recurring callback shows results and fallbacks)
+DISPATCH_CONFIG = {
+    'TICK': 0.05,                  # Seconds between dispatcher ticks while messages are held back
+    'TICK_BUDGET_MS': 2.0          # Game-thread time per tick before the rest waits for the next frame
+}
+
+# DISPLAY CONFIGURATION
+DISPLAY_CONFIG = {
+    'MODE': 'hold',                # 'hold' (show the translation in place of the original, late)
+                                   # or 'immediate' (show the original now, the translation as a follow-up)
+    'FOLLOW_UP_PREFIX': '↳ '       # Marks a follow-up line as the translation of the sender's previous line
+}
+
+# STALL PROFILER CONFIGURATION (hooked addMessage calls and callbacks run on the game thread)
+STALL_CONFIG = {
+    'ENABLED': True,               # Time every hook and callback; costs a few microseconds each
+    'BUDGET_MS': 4.0,              # Game-thread time per call above which a warning is logged
+    'SLOWEST': 10,                 # Slowest calls kept with their phase breakdown
+    'BUCKETS_US': (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 50000)
+}
+
+# LOGGING CONFIGURATION
+LOG_CONFIG = {
+    'LEVEL': 'INFO',               # DEBUG logs every message; INFO keeps status, hooks and errors
+    'FILE': 'microsoft_translator.log',
+    'MAX_BYTES': 1024 * 1024,      # Rotate the log file past this size
+    'BACKUPS': 2,                  # Rotated files kept (.1, .2)
+    'QUEUE_SIZE': 2000,            # Buffered lines before the oldest are dropped
+    'FLUSH_INTERVAL': 0.5          # Seconds between background writes
+}
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+# CACHE CONFIGURATION
+CACHE_CONFIG = {
+    'MAX_ENTRIES': 5000,           # LRU eviction beyond this many translations
+    'MAX_BYTES': 2 * 1024 * 1024,  # ...or beyond this many characters of keys and values
+    'NEGATIVE_EXPIRE_MINUTES': 30, # How long to remember untranslatable/rejected text
+    'PERSIST': True,               # Keep translations on disk across game sessions
+    'PERSIST_FILE': 'microsoft_translator_cache.jsonl',
+    'PERSIST_FLUSH_INTERVAL': 5.0, # Seconds between background appends
+    'PERSIST_COMPACT_RATIO': 2.0   # Rewrite the file once it holds this many lines per live entry
+}
+
+# SEGMENT CACHE CONFIGURATION (sentences cached on their own, grid/number/name/tag masked)
+SEGMENT_CONFIG = {
+    'ENABLED': True,               # Send only the sentences of a message that are not cached yet
+    'MAX_SEGMENTS': 4              # Sentences beyond this stay with the last one (25 texts x 4 = API's 100)
+}
+
+# BATCHING CONFIGURATION
+BATCH_CONFIG = {
+    'WINDOW': 0.05,                # Seconds to collect a chat burst before sending
+    'MAX_TEXTS': 25,               # Texts per request (API allows 100)
+    'MAX_CHARS': 5000,             # Characters per request (API allows 50000)
+    'TIMEOUT': 5.0                 # HTTP timeout for batched requests
+}
+
+# WORKER POOL CONFIGURATION
+WORKER_CONFIG = {
+    'WORKERS': 2,                  # Translation threads shared by all async work
+    'QUEUE_DEPTH': 16,             # Max queued batches before the overload policy applies
+    'OVERLOAD_POLICY': 'drop_least_urgent'  # 'drop_least_urgent' or 'show_original'
+}
+
+# SCHEDULER CONFIGURATION
+SCHEDULER_CONFIG = {
+    'PRIORITY': {                  # Lower is translated first
+        'Platoon': 0,
+        'BattleTeam': 1,
+        'BattleAll': 2,
+        'Training': 3
+    },
+    'MIN_TIME_LEFT': 0.25,         # Drop work with less time than this before its original is shown
+    'ARENA_CHANNELS': ('BattleTeam', 'BattleAll')  # Cancelled when the battle ends
+}
+
+# LANGUAGE DETECTION CONFIGURATION
+LANGID_CONFIG = {
+    'ENGLISH_THRESHOLD': 0.5,      # Skip messages detected as English with this confidence
+    'ENGLISH_WORD_SHARE': 0.6,     # Latin text with this share of ENGLISH_CHAT_WORDS is English, unscored
+    'MIN_LETTERS': 8,              # Shorter Latin text is not scored: too few trigrams to tell languages apart
+    'MIN_TRIGRAMS': 20,            # A lead over fewer trigrams counts as spread over this many
+    'SOURCE_THRESHOLD': 0.9,       # Send from=<lang> so the API skips its own detection...
+    'SHARPNESS': 11.5              # ...confidence is 1 - exp(-SHARPNESS * per-trigram lead over the runner-up),
+                                   # so 0.9 needs a lead of 0.2 (wrong guesses on the bench sample lead by < 0.12)
+}
+
+# PLAYER LANGUAGE PROFILE CONFIGURATION (per-player language seen this session)
+PROFILE_CONFIG = {
+    'ENABLED': True,               # Skip detection for English speakers, send from= for the rest
+    'WINDOW': 20,                  # Recent detections kept per player
+    'MIN_MESSAGES': 5,             # Detections before a profile is trusted...
+    'MIN_SHARE': 0.8,              # ...and the share of them one language needs
+    'MIN_CONFIDENCE': 0.6,         # Local detections below this don't count, and defer to the profile
+    'RECHECK_EVERY': 10,           # An English speaker's every Nth message is detected anyway
+    'MAX_PLAYERS': 500,            # Least recently heard players are forgotten beyond this
+    'EXPIRE_MINUTES': 30           # ...or after this long without a message
+}
+
+# PHRASEBOOK CONFIGURATION (fixed translations of common phrases, built from tools/phrasebook.tsv)
+PHRASEBOOK_CONFIG = {
+    'ENABLED': True,               # Answer known phrases ("удачи", "danke") without the cache or the API
+    'FILE': 'microsoft_translator_phrasebook.bin'  # Packed next to the mod in the .wotmod by build.py
+}
+
+# PLATOON CONFIGURATION
+PLATOON_CONFIG = {
+    'MODE': 'async',               # 'async' (deferred display) or 'sync' (blocks the game thread)
+    'LATENCY_BUDGET': 3.0          # Seconds to wait for a translation before showing the original
+}
+
+# CONNECTION POOL CONFIGURATION
+CONNECTION_CONFIG = {
+    'MAX_IDLE': 4,                 # Keep-alive connections kept open between requests
+    'IDLE_TIMEOUT': 60.0,          # Seconds before an idle connection is closed
+    'PREWARM': True,               # Resolve and connect to the endpoints while a battle loads
+    'DNS_TTL': 300.0,              # Seconds a resolved endpoint address is reused
+    'KEEPALIVE_INTERVAL': 25.0     # During a battle, ping a connection quiet this long so it stays open
+}
+
+# TRANSLATION BACKEND CONFIGURATION
+BACKEND_CONFIG = {
+    'ORDER': ('microsoft', 'libretranslate'),  # Backends tried in this order with 'failover' routing
+    'ROUTING': 'failover',         # 'failover' (ORDER) or 'latency' (fastest recent average first)
+    'COOLDOWN': 30.0,              # Seconds a backend that failed is tried last
+    'SMOOTHING': 0.2,              # Weight of the newest round trip in each backend's average latency
+    'LIBRETRANSLATE_URL': None,    # Self-hosted LibreTranslate-compatible server, e.g.
+                                   # 'http://192.168.1.20:5000/translate' (free, not counted against QUOTA_CONFIG)
+    'LIBRETRANSLATE_KEY': ''       # Only if that server requires an API key
+}
+
+# ADAPTIVE TIMEOUT CONFIGURATION (timeouts follow the recent API latency)
+TIMEOUT_CONFIG = {
+    'SAMPLES': 64,                 # Recent API round trips the latency estimate is taken from
+    'MIN_SAMPLES': 8,              # Fixed timeouts (QUICK_TIMEOUT, BATCH_CONFIG) until this many are seen
+    'FACTOR': 3.0,                 # HTTP timeout is p95 latency times this...
+    'MIN': 1.0,                    # ...but at least this many seconds
+    'MAX': 8.0,                    # ...and at most this many
+    'HOLD_FACTOR': 4.0,            # Messages are held back p95 times this plus the batch window...
+    'HOLD_MIN': 2.0,               # ...but at least this many seconds
+    'HOLD_MAX': 8.0,               # ...and at most this many
+    'HEDGE_URL': None,             # Second regional endpoint for duplicates, e.g.
+                                   # 'https://api-eur.cognitive.microsofttranslator.com/translate'
+    'HEDGE_MIN_DELAY': 0.2,        # Send the duplicate once a request outlives p95, but never sooner than this
+    'HEDGE_MAX_RATIO': 0.05,       # At most this fraction of requests is sent twice (both are billed)
+    'HEDGE_MAX_QUOTA': 0.5         # No duplicates once this much of the character budget is used
 }
 
 # Check if API key is configured
@@ -39,22 +225,159 @@ if API_KEY == 'YOUR_API_KEY_HERE':
     print('[MSTranslator] Or edit this file and replace YOUR_API_KEY_HERE')
 
 # Cache and state management
-translation_cache = {}
-cache_timestamps = {}
-cache_lock = RLock()
+CACHE_MISS = object()
 pending_messages = {}
+released_messages = weakref.WeakKeyDictionary()  # Messages already shown by the async pipeline
 message_counter = 0
-log_file = None
 initialized = False
 
+# Display dispatcher state
+completed_queue = deque()  # (message_id, text, outcome) from the workers; append/popleft are atomic
+fallback_deadlines = []  # Heap of (deadline, message_id), game thread only
+dispatch_armed = False  # A dispatcher tick is scheduled
+dispatch_stats = {'ticks': 0, 'results': 0, 'fallbacks': 0, 'stale': 0, 'late': 0, 'over_budget': 0}
+
+# Logging state
+log_file = None
+log_lock = threading.Lock()
+log_queue = deque(maxlen=LOG_CONFIG['QUEUE_SIZE'])  # (created, level, message, args)
+log_level = LOG_LEVELS[LOG_CONFIG['LEVEL']]
+log_thread = None
+log_dropped = 0
+
+# Cache persistence state
+persist_lock = threading.Lock()
+persist_queue = deque(maxlen=1000)  # (key, value, stored_at) waiting to be appended
+persist_thread = None
+persist_lines = 0  # Lines in the cache file, live or superseded
+
 # Rate limiting state
 rate_limit_lock = RLock()
-player_hourly_count = defaultdict(lambda: deque())  # Per-player hourly windows
-blacklisted_players = set()
+player_hourly_count = {}  # Per-player HourlyCounter windows
+blacklisted_players = {}  # Player -> time the block expires
 rate_limit_warnings = defaultdict(int)  # Track warnings shown
 
-# Common English words for detection
-COMMON_ENGLISH_WORDS = set([
+# Metrics state
+metrics_lock = threading.Lock()
+metrics_counters = defaultdict(int)  # (name, channel, outcome) -> count
+metrics_histograms = {}  # (name, channel) -> [bucket counts, total ms]
+metrics_started_at = time.time()
+metrics_thread = None
+
+# Stall profiler state
+stall_clock = time.clock if sys.platform == 'win32' else time.time  # time.time ticks every ~15 ms on Windows
+stall_frames = []  # [started, last mark, [(phase, seconds)]] per timed call running, game thread only
+stall_stats = {}  # site -> {'counts', 'total', 'max', 'over_budget'} since the last status line
+stall_slowest = []  # Min-heap of (seconds, time, site, phases), the slowest calls since the last status line
+stall_last_warning = 0.0
+
+# Character quota state
+quota_lock = RLock()
+quota_meter = {'month': '', 'month_chars': 0, 'day': '', 'day_chars': 0}
+quota_dirty = False  # Characters recorded since the last save; quotaLoop saves them
+quota_save_lock = threading.Lock()  # Serializes file writes; never taken on the game thread
+quota_thread = None
+quota_paused = set()  # Channels currently paused by the quota, to log each change once
+
+# Batching state
+batch_condition = threading.Condition()
+batch_queue = []  # TranslationJob, ordered by urgency when a batch is taken
+batch_thread = None
+
+# Single-flight state
+inflight_lock = threading.Lock()
+inflight_requests = {}  # cacheKey -> TranslationJob queued or in flight
+inflight_stats = {'coalesced': 0, 'expired': 0, 'cancelled': 0}
+
+# Worker pool state
+work_condition = threading.Condition()
+work_queue = []  # Heap of (urgency, sequence, func, args, on_drop, queued_at)
+work_sequence = itertools.count()  # Keeps equally urgent work first in, first out
+work_threads = []
+work_stats = {'processed': 0, 'dropped': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'peak_depth': 0}
+
+# Connection pool state
+connection_lock = RLock()
+idle_connections = []  # (connection, last_used), most recently used last
+connection_stats = {'new': 0, 'reused': 0, 'reconnects': 0, 'expired': 0, 'prewarmed': 0, 'keepalives': 0}
+dns_cache = {}  # (host, port) -> (getaddrinfo result, expires at)
+dns_stats = {'hits': 0, 'lookups': 0}
+warm_lock = threading.Lock()  # One pre-warm pass at a time
+battle_active = False
+keepalive_armed = False
+first_request_pending = False  # Set when a battle loads, cleared by its first API request
+first_request_stats = {'cold': 0, 'cold_seconds': 0.0, 'warm': 0, 'warm_seconds': 0.0}
+
+# Translation backend state
+backend_lock = threading.Lock()
+translation_backends = None  # TranslationBackend list in ORDER, built on first use
+
+# API latency state
+latency_lock = threading.Lock()
+latency_samples = deque(maxlen=TIMEOUT_CONFIG['SAMPLES'])  # Seconds per round trip, timeouts included
+hedge_stats = {'requests': 0, 'hedged': 0, 'won': 0, 'skipped': 0}
+
+# Language identification state (model tables are generated at the end of the file)
+langid_lock = threading.Lock()  # Held while the index is built
+langid_languages = None  # Sorted LANGID_TRIGRAMS languages
+langid_index = None  # trigram -> ((language index, weight), ...), set by buildLangIdIndex() off the game thread
+
+# Player language profile state (in memory only, so it ends with the game session)
+profile_lock = threading.Lock()
+player_profiles = OrderedDict()  # player name -> PlayerProfile, least recently heard first
+profile_stats = {'english_skips': 0, 'rechecks': 0, 'sources': 0, 'expired': 0}
+
+# Phrasebook state
+PHRASEBOOK_MAGIC = 'WOTPB1\n'  # Must match tools/build_phrasebook.py
+phrasebook = None  # cacheKey -> (language, translation), loaded on first use
+phrasebook_stats = {'hits': 0, 'misses': 0, 'load_ms': 0.0}
+
+# Unicode letter ranges of non-Latin scripts seen in chat
+SCRIPT_RANGES = (
+    (0x0370, 0x03FF, 'Greek'),
+    (0x0400, 0x052F, 'Cyrillic'),
+    (0x0530, 0x058F, 'Armenian'),
+    (0x0590, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'),
+    (0x0900, 0x097F, 'Devanagari'),
+    (0x0E00, 0x0E7F, 'Thai'),
+    (0x10A0, 0x10FF, 'Georgian'),
+    (0x1100, 0x11FF, 'Hangul'),
+    (0x3040, 0x30FF, 'Kana'),
+    (0x3400, 0x9FFF, 'Han'),
+    (0xAC00, 0xD7AF, 'Hangul'),
+)
+
+# Script -> (language, confidence) when the script alone decides the language
+SCRIPT_LANGUAGES = {
+    'Greek': ('el', 0.95),
+    'Armenian': ('hy', 0.95),
+    'Hebrew': ('he', 0.95),
+    'Arabic': ('ar', 0.8),
+    'Devanagari': ('hi', 0.8),
+    'Thai': ('th', 0.95),
+    'Georgian': ('ka', 0.95),
+    'Hangul': ('ko', 0.95),
+    'Kana': ('ja', 0.95),
+    'Han': ('zh-Hans', 0.75),
+}
+
+# Letters that only some Cyrillic languages use, checked in order. Russian is
+# only claimed from ы э ё, which Ukrainian, Bulgarian and Macedonian lack
+# (ъ is not enough: Bulgarian uses it everywhere)
+CYRILLIC_MARKERS = (
+    (u'\u0456\u0457\u0454\u0491', 'uk', 0.95),                          # і ї є ґ
+    (u'\u045e', 'be', 0.6),                                              # ў
+    (u'\u0453\u045c\u0455', 'mk', 0.9),                                  # ѓ ќ ѕ
+    (u'\u0452\u045b\u045f\u0459\u045a\u0458', 'sr-Cyrl', 0.9),            # ђ ћ џ љ њ ј
+    (u'\u04d9\u0493\u049b\u04a3\u04e9\u04b1\u04af\u04bb', 'kk', 0.9),    # ә ғ қ ң ө ұ ү һ
+    (u'\u044b\u044d\u0451', 'ru', 0.9),                                  # ы э ё
+)
+CYRILLIC_GUESS = ('ru', 0.5)  # Cyrillic without markers: below SOURCE_THRESHOLD and MIN_CONFIDENCE, so the API detects it
+
+# Common English words and gaming slang; Latin text mostly made of these is
+# English without scoring, since one- or two-word chat has too few trigrams
+ENGLISH_CHAT_WORDS = frozenset([
     'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
     'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
     'this', 'but', 'his', 'by', 'from', 'they', 'we', 'say', 'her', 'she',
@@ -66,65 +389,498 @@ COMMON_ENGLISH_WORDS = set([
     'think', 'also', 'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first',
     'well', 'way', 'even', 'new', 'want', 'because', 'any', 'these', 'give', 'day',
     'most', 'us', 'is', 'was', 'are', 'been', 'has', 'had', 'were', 'said', 'did',
-    'here', 'there', 'where', 'why', 'how', 'what', 'when', 'who', 'which'
+    'here', 'where', 'why',
+    "i'm", "it's", "he's", "let's", "don't", "can't", 'im', 'dont', 'cant', 'lets',
+    'gg', 'wp', 'gl', 'hf', 'glhf', 'ggwp', 'ez', 'gj', 'nt', 'ns', 'ty', 'thx', 'np', 'sry', 'sorry',
+    'thanks', 'thank', 'pls', 'plz', 'please', 'ok', 'okay', 'k', 'yes', 'yeah', 'yep', 'nope', 'lol',
+    'lmao', 'omg', 'wtf', 'rip', 'brb', 'afk', 'noob', 'noobs', 'hi', 'hello', 'bye', 'lag', 'hold',
+    'min', 'sec', 'nice', 'shot', 'game', 'played', 'bad', 'problem', 'follow', 'help', 'attack',
+    'defend', 'fall', 'push', 'rush', 'camp', 'spot', 'arty', 'cap', 'capping', 'reset', 'guys',
+    'team', 'left', 'right', 'mid', 'wait', 'stop', 'retreat', 'flank', 'heavy', 'heavies', 'tank',
+    'tanks', 'fire', 'focus', 'reload', 'reloading', 'spotted', 'lit', 'hp', 'down', 'idk'
 ])
+ENGLISH_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+
+# Pre-filter for messages with nothing to translate; each whitespace-separated
+# token must match one alternative, whose group name is the skip category
+UNTRANSLATABLE_TOKEN_PATTERN = re.compile(ur"""(?:
+    (?P<emoticon>[:;=8x][-o'^]?[()\[\]dp3/\\|*o]+|\^[_.]?\^|t_t|[-o0]_[-o0]|<3|o/|\\o)
+  | (?P<grid>[a-hjk\u0430-\u0438\u043a]\d(?:[-/,][a-hjk\u0430-\u0438\u043a]\d)*)
+  | (?P<number>[-+]?\d+(?:[.,:]\d+)*[%k]?)
+  | (?P<tag>\w*\[[\w-]{1,5}\])
+  | (?P<symbols>[^\w\s]+)
+  | (?P<name>(?=[\w.-]*[^\W\d_])(?=[\w.-]*[\d_])[\w.-]+)
+)$""", re.UNICODE | re.IGNORECASE | re.VERBOSE)
+skip_stats = defaultdict(int)  # category -> messages skipped by the pre-filter
+
+# Cache key normalization
+ZERO_WIDTH_PATTERN = re.compile(u'[\u00ad\u200b-\u200f\u2060-\u2064\ufeff]')
+WHITESPACE_PATTERN = re.compile(r'\s+', re.UNICODE)
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+(?=[^\w\s])', re.UNICODE)
+REPEATED_PUNCTUATION_PATTERN = re.compile(r'([^\w\s])\1+', re.UNICODE)
+REPEATED_LETTER_PATTERN = re.compile(r'([^\W\d_])\1{2,}', re.UNICODE)
+EDGE_PUNCTUATION_PATTERN = re.compile(r'^[\W_]+|[\W_]+$', re.UNICODE)
+
+# Segment cache: sentence boundaries, and the tokens masked out of segment keys.
+# The alternatives must match grid, number, tag and name in UNTRANSLATABLE_TOKEN_PATTERN
+SENTENCE_END_PATTERN = re.compile(u'(?<=[.!?\u2026])\\s+', re.UNICODE)
+SEGMENT_TOKEN_PATTERN = re.compile(ur"""(?<![\w\[.-])(?:
+    [a-hjk\u0430-\u0438\u043a]\d(?:[-/,][a-hjk\u0430-\u0438\u043a]\d)*
+  | [-+]?\d+(?:[.,:]\d+)*[%k]?
+  | \w*\[[\w-]{1,5}\]
+  | (?=[\w.-]*[^\W\d_])(?=[\w.-]*[\d_])[\w.-]*\w
+)(?![\w\]-])""", re.UNICODE | re.IGNORECASE | re.VERBOSE)
+SEGMENT_PLACEHOLDER = u'\u01c2'  # A letter, so cacheKey() keeps it; "ǂ0" is the first masked token
+SEGMENT_PLACEHOLDER_PATTERN = re.compile(u'\u01c2(\\d+)')
+segment_lock = threading.Lock()
+segment_stats = {'assembled': 0, 'split': 0, 'sent': 0, 'reused': 0, 'chars_saved': 0}
+
+def logDebug(message, *args):
+    """Queue a DEBUG line; message is %-formatted with args on the writer thread"""
+    if log_level <= LOG_LEVELS['DEBUG']:
+        queueLogRecord('DEBUG', message, args)
+
+def logInfo(message, *args):
+    """Queue an INFO line"""
+    if log_level <= LOG_LEVELS['INFO']:
+        queueLogRecord('INFO', message, args)
+
+def logWarning(message, *args):
+    """Queue a WARNING line"""
+    if log_level <= LOG_LEVELS['WARNING']:
+        queueLogRecord('WARNING', message, args)
 
-def logDebug(message):
-    """Write to log file for debugging"""
+def logError(message, *args):
+    """Queue an ERROR line"""
+    if log_level <= LOG_LEVELS['ERROR']:
+        queueLogRecord('ERROR', message, args)
+
+def setLogLevel(level_name):
+    """Change the minimum level written to the log"""
+    global log_level
+    log_level = LOG_LEVELS[level_name]
+
+def queueLogRecord(level_name, message, args):
+    """Append a record for the writer thread, starting it on first use"""
+    global log_thread, log_dropped
+    if len(log_queue) >= LOG_CONFIG['QUEUE_SIZE']:
+        # The deque drops the oldest record on append
+        log_dropped += 1
+    log_queue.append((time.time(), level_name, message, args))
+    
+    if log_thread is None:
+        with log_lock:
+            if log_thread is None:
+                log_thread = threading.Thread(target=logWriterLoop)
+                log_thread.daemon = True
+                log_thread.start()
+
+def logWriterLoop():
+    """Drain queued log records to disk in batches"""
+    while True:
+        time.sleep(LOG_CONFIG['FLUSH_INTERVAL'])
+        flushLog()
+
+def flushLog():
+    """Format and write every queued record, rotating the file by size"""
+    global log_dropped
+    with log_lock:
+        if not log_queue and not log_dropped:
+            return
+        try:
+            if log_file is None:
+                openLogFile()
+            
+            lines = []
+            if log_dropped:
+                lines.append('[%s] WARNING: Log queue full, dropped %d lines\n' % 
+                             (time.strftime('%H:%M:%S'), log_dropped))
+                log_dropped = 0
+            
+            while log_queue:
+                created, level_name, message, args = log_queue.popleft()
+                try:
+                    if args:
+                        message = message % args
+                except Exception as e:
+                    message = '%s (format error: %s)' % (message, str(e))
+                prefix = level_name + ': ' if level_name in ('WARNING', 'ERROR') else ''
+                lines.append('[%s] %s%s\n' % (time.strftime('%H:%M:%S', time.localtime(created)), prefix, message))
+            
+            log_file.write(''.join(lines))
+            log_file.flush()
+            
+            if log_file.tell() >= LOG_CONFIG['MAX_BYTES']:
+                rotateLogFile()
+        except:
+            pass
+
+def openLogFile():
+    """Open the log file and write the session header (caller holds log_lock)"""
     global log_file
+    log_path = os.path.join(os.getcwd(), LOG_CONFIG['FILE'])
+    log_file = open(log_path, 'a')
+    log_file.write('\n' + '='*60 + '\n')
+    log_file.write('Microsoft Translator Started: %s\n' % datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    log_file.write('Rate Limiting ENABLED - v2.0\n')
+    log_file.write('='*60 + '\n')
+
+def rotateLogFile():
+    """Shift log -> log.1 -> log.2 ... keeping BACKUPS old files (caller holds log_lock)"""
+    global log_file
+    log_path = os.path.join(os.getcwd(), LOG_CONFIG['FILE'])
+    log_file.close()
+    log_file = None
+    
+    for index in range(LOG_CONFIG['BACKUPS'], 0, -1):
+        source = log_path if index == 1 else '%s.%d' % (log_path, index - 1)
+        target = '%s.%d' % (log_path, index)
+        if os.path.exists(source):
+            if os.path.exists(target):
+                os.remove(target)
+            os.rename(source, target)
+    
+    openLogFile()
+
+def atomicWrite(path, data):
+    """Replace the file at path with data, keeping the previous version as path.bak
+    
+    os.rename cannot replace an existing file on Windows, so the old file
+    is moved aside first; if the new one cannot take its place, it is moved
+    back. A crash between the two renames leaves the previous version in
+    path.bak, which restoreBackup() puts back.
+    """
+    temp_path = path + '.tmp'
+    backup_path = path + '.bak'
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(data)
+    
+    if os.path.exists(path):
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+        os.rename(path, backup_path)
     try:
-        if log_file is None:
-            log_path = os.path.join(os.getcwd(), 'microsoft_translator.log')
-            log_file = open(log_path, 'a')
-            log_file.write('\n' + '='*60 + '\n')
-            log_file.write('Microsoft Translator Started: %s\n' % datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            log_file.write('Rate Limiting ENABLED - v2.0\n')
-            log_file.write('='*60 + '\n')
-        
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        log_file.write('[%s] %s\n' % (timestamp, message))
-        log_file.flush()
-    except:
-        pass
+        os.rename(temp_path, path)
+    except OSError:
+        if os.path.exists(backup_path) and not os.path.exists(path):
+            os.rename(backup_path, path)
+        raise
+
+def restoreBackup(path):
+    """Put back the backup atomicWrite() left if a crash came between its renames; True if path exists"""
+    backup_path = path + '.bak'
+    if not os.path.exists(path) and os.path.exists(backup_path):
+        os.rename(backup_path, path)
+    return os.path.exists(path)
+
+def countMetric(name, channel=None, outcome=None, amount=1):
+    """Add to a counter labelled by chat channel and outcome"""
+    if not METRICS_CONFIG['ENABLED']:
+        return
+    with metrics_lock:
+        metrics_counters[(name, channel, outcome)] += amount
+
+def observeLatency(name, channel, seconds):
+    """Record a duration in the fixed-bucket histogram for name and channel"""
+    if not METRICS_CONFIG['ENABLED']:
+        return
+    milliseconds = seconds * 1000
+    index = bisect.bisect_left(METRICS_CONFIG['LATENCY_BUCKETS_MS'], milliseconds)
+    with metrics_lock:
+        histogram = metrics_histograms.get((name, channel))
+        if histogram is None:
+            # [count per bucket plus one overflow bucket, total milliseconds]
+            buckets = [0] * (len(METRICS_CONFIG['LATENCY_BUCKETS_MS']) + 1)
+            histogram = metrics_histograms[(name, channel)] = [buckets, 0.0]
+        histogram[0][index] += 1
+        histogram[1] += milliseconds
+
+def recordOutcome(channel, outcome, started_at=None):
+    """Count how a chat message ended up and, if it was held back, how long that took"""
+    countMetric('messages', channel, outcome)
+    if started_at is not None:
+        observeLatency('display_latency', channel, time.time() - started_at)
+
+def histogramPercentile(counts, fraction, bounds=None):
+    """Upper bucket bound (ms by default) below which fraction of the observations fall, None past the last bound"""
+    if bounds is None:
+        bounds = METRICS_CONFIG['LATENCY_BUCKETS_MS']
+    target = sum(counts) * fraction
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if count and seen >= target:
+            return bounds[index] if index < len(bounds) else None
+    return None
+
+def collectGauges():
+    """Current sizes of the queues, caches and budgets"""
+    with translation_cache.lock:
+        cache_stats = dict(translation_cache.stats)
+        cache_entries = len(translation_cache)
+        cache_bytes = translation_cache.size_bytes
+    lookups = cache_stats['hits'] + cache_stats['misses']
+    return {
+        'cache_entries': cache_entries,
+        'cache_bytes': cache_bytes,
+        'cache_hit_ratio': float(cache_stats['hits']) / lookups if lookups else 0.0,
+        'pending_messages': len(pending_messages),
+        'completed_queue': len(completed_queue),
+        'inflight_jobs': len(inflight_requests),
+        'batch_queue': len(batch_queue),
+        'work_queue': len(work_queue),
+        'idle_connections': len(idle_connections),
+        'quota_usage': quotaUsage()
+    }
+
+def snapshotMetrics():
+    """Return all metrics as a JSON-ready dict"""
+    with metrics_lock:
+        counters = dict(metrics_counters)
+        histograms = dict((key, (list(value[0]), value[1])) for key, value in metrics_histograms.items())
+    
+    snapshot = {
+        'time': int(time.time()),
+        'uptime': int(time.time() - metrics_started_at),
+        'counters': {},
+        'histograms': {},
+        'gauges': collectGauges(),
+        'stalls': snapshotStalls()
+    }
+    for (name, channel, outcome), value in counters.items():
+        by_channel = snapshot['counters'].setdefault(name, {}).setdefault(channel or 'all', {})
+        by_channel[outcome or 'total'] = value
+    for (name, channel), (counts, total_ms) in histograms.items():
+        observations = sum(counts)
+        snapshot['histograms'].setdefault(name, {})[channel or 'all'] = {
+            'bounds_ms': list(METRICS_CONFIG['LATENCY_BUCKETS_MS']),
+            'counts': counts,
+            'count': observations,
+            'mean_ms': total_ms / observations if observations else 0.0,
+            'p50_ms': histogramPercentile(counts, 0.5),
+            'p99_ms': histogramPercentile(counts, 0.99)
+        }
+    return snapshot
+
+def writeMetrics():
+    """Replace the metrics file with a fresh snapshot"""
+    path = os.path.join(os.getcwd(), METRICS_CONFIG['FILE'])
+    try:
+        atomicWrite(path, json.dumps(snapshotMetrics(), indent=1, sort_keys=True))
+    except (IOError, OSError) as e:
+        logError('Metrics write error: %s', str(e))
+
+def metricsLoop():
+    """Dump the metrics file on a fixed interval"""
+    while True:
+        time.sleep(METRICS_CONFIG['DUMP_INTERVAL'])
+        try:
+            writeMetrics()
+        except Exception as e:
+            logError('Metrics dump error: %s', str(e))
+
+def startMetrics():
+    """Start the background thread that writes the metrics file"""
+    global metrics_thread
+    if not METRICS_CONFIG['ENABLED'] or metrics_thread is not None:
+        return
+    metrics_thread = threading.Thread(target=metricsLoop)
+    metrics_thread.daemon = True
+    metrics_thread.start()
+
+def logMetricsStatus():
+    """Log display latency percentiles and outcome counts per channel"""
+    snapshot = snapshotMetrics()
+    latency = snapshot['histograms'].get('display_latency', {})
+    for channel, outcomes in sorted(snapshot['counters'].get('messages', {}).items()):
+        histogram = latency.get(channel)
+        percentiles = ''
+        if histogram:
+            percentiles = ', p50 <= %s ms, p99 <= %s ms' % (histogram['p50_ms'] or '>max', histogram['p99_ms'] or '>max')
+        logInfo('Status - %s: %s%s', channel, ', '.join('%s %d' % item for item in sorted(outcomes.items())),
+                percentiles)
+
+def stallTimed(site, func):
+    """Wrap a game-thread entry point so every call's duration is recorded under site
+    
+    stallMark() inside func splits the call into phases; time after the last
+    mark is reported as 'rest'. A call made from inside another timed call
+    (a fallback re-entering a hooked addMessage) is recorded on its own and
+    also counts towards its caller.
+    """
+    def timed(*args, **kwargs):
+        if not STALL_CONFIG['ENABLED']:
+            return func(*args, **kwargs)
+        started = stall_clock()
+        frame = [started, started, []]
+        stall_frames.append(frame)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stall_frames.pop()
+            finished = stall_clock()
+            phases = frame[2]
+            if phases and finished > frame[1]:
+                phases.append(('rest', finished - frame[1]))
+            recordStall(site, finished - started, phases)
+    timed.__name__ = getattr(func, '__name__', site)
+    timed.__doc__ = getattr(func, '__doc__', None)
+    return timed
+
+def stallMark(phase):
+    """Charge the time since the previous mark in the current timed call to phase"""
+    if stall_frames:
+        frame = stall_frames[-1]
+        now = stall_clock()
+        frame[2].append((phase, now - frame[1]))
+        frame[1] = now
+
+def recordStall(site, seconds, phases):
+    """Add one timed call to its site's histogram and the slowest list, warning past the budget"""
+    global stall_last_warning
+    buckets = STALL_CONFIG['BUCKETS_US']
+    index = bisect.bisect_left(buckets, seconds * 1e6)
+    over_budget = seconds * 1000 > STALL_CONFIG['BUDGET_MS']
+    with metrics_lock:
+        stats = stall_stats.get(site)
+        if stats is None:
+            stats = stall_stats[site] = {'counts': [0] * (len(buckets) + 1), 'total': 0.0, 'max': 0.0,
+                                         'over_budget': 0}
+        stats['counts'][index] += 1
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        if over_budget:
+            stats['over_budget'] += 1
+        
+        if len(stall_slowest) < STALL_CONFIG['SLOWEST']:
+            heapq.heappush(stall_slowest, (seconds, time.time(), site, phases))
+        elif seconds > stall_slowest[0][0]:
+            heapq.heapreplace(stall_slowest, (seconds, time.time(), site, phases))
+    
+    # One line a second at most, so a run of slow frames cannot flood the log
+    if over_budget and time.time() - stall_last_warning >= 1.0:
+        stall_last_warning = time.time()
+        logWarning('Stall: %s held the game thread %.1f ms (%s)', site, seconds * 1000, formatPhases(phases))
+
+def formatPhases(phases):
+    return ', '.join('%s %.2f ms' % (phase, seconds * 1000) for phase, seconds in phases) or 'no phases'
+
+def callLater(delay, func, site):
+    """BigWorld.callback(delay, func) with func timed by the stall profiler"""
+    return BigWorld.callback(delay, stallTimed(site, func))
+
+def snapshotStalls():
+    """Game-thread time per site and the slowest calls since the last status line"""
+    with metrics_lock:
+        stats = dict((site, dict(value, counts=list(value['counts']))) for site, value in stall_stats.items())
+        slowest = sorted(stall_slowest, reverse=True)
+    
+    buckets = STALL_CONFIG['BUCKETS_US']
+    sites = {}
+    for site, value in stats.items():
+        calls = sum(value['counts'])
+        sites[site] = {
+            'bounds_us': list(buckets),
+            'counts': value['counts'],
+            'count': calls,
+            'mean_us': value['total'] * 1e6 / calls if calls else 0.0,
+            'max_us': value['max'] * 1e6,
+            'p50_us': histogramPercentile(value['counts'], 0.5, buckets),
+            'p99_us': histogramPercentile(value['counts'], 0.99, buckets),
+            'over_budget': value['over_budget']
+        }
+    return {
+        'budget_ms': STALL_CONFIG['BUDGET_MS'],
+        'sites': sites,
+        'slowest': [{'site': site, 'ms': seconds * 1000, 'time': int(when),
+                     'phases': [[phase, phase_seconds * 1000] for phase, phase_seconds in phases]}
+                    for seconds, when, site, phases in slowest]
+    }
+
+def logStallStatus():
+    """Log game-thread time per site and the slowest calls, then start a new window"""
+    if not STALL_CONFIG['ENABLED']:
+        return
+    stalls = snapshotStalls()
+    for site, value in sorted(stalls['sites'].items()):
+        logInfo('Status - Game thread %s: %d calls, mean %.0f us, p50 <= %s us, p99 <= %s us, max %.0f us, '
+                '%d over %.1f ms', site, value['count'], value['mean_us'], value['p50_us'] or '>max',
+                value['p99_us'] or '>max', value['max_us'], value['over_budget'], stalls['budget_ms'])
+    for stall in stalls['slowest'][:3]:
+        logInfo('Status - Slow call: %s %.2f ms at %s (%s)', stall['site'], stall['ms'],
+                datetime.fromtimestamp(stall['time']).strftime('%H:%M:%S'),
+                ', '.join('%s %.2f ms' % (phase, ms) for phase, ms in stall['phases']) or 'no phases')
+    
+    with metrics_lock:
+        stall_stats.clear()
+        del stall_slowest[:]
+
+class HourlyCounter(object):
+    """Per-player translation count over the last hour in fixed-size time buckets
+    
+    Only the player being checked has its old buckets dropped, so a check
+    costs at most one pass over 3600 / BUCKET_SECONDS buckets.
+    """
+    __slots__ = ('total', 'buckets')
+    
+    def __init__(self):
+        self.total = 0
+        self.buckets = deque()  # [bucket_index, count], oldest first
+    
+    def count(self, now):
+        """Expire buckets older than an hour and return the remaining total"""
+        oldest_bucket = int(now // RATE_LIMITS['BUCKET_SECONDS']) - 3600 // RATE_LIMITS['BUCKET_SECONDS'] + 1
+        while self.buckets and self.buckets[0][0] < oldest_bucket:
+            self.total -= self.buckets.popleft()[1]
+        return self.total
+    
+    def add(self, now):
+        bucket = int(now // RATE_LIMITS['BUCKET_SECONDS'])
+        if self.buckets and self.buckets[-1][0] == bucket:
+            self.buckets[-1][1] += 1
+        else:
+            self.buckets.append([bucket, 1])
+        self.total += 1
 
 def cleanupRateLimitWindows():
-    """Clean up old entries from rate limit windows"""
+    """Drop idle player windows and expired blacklist entries"""
     with rate_limit_lock:
         current_time = time.time()
-        hour_ago = current_time - 3600
         
-        # Clean per-player windows
         for player_name in list(player_hourly_count.keys()):
-            # Clean hourly
-            while player_hourly_count[player_name] and player_hourly_count[player_name][0] < hour_ago:
-                player_hourly_count[player_name].popleft()
-            
-            # Remove empty deques
-            if not player_hourly_count[player_name]:
+            if not player_hourly_count[player_name].count(current_time):
                 del player_hourly_count[player_name]
+        
+        for player_name, expires_at in blacklisted_players.items():
+            if expires_at <= current_time:
+                del blacklisted_players[player_name]
 
 def checkRateLimit(player_name=None):
     """Check if translation is allowed under rate limits"""
     with rate_limit_lock:
         current_time = time.time()
-        cleanupRateLimitWindows()
         
         # Check if player is blacklisted
         if player_name and player_name in blacklisted_players:
-            logDebug('Player %s is blacklisted' % player_name)
-            return False, "Player temporarily blocked due to excessive requests"
+            if blacklisted_players[player_name] > current_time:
+                logWarning('Player %s is blacklisted', player_name)
+                return False, "Player temporarily blocked due to excessive requests"
+            del blacklisted_players[player_name]
+            logInfo('Player %s blacklist expired', player_name)
         
         # Check per-player limits if player_name provided
         if player_name:
             # Check per-player hourly limit
-            player_hour_count = len(player_hourly_count[player_name])
+            window = player_hourly_count.get(player_name)
+            player_hour_count = window.count(current_time) if window else 0
             if player_hour_count >= RATE_LIMITS['PER_PLAYER_HOURLY']:
-                logDebug('Player %s hourly limit reached: %d/%d' % (player_name, player_hour_count, RATE_LIMITS['PER_PLAYER_HOURLY']))
+                logWarning('Player %s hourly limit reached: %d/%d',
+                           player_name, player_hour_count, RATE_LIMITS['PER_PLAYER_HOURLY'])
                 
                 # Check for blacklisting
                 if player_hour_count >= RATE_LIMITS['BLACKLIST_THRESHOLD']:
-                    blacklisted_players.add(player_name)
-                    logDebug('Player %s added to blacklist' % player_name)
+                    blacklisted_players[player_name] = current_time + RATE_LIMITS['BLACKLIST_HOURS'] * 3600
+                    logWarning('Player %s added to blacklist', player_name)
                 
                 return False, "Your hourly limit reached (200 translations). Get your own free API key!"
             
@@ -144,30 +900,439 @@ def recordTranslation(player_name=None):
         
         # Record in per-player windows if player_name provided
         if player_name:
-            player_hourly_count[player_name].append(current_time)
+            window = player_hourly_count.get(player_name)
+            if window is None:
+                window = player_hourly_count[player_name] = HourlyCounter()
+            window.count(current_time)
+            window.add(current_time)
             
             # Log current usage
-            logDebug('Player %s - Hourly: %d/%d' % 
-                     (player_name, len(player_hourly_count[player_name]), 
-                      RATE_LIMITS['PER_PLAYER_HOURLY']))
+            logDebug('Player %s - Hourly: %d/%d', player_name, window.total, RATE_LIMITS['PER_PLAYER_HOURLY'])
+
+def getQuotaPath():
+    """Path of the persisted character meter, next to the log file"""
+    return os.path.join(os.getcwd(), QUOTA_CONFIG['FILE'])
+
+def rollQuotaPeriods(now):
+    """Start a new day or month on the meter when the calendar moved (caller holds quota_lock)"""
+    today = datetime.fromtimestamp(now)
+    month = today.strftime('%Y-%m')
+    day = today.strftime('%Y-%m-%d')
+    if quota_meter['month'] != month:
+        quota_meter.update({'month': month, 'month_chars': 0})
+    if quota_meter['day'] != day:
+        quota_meter.update({'day': day, 'day_chars': 0})
+
+def loadQuota():
+    """Restore the character meter saved by earlier sessions"""
+    path = getQuotaPath()
+    try:
+        if not restoreBackup(path):
+            return
+        with open(path, 'rb') as quota_file:
+            saved = json.load(quota_file)
+        with quota_lock:
+            for key in quota_meter:
+                if key in saved:
+                    quota_meter[key] = saved[key]
+            rollQuotaPeriods(time.time())
+            logInfo('Loaded character meter: %d chars this month, %d today',
+                    quota_meter['month_chars'], quota_meter['day_chars'])
+    except (IOError, OSError, ValueError) as e:
+        logError('Quota load error: %s', str(e))
+
+def saveQuota():
+    """Write the character meter to disk, copying it under quota_lock and writing outside it"""
+    global quota_dirty
+    with quota_save_lock:
+        with quota_lock:
+            data = json.dumps(quota_meter)
+            quota_dirty = False
+        try:
+            atomicWrite(getQuotaPath(), data)
+        except (IOError, OSError) as e:
+            with quota_lock:
+                quota_dirty = True
+            logError('Quota save error: %s', str(e))
+
+def quotaLoop():
+    """Save the character meter every SAVE_INTERVAL when it changed, so a crash loses little"""
+    while True:
+        time.sleep(QUOTA_CONFIG['SAVE_INTERVAL'])
+        if quota_dirty:
+            saveQuota()
+
+def startQuotaSaver():
+    """Start the background thread that saves the character meter"""
+    global quota_thread
+    if quota_thread is not None:
+        return
+    quota_thread = threading.Thread(target=quotaLoop)
+    quota_thread.daemon = True
+    quota_thread.start()
+
+def recordCharacters(texts):
+    """Add the characters of a completed API request to the meter; quotaLoop saves it"""
+    global quota_dirty
+    chars = 0
+    for text in texts:
+        if isinstance(text, str):
+            text = text.decode('utf-8', 'replace')
+        chars += len(text)
+    
+    with quota_lock:
+        now = time.time()
+        rollQuotaPeriods(now)
+        quota_meter['month_chars'] += chars
+        quota_meter['day_chars'] += chars
+        quota_dirty = True
+
+def quotaUsage():
+    """Fraction of the daily or monthly budget used, whichever is higher"""
+    with quota_lock:
+        rollQuotaPeriods(time.time())
+        return max(float(quota_meter['month_chars']) / QUOTA_CONFIG['MONTHLY_CHARS'],
+                   float(quota_meter['day_chars']) / QUOTA_CONFIG['DAILY_CHARS'])
+
+def quotaAllows(channel):
+    """Check if a chat channel may still use the API at the current budget usage
+    
+    Channels stop in stages as the budget runs out (QUOTA_CONFIG['STOP_AT']):
+    battle all-chat first, then team chat, platoon chat last. Cached
+    translations are still shown for paused channels.
+    """
+    usage = quotaUsage()
+    allowed = usage < QUOTA_CONFIG['STOP_AT'].get(channel, 1.0)
+    if not allowed and channel not in quota_paused:
+        quota_paused.add(channel)
+        logWarning('Character budget %.0f%% used, pausing %s translation', usage * 100, channel)
+    elif allowed and channel in quota_paused:
+        quota_paused.discard(channel)
+        logInfo('Character budget %.0f%% used, resuming %s translation', usage * 100, channel)
+    return allowed
+
+def logQuotaStatus():
+    """Log budget usage, this month's burn rate and when the monthly budget runs out at that rate"""
+    with quota_lock:
+        now = time.time()
+        rollQuotaPeriods(now)
+        month_chars = quota_meter['month_chars']
+        day_chars = quota_meter['day_chars']
+    
+    today = datetime.fromtimestamp(now)
+    month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elapsed_days = max((today - month_start).total_seconds() / 86400.0, 1.0 / 24)
+    burn_rate = month_chars / elapsed_days
+    remaining = max(QUOTA_CONFIG['MONTHLY_CHARS'] - month_chars, 0)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    days_left = remaining / burn_rate if burn_rate else None
+    if days_left is None or days_left >= (next_month - today).total_seconds() / 86400.0:
+        exhaustion = 'not this month'
+    else:
+        exhaustion = (today + timedelta(days=days_left)).strftime('%Y-%m-%d')
+    
+    logInfo('Status - Quota: %d/%d chars this month (%.0f%%), %d/%d today, Burn: %.0f chars/day, Exhausted: %s%s',
+            month_chars, QUOTA_CONFIG['MONTHLY_CHARS'], month_chars * 100.0 / QUOTA_CONFIG['MONTHLY_CHARS'],
+            day_chars, QUOTA_CONFIG['DAILY_CHARS'], burn_rate, exhaustion,
+            ', Paused: %s' % ', '.join(sorted(quota_paused)) if quota_paused else '')
+
+class TranslationCache(object):
+    """Size-bounded LRU cache with lazy per-entry expiry
+    
+    Entries map a cacheKey() to a (language, translation) tuple, or to None
+    for text that should be shown as-is. None entries use their own
+    (shorter) TTL and are never written to disk, nor are entries put with
+    persist=False.
+    """
+    
+    def __init__(self, max_entries, max_bytes, ttl, negative_ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = RLock()
+        self.entries = OrderedDict()  # key -> (value, expires_at, persist), least recently used first
+        self.size_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+    
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss or expired entry"""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+            
+            if entry[1] < time.time():
+                self.size_bytes -= self._entrySize(key, entry[0])
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+            
+            # Re-insert to mark as most recently used
+            self.entries[key] = entry
+            self.stats['hits'] += 1
+            return entry[0]
+    
+    def put(self, key, value, stored_at=None, persist=True):
+        """Store value for key, evicting least recently used entries over the limits"""
+        expires_at = (stored_at or time.time()) + self._ttlFor(value)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= self._entrySize(key, old[0])
+            
+            self.entries[key] = (value, expires_at, persist and value is not None)
+            self.size_bytes += self._entrySize(key, value)
+            
+            while self.entries and (len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes):
+                old_key, old_entry = self.entries.popitem(last=False)
+                self.size_bytes -= self._entrySize(old_key, old_entry[0])
+                self.stats['evictions'] += 1
+    
+    def warm(self, key, value, stored_at):
+        """Insert a persisted entry unless it expired or a fresher one exists"""
+        if stored_at + self._ttlFor(value) < time.time():
+            return False
+        with self.lock:
+            if key in self.entries:
+                return False
+            self.put(key, value, stored_at)
+            return True
+    
+    def snapshot(self):
+        """Return live entries meant for disk as (key, value, stored_at), least recently used first"""
+        now = time.time()
+        with self.lock:
+            return [(key, entry[0], entry[1] - self._ttlFor(entry[0]))
+                    for key, entry in self.entries.iteritems() if entry[2] and entry[1] >= now]
+    
+    def purgeExpired(self):
+        """Drop every expired entry and return how many were removed"""
+        now = time.time()
+        with self.lock:
+            expired = [key for key, entry in self.entries.iteritems() if entry[1] < now]
+            for key in expired:
+                value = self.entries.pop(key)[0]
+                self.size_bytes -= self._entrySize(key, value)
+            self.stats['expirations'] += len(expired)
+            return len(expired)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _entrySize(self, key, value):
+        return len(key) + (len(value[1]) if value else 0)
+    
+    def _ttlFor(self, value):
+        return self.ttl if value is not None else self.negative_ttl
+
+translation_cache = TranslationCache(CACHE_CONFIG['MAX_ENTRIES'], CACHE_CONFIG['MAX_BYTES'],
+                                     RATE_LIMITS['CACHE_EXPIRE_HOURS'] * 3600,
+                                     CACHE_CONFIG['NEGATIVE_EXPIRE_MINUTES'] * 60)
+
+def cacheKey(text):
+    """Canonical cache key so trivial variants of a message share one translation
+    
+    "Привет!!", "привет" and "ПРИВЕТ  !" all map to u'привет'. Keys are
+    only used for lookups; the player's original text is always displayed.
+    """
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'replace')
+    text = ZERO_WIDTH_PATTERN.sub(u'', text).lower()
+    text = WHITESPACE_PATTERN.sub(u' ', text)
+    text = SPACE_BEFORE_PUNCTUATION_PATTERN.sub(u'', text)
+    text = REPEATED_PUNCTUATION_PATTERN.sub(r'\1', text)
+    text = REPEATED_LETTER_PATTERN.sub(r'\1\1', text)
+    
+    # Messages made only of punctuation (":)", "?!") keep it
+    return EDGE_PUNCTUATION_PATTERN.sub(u'', text) or text.strip()
+
+def readPhrasebookFile():
+    """Raw phrasebook bytes from the .wotmod (ResMgr), or from the working directory outside the game"""
+    try:
+        import ResMgr
+    except ImportError:
+        ResMgr = None
+    if ResMgr is not None:
+        res_path = 'scripts/client/gui/mods/' + PHRASEBOOK_CONFIG['FILE']
+        section = ResMgr.openSection(res_path)
+        if section is not None:
+            data = section.asBinary
+            ResMgr.purge(res_path)
+            return data
+    
+    path = os.path.join(os.getcwd(), PHRASEBOOK_CONFIG['FILE'])
+    if os.path.exists(path):
+        with open(path, 'rb') as phrasebook_file:
+            return phrasebook_file.read()
+    return None
+
+def getPhrasebook():
+    """Load (once) the packed phrasebook into a key -> (language, translation) dict"""
+    global phrasebook
+    if phrasebook is None:
+        start_time = time.time()
+        entries = {}
+        try:
+            data = readPhrasebookFile()
+            if data is None:
+                logInfo('Phrasebook %s not found, known phrases go through the cache and API',
+                        PHRASEBOOK_CONFIG['FILE'])
+            elif not data.startswith(PHRASEBOOK_MAGIC):
+                logWarning('Phrasebook %s has an unknown format, ignoring it', PHRASEBOOK_CONFIG['FILE'])
+            else:
+                languages = {}
+                for line in zlib.decompress(data[len(PHRASEBOOK_MAGIC):]).decode('utf-8').split(u'\n'):
+                    key, lang, translation = line.split(u'\t')
+                    # One shared string per language instead of one per phrase
+                    lang = languages.setdefault(lang, str(lang))
+                    entries[key] = (lang, translation)
+        except Exception as e:
+            logError('Phrasebook load error: %s', str(e))
+            entries = {}
+        phrasebook = entries
+        phrasebook_stats['load_ms'] = (time.time() - start_time) * 1000
+        if entries:
+            logInfo('Loaded %d phrasebook entries in %.1f ms', len(entries), phrasebook_stats['load_ms'])
+    return phrasebook
+
+def phrasebookLookup(text):
+    """Return the (language, translation) tuple for a known phrase, or None"""
+    if not PHRASEBOOK_CONFIG['ENABLED']:
+        return None
+    entries = getPhrasebook()
+    if not entries:
+        return None
+    found = entries.get(cacheKey(text))
+    phrasebook_stats['hits' if found else 'misses'] += 1
+    return found
+
+def logPhrasebookStatus():
+    """Log how many messages the phrasebook answered"""
+    if phrasebook:
+        lookups = phrasebook_stats['hits'] + phrasebook_stats['misses']
+        logInfo('Status - Phrasebook: %d entries, Hits: %d (%.0f%% of lookups), loaded in %.1f ms',
+                len(phrasebook), phrasebook_stats['hits'],
+                100.0 * phrasebook_stats['hits'] / lookups if lookups else 0.0, phrasebook_stats['load_ms'])
+
+def formatTranslation(cached, original_text):
+    """Format a cached (language, translation) tuple for display"""
+    return '[%s→en] %s | %s' % (cached[0], cached[1], original_text)
 
 def cleanExpiredCache():
     """Remove expired cache entries"""
-    with cache_lock:
-        current_time = time.time()
-        expire_time = RATE_LIMITS['CACHE_EXPIRE_HOURS'] * 3600
-        
-        expired_keys = []
-        for key, timestamp in cache_timestamps.items():
-            if current_time - timestamp > expire_time:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del translation_cache[key]
-            del cache_timestamps[key]
+    expired_count = translation_cache.purgeExpired()
+    if expired_count:
+        logDebug('Cleaned %d expired cache entries', expired_count)
+
+def getCachePath():
+    """Path of the persisted cache, next to the log file"""
+    return os.path.join(os.getcwd(), CACHE_CONFIG['PERSIST_FILE'])
+
+def startCachePersistence():
+    """Start the background thread that loads, appends to and compacts the cache file"""
+    global persist_thread
+    if not CACHE_CONFIG['PERSIST'] or persist_thread is not None:
+        return
+    persist_thread = threading.Thread(target=persistLoop)
+    persist_thread.daemon = True
+    persist_thread.start()
+
+def persistTranslation(key, value):
+    """Queue a translation for the background writer; None (untranslatable or failed) stays in memory"""
+    if persist_thread is None or value is None:
+        return
+    with persist_lock:
+        persist_queue.append((key, value, time.time()))
+
+def loadPersistedCache():
+    """Warm the in-memory cache from disk (runs on the persistence thread)"""
+    global persist_lines
+    path = getCachePath()
+    if not restoreBackup(path):
+        return
+    
+    start_time = time.time()
+    loaded = 0
+    skipped = 0
+    lines = 0
+    with open(path, 'rb') as cache_file:
+        for line in cache_file:
+            lines += 1
+            try:
+                record = json.loads(line)
+                key, value, stored_at = record['k'], persistedValue(record['v']), float(record['t'])
+            except (ValueError, KeyError, TypeError):
+                # Torn write from a crash; compaction drops it
+                continue
+            if not isinstance(key, basestring) or value is None:
+                # Negative entry or a value in an older format; compaction drops it
+                skipped += 1
+                continue
+            if translation_cache.warm(key, value, stored_at):
+                loaded += 1
+    
+    persist_lines += lines
+    logInfo('Loaded %d cached translations from disk (%d lines, %d skipped) in %.0f ms',
+            loaded, lines, skipped, (time.time() - start_time) * 1000)
+
+def persistedValue(value):
+    """The (language, translation) tuple of a cache file line, or None unless it holds exactly two strings"""
+    if isinstance(value, (list, tuple)) and len(value) == 2 and all(isinstance(part, basestring) for part in value):
+        return (value[0], value[1])
+    return None
+
+def appendPersistedEntries(entries):
+    """Append queued entries to the cache file"""
+    global persist_lines
+    with open(getCachePath(), 'ab') as cache_file:
+        for key, value, stored_at in entries:
+            cache_file.write(json.dumps({'k': key, 'v': value, 't': int(stored_at)}) + '\n')
+    persist_lines += len(entries)
+
+def compactPersistedCache():
+    """Rewrite the cache file with only the live entries"""
+    global persist_lines
+    entries = translation_cache.snapshot()
+    atomicWrite(getCachePath(), ''.join(json.dumps({'k': key, 'v': value, 't': int(stored_at)}) + '\n'
+                                        for key, value, stored_at in entries))
+    
+    logInfo('Compacted cache file: %d lines -> %d entries', persist_lines, len(entries))
+    persist_lines = len(entries)
+
+def persistLoop():
+    """Load the cache file, then append new entries in batches and compact when bloated"""
+    try:
+        loadPersistedCache()
+    except Exception as e:
+        logError('Cache load error: %s', str(e))
+    
+    while True:
+        time.sleep(CACHE_CONFIG['PERSIST_FLUSH_INTERVAL'])
+        with persist_lock:
+            entries = list(persist_queue)
+            persist_queue.clear()
         
-        if expired_keys:
-            logDebug('Cleaned %d expired cache entries' % len(expired_keys))
+        try:
+            if entries:
+                appendPersistedEntries(entries)
+            
+            live_entries = max(len(translation_cache), 1)
+            if persist_lines > max(live_entries * CACHE_CONFIG['PERSIST_COMPACT_RATIO'], 100):
+                compactPersistedCache()
+        except Exception as e:
+            logError('Cache persistence error: %s', str(e))
+
+def logCacheStatus():
+    """Log cache size and hit/miss/eviction counters"""
+    with translation_cache.lock:
+        stats = translation_cache.stats
+        lookups = stats['hits'] + stats['misses']
+        hit_ratio = float(stats['hits']) / lookups if lookups else 0.0
+        logInfo('Status - Cache: %d entries, %d KB, Hits: %d (%.0f%%), Misses: %d, Evictions: %d, Expired: %d',
+                len(translation_cache), translation_cache.size_bytes / 1024, stats['hits'], hit_ratio * 100,
+                stats['misses'], stats['evictions'], stats['expirations'])
 
 def extractPlayerName(message):
     """Extract player name from message object"""
@@ -206,28 +1371,54 @@ def init():
         return
     
     initialized = True
-    logDebug('Starting Microsoft Chat Translator with Rate Limiting...')
+    logInfo('Starting Microsoft Chat Translator with Rate Limiting...')
     print('[MSTranslator] Starting Microsoft Chat Translator with Rate Limiting...')
-    BigWorld.callback(1.0, hookChat)
-    BigWorld.callback(2.0, showNotification)
+    callLater(1.0, hookChat, 'hookChat')
+    callLater(2.0, showNotification, 'showNotification')
+    
+    # Warm the cache from disk and build the language identifier in the background
+    startCachePersistence()
+    startLangIdIndex()
+    loadQuota()
+    startQuotaSaver()
+    startMetrics()
     
     # Start cache cleanup timer
-    BigWorld.callback(600.0, periodicCleanup)  # Every 10 minutes
+    callLater(600.0, periodicCleanup, 'periodicCleanup')  # Every 10 minutes
 
 def periodicCleanup():
-    """Periodic cleanup of caches and rate limit windows"""
+    """Periodic cleanup of caches, rate limit windows and player profiles"""
     cleanExpiredCache()
+    stallMark('cache_sweep')
     cleanupRateLimitWindows()
+    stallMark('rate_limit_sweep')
+    expireProfiles()
+    stallMark('profile_sweep')
     
     # Log current status
     with rate_limit_lock:
         active_players = len(player_hourly_count)
-        total_translations = sum(len(counts) for counts in player_hourly_count.values())
-        logDebug('Status - Cache: %d entries, Active players: %d, Total translations: %d, Blacklisted: %d' % 
-                 (len(translation_cache), active_players, total_translations, len(blacklisted_players)))
+        total_translations = sum(window.total for window in player_hourly_count.values())
+        logInfo('Status - Active players: %d, Total translations: %d, Blacklisted: %d',
+                active_players, total_translations, len(blacklisted_players))
+    
+    logQuotaStatus()
+    logCacheStatus()
+    logSegmentStatus()
+    logSkipStatus()
+    logProfileStatus()
+    logPhrasebookStatus()
+    logWorkerStatus()
+    logDispatchStatus()
+    logConnectionStatus()
+    logLatencyStatus()
+    logBackendStatus()
+    logMetricsStatus()
+    logStallStatus()
+    stallMark('status')
     
     # Schedule next cleanup
-    BigWorld.callback(600.0, periodicCleanup)
+    callLater(600.0, periodicCleanup, 'periodicCleanup')
 
 def showNotification():
     """Show notification"""
@@ -238,57 +1429,343 @@ def showNotification():
     except Exception as e:
         print('[MSTranslator] Could not show notification: %s' % str(e))
 
-def isLikelyEnglish(text):
-    """Check if text is likely already in English"""
-    # Remove special characters and convert to lowercase
-    clean_text = re.sub(r'[^\w\s]', '', text.lower())
-    words = clean_text.split()
+def classifyUntranslatable(text):
+    """Return the skip category of a message with no words to translate, or None
     
-    if not words:
+    Grid references (A1, J0), numbers, punctuation and emoji, emoticons, clan
+    tags and names or tank designations (T-34, Obj.140, player_123) need no
+    API call. A message mixing several of these is 'mixed'.
+    """
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'replace')
+    
+    category = 'empty'
+    for token in text.split():
+        match = UNTRANSLATABLE_TOKEN_PATTERN.match(token)
+        if not match:
+            return None
+        if category == 'empty':
+            category = match.lastgroup
+        elif category != match.lastgroup:
+            category = 'mixed'
+    return category
+
+def isUntranslatable(text):
+    """Check the pre-filter and count skipped messages per category"""
+    category = classifyUntranslatable(text)
+    if category is None:
         return False
+    skip_stats[category] += 1
+    logDebug('Pre-filter skipped %s message: %s', category, text[:50])
+    return True
+
+def logSkipStatus():
+    """Log how many messages the pre-filter kept away from the API, per category"""
+    logInfo('Status - Pre-filter skipped: %d (%s)', sum(skip_stats.values()),
+            ', '.join('%s %d' % item for item in sorted(skip_stats.items())) or 'none')
+
+def detectLanguage(text):
+    """Identify the language of a chat message offline
     
-    # Count how many words are common English words
-    english_word_count = sum(1 for word in words if word in COMMON_ENGLISH_WORDS)
+    Returns (language code, confidence). Non-Latin scripts are decided by
+    their script, plus a few distinctive letters for Cyrillic; Latin text
+    is scored against the embedded trigram model (LANGID_TRIGRAMS).
+    Text without letters gives (None, 0.0).
+    """
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'replace')
+    text = text.lower()
     
-    # If more than 50% of words are common English words, it's likely English
-    english_ratio = float(english_word_count) / len(words)
+    latin_count = 0
+    script_counts = {}
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        code = ord(ch)
+        if code < 0x0370 or 0x1E00 <= code <= 0x1EFF:
+            latin_count += 1
+            continue
+        for first, last, script in SCRIPT_RANGES:
+            if first <= code <= last:
+                script_counts[script] = script_counts.get(script, 0) + 1
+                break
     
-    logDebug('English detection for "%s": %d/%d words = %.2f ratio' % 
-             (text[:30], english_word_count, len(words), english_ratio))
+    if not latin_count and not script_counts:
+        return None, 0.0
     
-    # Also check for common English phrases
-    if english_ratio >= 0.5:
-        return True
+    script, count = max(script_counts.items(), key=lambda item: item[1]) if script_counts else (None, 0)
+    if latin_count >= count:
+        return scoreLatinLanguage(text)
     
-    # Check for common English gaming phrases
-    english_phrases = [
-        'gg', 'gl hf', 'good game', 'nice shot', 'well played',
-        'thank you', 'thanks', 'sorry', 'my bad', 'no problem',
-        'let\'s go', 'follow me', 'help', 'attack', 'defend',
-        'fall back', 'push', 'rush', 'camp', 'spot'
-    ]
-    
-    lower_text = text.lower()
-    for phrase in english_phrases:
-        if phrase in lower_text:
-            logDebug('Found English phrase: %s' % phrase)
-            return True
+    if script == 'Cyrillic':
+        for letters, lang, confidence in CYRILLIC_MARKERS:
+            for ch in letters:
+                if ch in text:
+                    return lang, confidence
+        return CYRILLIC_GUESS
+    
+    if script == 'Han' and 'Kana' in script_counts:
+        return 'ja', 0.95
+    
+    return SCRIPT_LANGUAGES[script]
+
+def langIdTrigrams(text):
+    """Padded lowercase letter trigrams; must match trigrams() in tools/train_langid.py"""
+    text = u' '.join(u''.join(ch if ch.isalpha() else u' ' for ch in text).split())
+    if not text:
+        return []
+    text = u' %s ' % text
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+def startLangIdIndex():
+    """Run buildLangIdIndex() off the game thread; until it finishes Latin text is left to the API"""
+    thread = threading.Thread(target=buildLangIdIndex)
+    thread.daemon = True
+    thread.start()
+
+def buildLangIdIndex():
+    """Build (once) the trigram -> ((language index, weight), ...) lookup from LANGID_TRIGRAMS"""
+    global langid_languages, langid_index
+    with langid_lock:
+        if langid_index is not None:
+            return
+        started_at = time.time()
+        languages = sorted(LANGID_TRIGRAMS)
+        index = {}
+        for lang_index, lang in enumerate(languages):
+            ranked = LANGID_TRIGRAMS[lang].split(u'|')
+            floor = math.log(len(ranked) + 10)
+            for rank, trigram in enumerate(ranked):
+                # Zipf-style weight from rank: frequent trigrams count most
+                index.setdefault(trigram, []).append((lang_index, floor - math.log(rank + 10)))
+        # Languages first: scoreLatinLanguage only reads them once the index is set
+        langid_languages = languages
+        langid_index = dict((trigram, tuple(hits)) for trigram, hits in index.iteritems())
+    logInfo('Language identifier ready: %d languages, %d trigrams in %.1f ms',
+            len(languages), len(langid_index), (time.time() - started_at) * 1000)
+
+def scoreLatinLanguage(text):
+    """Pick the Latin-script language whose trigram profile best matches text
+    
+    Text mostly made of ENGLISH_CHAT_WORDS ("gg wp", "ok", "2 min") is
+    English without scoring. Other text shorter than MIN_LETTERS gives
+    (None, 0.0) and is left to the API, as is everything until
+    buildLangIdIndex() has finished. The confidence grows with the lead
+    of the best language over the runner-up, so a close call never
+    reaches SOURCE_THRESHOLD.
+    """
+    if isEnglishChat(text):
+        return 'en', 1.0
+    
+    if sum(1 for ch in text if ch.isalpha()) < LANGID_CONFIG['MIN_LETTERS']:
+        return None, 0.0
+    
+    index = langid_index
+    if index is None:
+        return None, 0.0
+    
+    trigrams = langIdTrigrams(text)
+    scores = [0.0] * len(langid_languages)
+    for trigram in trigrams:
+        hits = index.get(trigram)
+        if hits:
+            for lang_index, weight in hits:
+                scores[lang_index] += weight
     
-    return False
+    best, runner_up = heapq.nlargest(2, scores)
+    margin = (best - runner_up) / max(len(trigrams), LANGID_CONFIG['MIN_TRIGRAMS'])
+    return langid_languages[scores.index(best)], 1.0 - math.exp(-LANGID_CONFIG['SHARPNESS'] * margin)
+
+def isEnglishChat(text):
+    """Check if at least ENGLISH_WORD_SHARE of the words in text are common English or gaming slang"""
+    words = ENGLISH_WORD_PATTERN.findall(text.lower())
+    if not words:
+        return False
+    known = sum(1 for word in words if word in ENGLISH_CHAT_WORDS)
+    return known >= LANGID_CONFIG['ENGLISH_WORD_SHARE'] * len(words)
+
+def isEnglish(lang, confidence):
+    """Check if a detection result is confident enough to skip translation"""
+    return lang == 'en' and confidence >= LANGID_CONFIG['ENGLISH_THRESHOLD']
+
+def sourceLanguage(lang, confidence):
+    """Return the from= language for a detection result, or None to let the API detect"""
+    if lang and lang != 'en' and confidence >= LANGID_CONFIG['SOURCE_THRESHOLD']:
+        return lang
+    return None
+
+class PlayerProfile(object):
+    """The languages a player's recent messages were detected as"""
+    __slots__ = ('languages', 'heard_at', 'skipped')
+    
+    def __init__(self):
+        self.languages = deque(maxlen=PROFILE_CONFIG['WINDOW'])
+        self.heard_at = time.time()
+        self.skipped = 0  # Messages since the last detection
+    
+    def language(self):
+        """The player's language once enough detections agree, else None"""
+        if len(self.languages) < PROFILE_CONFIG['MIN_MESSAGES']:
+            return None
+        counts = defaultdict(int)
+        for lang in self.languages:
+            counts[lang] += 1
+        lang, count = max(counts.items(), key=lambda item: item[1])
+        if count < PROFILE_CONFIG['MIN_SHARE'] * len(self.languages):
+            return None
+        return lang
+
+def getProfile(player_name, create=False):
+    """Look up (and mark as recently heard) a player's profile (caller holds profile_lock)"""
+    profile = player_profiles.pop(player_name, None)
+    if profile is None:
+        if not create:
+            return None
+        profile = PlayerProfile()
+        while len(player_profiles) >= PROFILE_CONFIG['MAX_PLAYERS']:
+            player_profiles.popitem(last=False)
+    profile.heard_at = time.time()
+    player_profiles[player_name] = profile
+    return profile
+
+def recordPlayerLanguage(player_name, lang):
+    """Add one detection to a player's profile"""
+    if not PROFILE_CONFIG['ENABLED'] or not player_name or not lang:
+        return
+    with profile_lock:
+        profile = getProfile(player_name, create=True)
+        profile.languages.append(lang.lower())
+        profile.skipped = 0
+
+def detectPlayerLanguage(player_name, text):
+    """detectLanguage(), skipped for plain-ASCII messages from a player who only writes English
+    
+    Every RECHECK_EVERY-th message is detected anyway, so a player who
+    switches language updates their profile.
+    """
+    if PROFILE_CONFIG['ENABLED'] and player_name and isAscii(text):
+        with profile_lock:
+            profile = getProfile(player_name)
+            if profile and profile.language() == 'en':
+                profile.skipped += 1
+                if profile.skipped < PROFILE_CONFIG['RECHECK_EVERY']:
+                    profile_stats['english_skips'] += 1
+                    return 'en', 1.0
+                profile_stats['rechecks'] += 1
+    
+    lang, confidence = detectLanguage(text)
+    # "gg" or "ok" says nothing about the player's own language, so word-list matches don't count
+    if confidence >= PROFILE_CONFIG['MIN_CONFIDENCE'] and not (lang == 'en' and isEnglishChat(text)):
+        recordPlayerLanguage(player_name, lang)
+    return lang, confidence
+
+def playerSourceLanguage(player_name, lang, confidence):
+    """sourceLanguage(), or the player's profile language when the local guess agrees or is unsure"""
+    source = sourceLanguage(lang, confidence)
+    if source or not PROFILE_CONFIG['ENABLED'] or not player_name:
+        return source
+    with profile_lock:
+        profile = player_profiles.get(player_name)
+        profiled = profile.language() if profile else None
+    if not profiled or profiled == 'en':
+        return None
+    if confidence >= PROFILE_CONFIG['MIN_CONFIDENCE'] and (lang or '').lower() != profiled:
+        return None
+    with profile_lock:
+        profile_stats['sources'] += 1
+    return profiled
+
+def isAscii(text):
+    """Check if a message is plain ASCII (the client passes utf-8 byte strings)"""
+    try:
+        if isinstance(text, unicode):
+            text.encode('ascii')
+        else:
+            text.decode('ascii')
+    except UnicodeError:
+        return False
+    return True
+
+def expireProfiles():
+    """Forget players not heard from for EXPIRE_MINUTES"""
+    oldest = time.time() - PROFILE_CONFIG['EXPIRE_MINUTES'] * 60
+    with profile_lock:
+        while player_profiles:
+            player_name, profile = next(player_profiles.iteritems())
+            if profile.heard_at >= oldest:
+                break
+            del player_profiles[player_name]
+            profile_stats['expired'] += 1
+
+def logProfileStatus():
+    """Log how many players have a trusted profile and what it saved"""
+    with profile_lock:
+        languages = defaultdict(int)
+        for profile in player_profiles.itervalues():
+            languages[profile.language() or 'unsure'] += 1
+        logInfo('Status - Player profiles: %d (%s), English detections skipped: %d, Rechecks: %d, '
+                'from= from profile: %d, Expired: %d', len(player_profiles),
+                ', '.join('%s %d' % item for item in sorted(languages.items())) or 'none',
+                profile_stats['english_skips'], profile_stats['rechecks'], profile_stats['sources'],
+                profile_stats['expired'])
 
 def hookChat():
     """Hook all chat systems"""
     print('[MSTranslator] Installing hooks...')
-    logDebug('Installing hooks...')
+    logInfo('Installing hooks...')
     
     # Hook standard controllers with async
     hookStandardControllers()
     
-    # Hook platoon system with sync (proven to work)
-    hookPlatoonSystemSync()
+    # Hook platoon system (async by default, sync as opt-in fallback)
+    hookPlatoonSystem()
+    
+    # Warm the API connection while a battle loads, drop its queued chat when it ends
+    hookArenaEvents()
     
     print('[MSTranslator] Ready! All chats will be translated with rate limiting.')
 
+def hookArenaEvents():
+    """Pre-warm connections when a battle loads and cancel battle chat translations when it ends"""
+    try:
+        from PlayerEvents import g_playerEvents
+        g_playerEvents.onAvatarBecomePlayer += onArenaStart
+        g_playerEvents.onAvatarBecomeNonPlayer += onArenaEnd
+        logInfo('Hooked onAvatarBecomePlayer and onAvatarBecomeNonPlayer')
+    except Exception as e:
+        print('[MSTranslator] Arena hook error: %s' % str(e))
+        logError('Arena hook error: %s', str(e))
+
+def onArenaStart(*args, **kwargs):
+    """The battle is loading: resolve and connect now instead of on the first "gl hf" """
+    global battle_active, keepalive_armed, first_request_pending
+    battle_active = True
+    with connection_lock:
+        first_request_pending = True
+    if not CONNECTION_CONFIG['PREWARM']:
+        return
+    startWarmPass()
+    if not keepalive_armed:
+        keepalive_armed = True
+        callLater(CONNECTION_CONFIG['KEEPALIVE_INTERVAL'], keepWarm, 'keepWarm')
+
+def onArenaEnd(*args, **kwargs):
+    """Battle chat is gone, so nobody will see its pending translations"""
+    global battle_active, first_request_pending
+    battle_active = False
+    with connection_lock:
+        first_request_pending = False
+    cancelTranslations(SCHEDULER_CONFIG['ARENA_CHANNELS'])
+
+def keepWarm():
+    """Repeat the warm pass every KEEPALIVE_INTERVAL until the battle ends"""
+    global keepalive_armed
+    if not battle_active or not CONNECTION_CONFIG['PREWARM']:
+        keepalive_armed = False
+        return
+    startWarmPass()
+    callLater(CONNECTION_CONFIG['KEEPALIVE_INTERVAL'], keepWarm, 'keepWarm')
+
 def hookStandardControllers():
     """Hook standard chat controllers with async translation"""
     try:
@@ -297,90 +1774,36 @@ def hookStandardControllers():
         def create_hook(orig, controller_name):
             """Create async delayed translation hook"""
             def hooked_method(self, message, *args, **kwargs):
-                if hasattr(message, 'text') and message.text:
-                    original_text = message.text
-                    
-                    # Skip if already translated
-                    if '→en]' in original_text.lower():
-                        return orig(self, message, *args, **kwargs)
-                    
-                    # Check if text is likely English
-                    if isLikelyEnglish(original_text):
-                        logDebug('%s: Text is English, skipping: %s' % (controller_name, original_text[:50]))
-                        return orig(self, message, *args, **kwargs)
-                    
-                    # Extract player name for rate limiting
-                    player_name = extractPlayerName(message)
-                    
-                    # Check rate limit
-                    allowed, error_msg = checkRateLimit(player_name)
-                    if not allowed:
-                        if error_msg:
-                            message.text = '[LIMIT] %s' % error_msg
-                        return orig(self, message, *args, **kwargs)
-                    
-                    # Check cache first
-                    with cache_lock:
-                        if original_text in translation_cache:
-                            cached = translation_cache[original_text]
-                            if cached:
-                                message.text = cached
-                                print('[MSTranslator] Cache hit: %s' % cached[:50])
-                                return orig(self, message, *args, **kwargs)
-                            else:
-                                return orig(self, message, *args, **kwargs)
-                    
-                    # Start async translation
-                    message_id = getMessageId()
-                    pending_messages[message_id] = {
-                        'message': message,
-                        'original_text': original_text,
-                        'controller': self,
-                        'args': args,
-                        'kwargs': kwargs,
-                        'orig_method': orig,
-                        'player_name': player_name
-                    }
-                    
-                    thread = threading.Thread(target=translateAsyncDelayed, args=(original_text, message_id, player_name))
-                    thread.daemon = True
-                    thread.start()
-                    
-                    BigWorld.callback(8.0, lambda: fallbackDisplay(message_id, original_text))
-                    
-                    # Don't display yet
-                    return
-                
-                return orig(self, message, *args, **kwargs)
-            return hooked_method
+                return processIncoming(message, controller_name, messageShower(orig, self, args, kwargs))
+            return stallTimed(controller_name + '.addMessage', hooked_method)
         
         # Training room chat
         if hasattr(lobby_controllers, 'TrainingChannelController'):
             original_training = lobby_controllers.TrainingChannelController.addMessage
             lobby_controllers.TrainingChannelController.addMessage = create_hook(original_training, 'Training')
             print('[MSTranslator] Hooked Training')
-            logDebug('Hooked TrainingChannelController')
+            logInfo('Hooked TrainingChannelController')
         
         # Battle team chat
         if hasattr(battle_controllers, 'TeamChannelController'):
             original_battle = battle_controllers.TeamChannelController.addMessage
             battle_controllers.TeamChannelController.addMessage = create_hook(original_battle, 'BattleTeam')
             print('[MSTranslator] Hooked Battle Team')
-            logDebug('Hooked TeamChannelController')
+            logInfo('Hooked TeamChannelController')
         
         # Battle all chat
         if hasattr(battle_controllers, 'CommonChannelController'):
             original_common = battle_controllers.CommonChannelController.addMessage
             battle_controllers.CommonChannelController.addMessage = create_hook(original_common, 'BattleAll')
             print('[MSTranslator] Hooked Battle All')
-            logDebug('Hooked CommonChannelController')
+            logInfo('Hooked CommonChannelController')
         
     except Exception as e:
         print('[MSTranslator] Standard hook error: %s' % str(e))
-        logDebug('Standard hook error: %s' % str(e))
+        logError('Standard hook error: %s', str(e))
 
-def hookPlatoonSystemSync():
-    """Hook platoon chat with SYNC translation (proven to work)"""
+def hookPlatoonSystem():
+    """Hook platoon chat with async translation, or SYNC when PLATOON_CONFIG['MODE'] is 'sync'"""
     try:
         from messenger.proto.bw_chat2.entities import BWUnitChannelEntity
         
@@ -389,49 +1812,12 @@ def hookPlatoonSystemSync():
             original_add = BWUnitChannelEntity.addMessage
             
             def hooked_add(self, message):
-                if hasattr(message, 'text') and message.text:
-                    original_text = message.text
-                    logDebug('BWUnitChannelEntity.addMessage: %s' % original_text)
-                    
-                    # Skip if already translated
-                    if '→en]' in original_text.lower():
-                        return original_add(self, message)
-                    
-                    # Check if text is likely English
-                    if isLikelyEnglish(original_text):
-                        logDebug('Platoon: Text is English, skipping: %s' % original_text[:50])
-                        return original_add(self, message)
-                    
-                    # Extract player name
-                    player_name = extractPlayerName(message)
-                    
-                    # Check rate limit
-                    allowed, error_msg = checkRateLimit(player_name)
-                    if not allowed:
-                        if error_msg:
-                            message.text = '[LIMIT] %s' % error_msg
-                        return original_add(self, message)
-                    
-                    # Check cache
-                    with cache_lock:
-                        if original_text in translation_cache:
-                            cached = translation_cache[original_text]
-                            if cached:
-                                message.text = cached
-                                logDebug('Platoon cache hit: %s' % cached[:50])
-                            return original_add(self, message)
-                    
-                    # Translate synchronously for platoon (simpler, works)
-                    translated = translateQuickMicrosoft(original_text, player_name)
-                    if translated:
-                        message.text = translated
-                        logDebug('Translated platoon: %s' % translated[:50])
-                
-                return original_add(self, message)
+                logDebug('BWUnitChannelEntity.addMessage: %s', getattr(message, 'text', None))
+                return processIncoming(message, 'Platoon', messageShower(original_add, self))
             
-            BWUnitChannelEntity.addMessage = hooked_add
-            print('[MSTranslator] Hooked BWUnitChannelEntity (Platoon) - SYNC mode')
-            logDebug('Hooked BWUnitChannelEntity.addMessage - SYNC mode')
+            BWUnitChannelEntity.addMessage = stallTimed('Platoon.addMessage', hooked_add)
+            print('[MSTranslator] Hooked BWUnitChannelEntity (Platoon) - %s mode' % PLATOON_CONFIG['MODE'].upper())
+            logInfo('Hooked BWUnitChannelEntity.addMessage - %s mode', PLATOON_CONFIG['MODE'].upper())
         
         # Also hook UnitChannelController as backup
         from messenger.gui.Scaleform.channels.bw_chat2.lobby_controllers import UnitChannelController
@@ -439,29 +1825,142 @@ def hookPlatoonSystemSync():
             original_unit = UnitChannelController.addMessage
             
             def hooked_unit(self, message, *args, **kwargs):
-                if hasattr(message, 'text') and message.text:
-                    if '→en]' not in message.text.lower() and not isLikelyEnglish(message.text):
-                        player_name = extractPlayerName(message)
-                        
-                        # Check rate limit
-                        allowed, error_msg = checkRateLimit(player_name)
-                        if allowed:
-                            # Use quick translation as backup
-                            translated = translateQuickMicrosoft(message.text, player_name)
-                            if translated:
-                                message.text = translated
-                        elif error_msg:
-                            message.text = '[LIMIT] %s' % error_msg
-                
-                return original_unit(self, message, *args, **kwargs)
+                if isReleased(message):
+                    return original_unit(self, message, *args, **kwargs)
+                return processIncoming(message, 'Platoon', messageShower(original_unit, self, args, kwargs))
             
-            UnitChannelController.addMessage = hooked_unit
+            UnitChannelController.addMessage = stallTimed('Unit.addMessage', hooked_unit)
             print('[MSTranslator] Hooked UnitChannelController (backup)')
-            logDebug('Hooked UnitChannelController')
+            logInfo('Hooked UnitChannelController')
             
     except Exception as e:
         print('[MSTranslator] Platoon hook error: %s' % str(e))
-        logDebug('Platoon hook error: %s' % str(e))
+        logError('Platoon hook error: %s', str(e))
+
+def processIncoming(message, channel_kind, show):
+    """Translate an incoming chat message and pass it to show(message), or hold it back for the async path
+    
+    Every hook runs the same pipeline: prefilter, phrasebook, language
+    detection, rate limit, cache and character budget, then the API. Platoon
+    chat waits up to PLATOON_CONFIG['LATENCY_BUDGET'] and translates
+    synchronously on the game thread in 'sync' mode; other channels wait
+    holdTimeout(). Returns what show() returned, or None when held back.
+    """
+    if not (hasattr(message, 'text') and message.text):
+        return show(message)
+    original_text = message.text
+    
+    # Skip if already translated
+    if '→en]' in original_text.lower():
+        return show(message)
+    
+    # Grid references, numbers, emoticons and tags cost no API call or quota
+    if isUntranslatable(original_text):
+        recordOutcome(channel_kind, 'prefilter_skip')
+        return show(message)
+    stallMark('prefilter')
+    
+    # Common phrases have a fixed translation: no detection, rate limit, cache or API
+    phrase = phrasebookLookup(original_text)
+    if phrase:
+        message.text = formatTranslation(phrase, original_text)
+        recordOutcome(channel_kind, 'phrasebook')
+        return show(message)
+    stallMark('phrasebook')
+    
+    # Check if text is likely English (known English speakers skip detection)
+    player_name = extractPlayerName(message)
+    lang, confidence = detectPlayerLanguage(player_name, original_text)
+    if isEnglish(lang, confidence):
+        logDebug('%s: Text is English (%.2f), skipping: %s', channel_kind, confidence, original_text[:50])
+        recordOutcome(channel_kind, 'english_skip')
+        return show(message)
+    source = playerSourceLanguage(player_name, lang, confidence)
+    stallMark('detect')
+    
+    # Check rate limit
+    allowed, error_msg = checkRateLimit(player_name)
+    if not allowed:
+        if error_msg:
+            message.text = '[LIMIT] %s' % error_msg
+        recordOutcome(channel_kind, 'rate_limited')
+        return show(message)
+    stallMark('rate_limit')
+    
+    # Check cache first
+    cached = lookupTranslation(original_text)
+    if cached is not CACHE_MISS:
+        if cached:
+            message.text = formatTranslation(cached, original_text)
+            logDebug('%s cache hit: %s', channel_kind, message.text[:50])
+        # A cached None means the text was found untranslatable before
+        recordOutcome(channel_kind, 'cache_hit' if cached else 'cache_negative')
+        return show(message)
+    stallMark('cache')
+    
+    # Show the original once this channel's share of the budget is used and no free backend is set
+    if not translationAllowed(channel_kind):
+        recordOutcome(channel_kind, 'quota_paused')
+        return show(message)
+    stallMark('quota')
+    
+    platoon = channel_kind == 'Platoon'
+    if platoon and PLATOON_CONFIG['MODE'] == 'sync':
+        # Translate synchronously (blocks the game thread up to QUICK_TIMEOUT)
+        start_time = time.time()
+        translated = translateQuick(original_text, player_name, source, channel_kind)
+        if translated:
+            message.text = translated
+            logDebug('Translated %s: %s', channel_kind, translated[:50])
+        recordOutcome(channel_kind, 'api_success' if translated else 'untranslated', start_time)
+        stallMark('translate')
+        return show(message)
+    
+    # Defer display until the translation or the latency budget arrives; displayMessage records the outcome
+    timeout = PLATOON_CONFIG['LATENCY_BUDGET'] if platoon else holdTimeout()
+    startAsyncTranslation(message, original_text, show, player_name, timeout, source, channel_kind)
+    stallMark('queue')
+    return None
+
+def messageShower(orig_method, controller, args=(), kwargs=None):
+    """Return show(message) for processIncoming: the controller method a hook replaced, with the call's arguments"""
+    kwargs = kwargs or {}
+    def show(message):
+        return orig_method(controller, message, *args, **kwargs)
+    return show
+
+def startAsyncTranslation(message, original_text, show, player_name, timeout, source=None, channel=None):
+    """Queue a message for translation, holding it back until the result or timeout
+    
+    In DISPLAY_CONFIG 'immediate' mode the original is shown right away and
+    the translation follows as its own line; past the timeout it is dropped.
+    """
+    message_id = getMessageId()
+    immediate = DISPLAY_CONFIG['MODE'] == 'immediate'
+    pending_messages[message_id] = {
+        'message': message,
+        'original_text': original_text,
+        'show': show,
+        'player_name': player_name,
+        'channel': channel,
+        'started_at': time.time(),
+        'shown': immediate
+    }
+    if immediate:
+        showMessage(message, show)
+    
+    queueBatchTranslation(original_text, message_id, player_name, source, channel, time.time() + timeout)
+    
+    heapq.heappush(fallback_deadlines, (time.time() + timeout, message_id))
+    armDispatcher()
+    return message_id
+
+def isReleased(message):
+    """Check if the async pipeline already displayed this message"""
+    try:
+        return message in released_messages
+    except TypeError:
+        return False
 
 def getMessageId():
     """Generate unique message ID"""
@@ -469,231 +1968,1615 @@ def getMessageId():
     message_counter += 1
     return message_counter
 
-def translateQuickMicrosoft(text, player_name=None):
-    """Quick sync translation using Microsoft API"""
+class TranslationBackend(object):
+    """A translation service behind translate(texts, target, source=None, timeout)
+    
+    translate() returns one (language, confidence, translation) tuple per
+    text, or None for a text it could not translate, and raises on failure.
+    language is upper case, or None when the service did not detect it.
+    Metered backends bill per character and are skipped for channels the
+    character budget has paused.
+    """
+    metered = False
+    
+    def __init__(self, name):
+        self.name = name
+        self.latency = None  # Smoothed seconds per successful request
+        self.failed_at = 0.0
+        self.stats = {'requests': 0, 'failures': 0}
+    
+    def translate(self, texts, target, source=None, timeout=5.0):
+        raise NotImplementedError
+    
+    def available(self, now):
+        """Check the backend is not cooling down after a failure"""
+        return now - self.failed_at >= BACKEND_CONFIG['COOLDOWN']
+    
+    def recordResult(self, seconds, failed):
+        with backend_lock:
+            self.stats['requests'] += 1
+            if failed:
+                self.stats['failures'] += 1
+                self.failed_at = time.time()
+            elif self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += BACKEND_CONFIG['SMOOTHING'] * (seconds - self.latency)
+
+class MicrosoftBackend(TranslationBackend):
+    """Microsoft Translator v3 at API_URL, hedged to TIMEOUT_CONFIG['HEDGE_URL'] when set"""
+    metered = True
+    
+    def translate(self, texts, target, source=None, timeout=5.0):
+        # With from= set the API translates from that language instead of detecting it per text
+        query = '?api-version=%s&to=%s' % (API_VERSION, target)
+        if source:
+            query += '&from=%s' % source
+        
+        # Request body is an array of text objects
+        body = json.dumps([{'Text': text} for text in texts])
+        
+        logDebug('Microsoft API request: %s', body[:300])
+        
+        headers = {
+            'Ocp-Apim-Subscription-Key': API_KEY,
+            'Ocp-Apim-Subscription-Region': API_REGION,
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+        
+        if TIMEOUT_CONFIG['HEDGE_URL']:
+            response_text = hedgedPost(query, body, headers, timeout, texts, self)
+        else:
+            response_text = postTranslation(API_URL + query, body, headers, timeout, texts, self)
+        logDebug('Microsoft API response: %s', response_text[:300])
+        
+        items = json.loads(response_text) or []
+        return [self.parseItem(items[index] if index < len(items) else None) for index in range(len(texts))]
+    
+    def parseItem(self, item):
+        if not item or not item.get('translations'):
+            return None
+        language, confidence = None, 0.0
+        if 'detectedLanguage' in item:
+            language = item['detectedLanguage'].get('language', '??').upper()
+            confidence = item['detectedLanguage'].get('score', 0.0)
+        return language, confidence, item['translations'][0]['text']
+
+class LibreTranslateBackend(TranslationBackend):
+    """A self-hosted LibreTranslate-compatible /translate endpoint (free, so not metered)"""
+    
+    def __init__(self, name, url, api_key=''):
+        TranslationBackend.__init__(self, name)
+        self.url = url
+        self.api_key = api_key
+    
+    def translate(self, texts, target, source=None, timeout=5.0):
+        payload = {'q': list(texts), 'source': source.split('-')[0] if source else 'auto', 'target': target,
+                   'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        body = json.dumps(payload)
+        
+        logDebug('LibreTranslate request: %s', body[:300])
+        
+        headers = {'Content-Type': 'application/json; charset=UTF-8'}
+        response_text = postTranslation(self.url, body, headers, timeout, texts, self)
+        logDebug('LibreTranslate response: %s', response_text[:300])
+        
+        response = json.loads(response_text) or {}
+        translations = response.get('translatedText') or []
+        detected = response.get('detectedLanguage') or []
+        if not isinstance(translations, list):
+            translations, detected = [translations], [detected]
+        
+        results = []
+        for index in range(len(texts)):
+            translation = translations[index] if index < len(translations) else None
+            if not translation:
+                results.append(None)
+                continue
+            # Detection comes as {"language": "ru", "confidence": 92.0}, confidence in percent
+            info = detected[index] if index < len(detected) and isinstance(detected[index], dict) else {}
+            language = info.get('language')
+            results.append((language.upper() if language else None, info.get('confidence', 0.0) / 100.0,
+                            translation))
+        return results
+
+def getBackends():
+    """Configured backends in BACKEND_CONFIG['ORDER']"""
+    global translation_backends
+    if translation_backends is None:
+        available = {'microsoft': MicrosoftBackend('microsoft')}
+        if BACKEND_CONFIG['LIBRETRANSLATE_URL']:
+            available['libretranslate'] = LibreTranslateBackend('libretranslate', BACKEND_CONFIG['LIBRETRANSLATE_URL'],
+                                                                BACKEND_CONFIG['LIBRETRANSLATE_KEY'])
+        translation_backends = [available[name] for name in BACKEND_CONFIG['ORDER'] if name in available]
+    return translation_backends
+
+def routeBackends(allow_metered=True):
+    """Backends to try for one request, best first; ones cooling down after a failure go last"""
+    now = time.time()
+    backends = [backend for backend in getBackends() if allow_metered or not backend.metered]
+    if BACKEND_CONFIG['ROUTING'] == 'latency':
+        # Unmeasured backends first, so each gets a latency
+        backends.sort(key=lambda backend: backend.latency or 0.0)
+    backends.sort(key=lambda backend: not backend.available(now))
+    return backends
+
+def translationAllowed(channel):
+    """Check a channel can still be translated: within its character budget, or by an unmetered backend"""
+    return quotaAllows(channel) or any(not backend.metered for backend in getBackends())
+
+def translateTexts(backends, texts, timeout, source=None):
+    """Translate texts on the first of backends that answers within timeout
+    
+    Returns (backend, results). While another backend remains, an attempt
+    gets at most half the time left so a slow service cannot use it all.
+    The first failure is raised once every backend has failed.
+    """
+    deadline = time.time() + timeout
+    error = None
+    for index, backend in enumerate(backends):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        if index < len(backends) - 1:
+            remaining /= 2.0
+        
+        start_time = time.time()
+        try:
+            results = backend.translate(texts, TARGET_LANG, source, remaining)
+        except Exception as e:
+            backend.recordResult(time.time() - start_time, True)
+            logWarning('%s backend failed: %s', backend.name, str(e) or e.__class__.__name__)
+            error = error or e
+            continue
+        backend.recordResult(time.time() - start_time, False)
+        return backend, results
+    raise error or socket.timeout('timed out')
+
+def logBackendStatus():
+    now = time.time()
+    for backend in getBackends():
+        with backend_lock:
+            stats = dict(backend.stats)
+            latency = backend.latency
+        logInfo('Status - Backend %s: %d requests, %d failed, avg %s ms%s', backend.name, stats['requests'],
+                stats['failures'], '%.0f' % (latency * 1000) if latency is not None else 'n/a',
+                '' if backend.available(now) else ', cooling down')
+
+def postTranslation(url, body, headers, timeout, texts, backend):
+    """Send one translate request and return the response body, raising HTTPError for 4xx/5xx"""
+    start_time = time.time()
     try:
-        # Check cache
-        with cache_lock:
-            if text in translation_cache:
-                return translation_cache[text]
+        status, reason, response_headers, response_text = pooledPost(url, body, headers, timeout)
+    except socket.timeout:
+        # A timed-out request still tells us the API is at least this slow
+        recordApiLatency(time.time() - start_time)
+        countMetric('api_requests', backend.name, 'error')
+        raise
+    except Exception:
+        countMetric('api_requests', backend.name, 'error')
+        raise
+    recordApiLatency(time.time() - start_time)
+    observeLatency('api_latency', backend.name, time.time() - start_time)
+    countMetric('api_texts', backend.name, amount=len(texts))
+    if status >= 400:
+        countMetric('api_requests', backend.name, 'http_%d' % status)
+        raise urllib2.HTTPError(url, status, reason, response_headers, StringIO(response_text))
+    countMetric('api_requests', backend.name, 'ok')
+    if backend.metered:
+        recordCharacters(texts)
+    return response_text
+
+def hedgedPost(query, body, headers, timeout, texts, backend):
+    """Send to API_URL and, if no answer comes within p95, also to HEDGE_URL; return the first success
+    
+    A failed first attempt is raised at once unless the duplicate is
+    already on its way. The slower answer is discarded but still billed.
+    """
+    delay = hedgeDelay()
+    if delay is None or delay >= timeout:
+        return postTranslation(API_URL + query, body, headers, timeout, texts, backend)
+    
+    answers = Queue.Queue()  # (url, response body, error); url None when the duplicate was not sent
+    hedge_sent = []
+    
+    def attempt(url):
+        try:
+            answers.put((url, postTranslation(url + query, body, headers, timeout, texts, backend), None))
+        except Exception as e:
+            answers.put((url, None, e))
+    
+    def hedge():
+        if claimHedge():
+            hedge_sent.append(True)
+            logDebug('Hedging request after %.0f ms to %s', delay * 1000, TIMEOUT_CONFIG['HEDGE_URL'])
+            attempt(TIMEOUT_CONFIG['HEDGE_URL'])
+        else:
+            answers.put((None, None, None))
+    
+    primary = threading.Thread(target=attempt, args=(API_URL,))
+    primary.daemon = True
+    primary.start()
+    hedge_timer = threading.Timer(delay, hedge)
+    hedge_timer.daemon = True
+    hedge_timer.start()
+    
+    # Each attempt's socket timeout should end it by then; a thread stuck past that must not hang the worker
+    give_up_at = time.time() + delay + timeout
+    error = None
+    for _ in range(2):
+        try:
+            url, response_text, e = answers.get(timeout=max(give_up_at - time.time(), 0))
+        except Queue.Empty:
+            hedge_timer.cancel()
+            error = error or socket.timeout('timed out waiting for the hedged request')
+            break
+        if url is None:
+            continue
+        if e is None:
+            hedge_timer.cancel()
+            if url != API_URL:
+                with latency_lock:
+                    hedge_stats['won'] += 1
+            return response_text
+        error = error or e
+        if not hedge_sent:
+            hedge_timer.cancel()
+            break
+    raise error
+
+def recordApiLatency(seconds):
+    with latency_lock:
+        latency_samples.append(seconds)
+
+def latencyPercentile(fraction):
+    """Recent API round trip (seconds) that fraction of requests beat, None until MIN_SAMPLES"""
+    with latency_lock:
+        if len(latency_samples) < TIMEOUT_CONFIG['MIN_SAMPLES']:
+            return None
+        ordered = sorted(latency_samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def requestTimeout(default, deadline=None):
+    """HTTP timeout from the p95 latency, never past deadline (when the result would go unseen)"""
+    p95 = latencyPercentile(0.95)
+    if p95 is None:
+        timeout = default
+    else:
+        timeout = min(max(p95 * TIMEOUT_CONFIG['FACTOR'], TIMEOUT_CONFIG['MIN']), TIMEOUT_CONFIG['MAX'])
+    if deadline is not None:
+        timeout = min(timeout, max(deadline - time.time(), SCHEDULER_CONFIG['MIN_TIME_LEFT']))
+    return timeout
+
+def holdTimeout():
+    """Seconds to hold a message back before its original is shown"""
+    p95 = latencyPercentile(0.95)
+    if p95 is None:
+        return TIMEOUT_CONFIG['HOLD_MAX']
+    hold = p95 * TIMEOUT_CONFIG['HOLD_FACTOR'] + BATCH_CONFIG['WINDOW']
+    return min(max(hold, TIMEOUT_CONFIG['HOLD_MIN']), TIMEOUT_CONFIG['HOLD_MAX'])
+
+def hedgeDelay():
+    """Seconds to wait for an answer before sending the duplicate, None without enough samples"""
+    with latency_lock:
+        hedge_stats['requests'] += 1
+    p95 = latencyPercentile(0.95)
+    if p95 is None:
+        return None
+    return max(p95, TIMEOUT_CONFIG['HEDGE_MIN_DELAY'])
+
+def claimHedge():
+    """Check the duplicate fits the hedge ratio and the character budget, and count it if so"""
+    usage = quotaUsage()
+    with latency_lock:
+        if (hedge_stats['hedged'] + 1 > hedge_stats['requests'] * TIMEOUT_CONFIG['HEDGE_MAX_RATIO']
+                or usage >= TIMEOUT_CONFIG['HEDGE_MAX_QUOTA']):
+            hedge_stats['skipped'] += 1
+            return False
+        hedge_stats['hedged'] += 1
+        return True
+
+def logLatencyStatus():
+    """Log the latency estimate, the timeouts derived from it and hedging counters"""
+    p50, p95 = [latencyPercentile(fraction) for fraction in (0.5, 0.95)]
+    with latency_lock:
+        stats = dict(hedge_stats)
+    logInfo('Status - API latency: p50 %s ms, p95 %s ms, timeout %.1f s, hold %.1f s, hedged %d of %d (%d won, %d skipped)',
+            '%.0f' % (p50 * 1000) if p50 is not None else 'n/a', '%.0f' % (p95 * 1000) if p95 is not None else 'n/a',
+            requestTimeout(BATCH_CONFIG['TIMEOUT']), holdTimeout(), stats['hedged'], stats['requests'], stats['won'],
+            stats['skipped'])
+
+def pooledPost(url, body, headers, timeout):
+    """POST over a pooled keep-alive connection, reconnecting once if it went stale"""
+    parsed = urlparse.urlsplit(url)
+    path = parsed.path + ('?' + parsed.query if parsed.query else '')
+    
+    start_time = time.time()
+    connection, reused = acquireConnection(parsed.scheme, parsed.netloc, timeout)
+    try:
+        response = sendRequest(connection, path, body, headers)
+    except (httplib.HTTPException, socket.error) as e:
+        connection.close()
+        if not reused or isinstance(e, socket.timeout):
+            raise
         
-        # Check rate limit before API call
-        allowed, error_msg = checkRateLimit(player_name)
-        if not allowed:
-            logDebug('Rate limit hit for quick translation')
+        # The server closed the idle socket under us; retry once on a fresh one
+        logWarning('Pooled connection broken (%s), reconnecting', str(e) or e.__class__.__name__)
+        with connection_lock:
+            connection_stats['reconnects'] += 1
+        reused = False
+        connection = newConnection(parsed.scheme, parsed.netloc, timeout)
+        try:
+            response = sendRequest(connection, path, body, headers)
+        except:
+            connection.close()
+            raise
+    
+    if first_request_pending:
+        recordFirstRequest(reused, time.time() - start_time)
+    return response
+
+def sendRequest(connection, path, body, headers):
+    """Send one request and return the connection to the pool if it stays open"""
+    connection.request('POST', path, body, headers)
+    response = connection.getresponse()
+    response_text = response.read()
+    
+    if response.will_close:
+        connection.close()
+    else:
+        releaseConnection(connection)
+    
+    return response.status, response.reason, response.msg, response_text
+
+def acquireConnection(scheme, netloc, timeout):
+    """Take a live idle connection for netloc, or open a new one"""
+    now = time.time()
+    with connection_lock:
+        expireIdleConnections(now)
+        for index in range(len(idle_connections) - 1, -1, -1):
+            connection, last_used = idle_connections[index]
+            if connection.pool_key == (scheme, netloc):
+                del idle_connections[index]
+                connection_stats['reused'] += 1
+                connection.sock.settimeout(timeout)
+                return connection, True
+    
+    return newConnection(scheme, netloc, timeout), False
+
+def newConnection(scheme, netloc, timeout):
+    """Open a new HTTP(S) connection tagged with its pool key"""
+    if scheme == 'https':
+        connection = httplib.HTTPSConnection(netloc, timeout=timeout)
+    else:
+        connection = httplib.HTTPConnection(netloc, timeout=timeout)
+    connection.pool_key = (scheme, netloc)
+    # httplib opens its socket through this hook, so the DNS cache covers HTTP and HTTPS alike
+    connection._create_connection = cachedCreateConnection
+    
+    with connection_lock:
+        connection_stats['new'] += 1
+    return connection
+
+def resolveEndpoint(host, port):
+    """getaddrinfo() for host:port, answered from the DNS cache for DNS_TTL seconds"""
+    now = time.time()
+    with connection_lock:
+        entry = dns_cache.get((host, port))
+        if entry and entry[1] > now:
+            dns_stats['hits'] += 1
+            return entry[0]
+    
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    with connection_lock:
+        dns_stats['lookups'] += 1
+        dns_cache[(host, port)] = (addresses, now + CONNECTION_CONFIG['DNS_TTL'])
+    return addresses
+
+def cachedCreateConnection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """socket.create_connection() resolving through the DNS cache"""
+    host, port = address
+    error = None
+    for family, socktype, proto, canonname, sockaddr in resolveEndpoint(host, port):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except socket.error as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    
+    # None of the cached addresses answered; the endpoint may have moved, so resolve again next time
+    with connection_lock:
+        dns_cache.pop((host, port), None)
+    raise error or socket.error('getaddrinfo returned no addresses for %s' % host)
+
+def recordFirstRequest(reused, seconds):
+    """Count the battle's first API request as warm (pooled connection) or cold (new connection)"""
+    global first_request_pending
+    with connection_lock:
+        if not first_request_pending:
+            return
+        first_request_pending = False
+        kind = 'warm' if reused else 'cold'
+        first_request_stats[kind] += 1
+        first_request_stats[kind + '_seconds'] += seconds
+    observeLatency('first_request_latency', kind, seconds)
+    logInfo('First API request of the battle: %s connection, %.0f ms', kind, seconds * 1000)
+
+def warmUrls():
+    """Endpoints worth keeping a connection open to"""
+    urls = [API_URL, TIMEOUT_CONFIG['HEDGE_URL'], BACKEND_CONFIG['LIBRETRANSLATE_URL']]
+    return [url for url in urls if url]
+
+def startWarmPass():
+    """Run warmEndpoints() off the game thread"""
+    thread = threading.Thread(target=warmEndpoints)
+    thread.daemon = True
+    thread.start()
+
+def warmEndpoints():
+    """Resolve every endpoint and make sure each has a live keep-alive connection"""
+    if not warm_lock.acquire(False):
+        return  # The previous pass is still connecting
+    try:
+        for url in warmUrls():
+            try:
+                warmEndpoint(url)
+            except Exception as e:
+                logDebug('Pre-warming %s failed: %s', url, str(e) or e.__class__.__name__)
+    finally:
+        warm_lock.release()
+
+def warmEndpoint(url):
+    """Ping the newest idle connection to url if it has been quiet, or open one if there is none"""
+    parsed = urlparse.urlsplit(url)
+    pool_key = (parsed.scheme, parsed.netloc)
+    resolveEndpoint(parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80))
+    
+    now = time.time()
+    connection = None
+    with connection_lock:
+        expireIdleConnections(now)
+        for index in range(len(idle_connections) - 1, -1, -1):
+            if idle_connections[index][0].pool_key == pool_key:
+                if now - idle_connections[index][1] < CONNECTION_CONFIG['KEEPALIVE_INTERVAL']:
+                    return  # Recently used, already warm
+                connection = idle_connections.pop(index)[0]
+                break
+    
+    timeout = requestTimeout(BATCH_CONFIG['TIMEOUT'])
+    if connection is not None:
+        # Any status will do: a keyless HEAD is not billed and resets the server's idle timer
+        try:
+            connection.sock.settimeout(timeout)
+            connection.request('HEAD', parsed.path)
+            response = connection.getresponse()
+            response.read()
+            if not response.will_close:
+                releaseConnection(connection)
+                with connection_lock:
+                    connection_stats['keepalives'] += 1
+                return
+        except (httplib.HTTPException, socket.error):
+            pass
+        connection.close()
+    
+    # TCP connect and TLS handshake now, so the first translation finds a pooled connection
+    connection = newConnection(parsed.scheme, parsed.netloc, timeout)
+    try:
+        connection.connect()
+    except:
+        connection.close()
+        raise
+    releaseConnection(connection)
+    with connection_lock:
+        connection_stats['prewarmed'] += 1
+
+def releaseConnection(connection):
+    """Return a connection to the idle pool, closing the oldest past MAX_IDLE"""
+    with connection_lock:
+        idle_connections.append((connection, time.time()))
+        while len(idle_connections) > CONNECTION_CONFIG['MAX_IDLE']:
+            idle_connections.pop(0)[0].close()
+
+def expireIdleConnections(now=None):
+    """Close connections idle longer than IDLE_TIMEOUT"""
+    now = now or time.time()
+    with connection_lock:
+        while idle_connections and now - idle_connections[0][1] > CONNECTION_CONFIG['IDLE_TIMEOUT']:
+            idle_connections.pop(0)[0].close()
+            connection_stats['expired'] += 1
+
+def logConnectionStatus():
+    """Log connection reuse counters"""
+    expireIdleConnections()
+    with connection_lock:
+        total = connection_stats['new'] + connection_stats['reused']
+        reuse_ratio = float(connection_stats['reused']) / total if total else 0.0
+        logInfo('Status - Connections: %d idle, New: %d, Reused: %d (%.0f%%), Reconnects: %d, Expired: %d, '
+                'Prewarmed: %d, Keep-alives: %d, DNS: %d cached, %d lookups',
+                len(idle_connections), connection_stats['new'], connection_stats['reused'], reuse_ratio * 100,
+                connection_stats['reconnects'], connection_stats['expired'], connection_stats['prewarmed'],
+                connection_stats['keepalives'], dns_stats['hits'], dns_stats['lookups'])
+        if first_request_stats['cold'] or first_request_stats['warm']:
+            logInfo('Status - First request per battle: cold %d (avg %.0f ms), warm %d (avg %.0f ms)',
+                    first_request_stats['cold'],
+                    first_request_stats['cold_seconds'] * 1000 / max(1, first_request_stats['cold']),
+                    first_request_stats['warm'],
+                    first_request_stats['warm_seconds'] * 1000 / max(1, first_request_stats['warm']))
+
+def processTranslation(text, item, player_name=None, source=None):
+    """Cache one backend result (language, confidence, translation) and return its (language, translation) or None"""
+    if not item:
+        return None
+    
+    cached = resultValue(text, item, source)
+    cacheTranslation(text, cached)
+    
+    # Record successful translation
+    if cached:
+        recordTranslation(player_name)
+    
+    return cached
+
+def resultValue(text, item, source=None):
+    """(language, translation) for a backend result, or None when it is the text itself or English"""
+    # Get detected language
+    language, confidence, translated_text = item
+    detected_lang = source.split('-')[0].upper() if source else '??'
+    if language:
+        detected_lang = language
+        logDebug('Detected language: %s (confidence: %.2f)', detected_lang, confidence)
+    
+    # Check if translation is identical (untranslatable)
+    if translated_text.lower() == text.lower():
+        logDebug('Translation identical to original, skipping')
+        return None
+    
+    # Don't translate if detected as English with high confidence
+    if detected_lang == 'EN' and confidence > 0.85:
+        logDebug('Detected as English with high confidence, skipping')
+        return None
+    
+    return (detected_lang, translated_text)
+
+def cacheTranslation(text, cached, persist=True, key=None):
+    """Store a (language, translation) tuple, or None for untranslatable text, in the cache"""
+    key = key or cacheKey(text)
+    translation_cache.put(key, cached, persist=persist)
+    if persist:
+        persistTranslation(key, cached)
+
+def lookupTranslation(text):
+    """Cached (language, translation) or None for text, from the whole message or its cached segments
+    
+    Returns CACHE_MISS when the message or any of its segments still needs
+    the API. A message put together from segments is cached whole, in
+    memory only, so its repeats are a single lookup.
+    """
+    cached = translation_cache.get(cacheKey(text), CACHE_MISS)
+    if cached is not CACHE_MISS:
+        return cached
+    
+    segments = segmentMessage(text)
+    if not segments:
+        return CACHE_MISS
+    translations = []
+    for key, segment_text, tokens in segments:
+        cached = lookupSegment(key)
+        if cached is CACHE_MISS:
+            return CACHE_MISS
+        translations.append(fillSegment(cached, tokens))
+    
+    cached = assembleSegments(segments, translations)
+    cacheTranslation(text, cached, persist=False)
+    with segment_lock:
+        segment_stats['assembled'] += 1
+    return cached
+
+def segmentMessage(text):
+    """Split text into [(key, segment, masked tokens)], or None when it is a single plain sentence
+    
+    Grid references, numbers, clan tags and names are replaced by numbered
+    placeholders in the key, so "помогите справа A5" and "помогите справа
+    B3" share "помогите справа ǂ0". A segment with nothing to translate
+    has the key None.
+    """
+    if not SEGMENT_CONFIG['ENABLED']:
+        return None
+    if isinstance(text, str):
+        text = text.decode('utf-8', 'replace')
+    if SEGMENT_PLACEHOLDER in text:
+        return None
+    
+    pieces = SENTENCE_END_PATTERN.split(text.strip())
+    limit = SEGMENT_CONFIG['MAX_SEGMENTS']
+    if len(pieces) > limit:
+        pieces[limit - 1:] = [u' '.join(pieces[limit - 1:])]
+    
+    segments = []
+    for piece in pieces:
+        tokens = []
+        def mask(match):
+            tokens.append(match.group(0))
+            return u'%s%d' % (SEGMENT_PLACEHOLDER, len(tokens) - 1)
+        masked = SEGMENT_TOKEN_PATTERN.sub(mask, piece)
+        key = None if classifyUntranslatable(piece) else cacheKey(masked)
+        segments.append((key, piece, tokens))
+    
+    if len(segments) == 1 and not segments[0][2]:
+        return None
+    return segments
+
+def lookupSegment(key):
+    """Cached value for a segment key, falling back to the phrasebook; CACHE_MISS if neither has it"""
+    if key is None:
+        return None
+    cached = translation_cache.get(key, CACHE_MISS)
+    if cached is CACHE_MISS and PHRASEBOOK_CONFIG['ENABLED']:
+        return getPhrasebook().get(key, CACHE_MISS)
+    return cached
+
+def fillSegment(cached, tokens):
+    """Put this message's masked tokens back into a cached segment translation"""
+    if not cached or not tokens:
+        return cached
+    def unmask(match):
+        index = int(match.group(1))
+        return tokens[index] if index < len(tokens) else match.group(0)
+    return (cached[0], SEGMENT_PLACEHOLDER_PATTERN.sub(unmask, cached[1]))
+
+def maskTranslation(translation, tokens):
+    """Replace each token in a translation by its placeholder, or None unless each appears exactly once"""
+    for index, token in enumerate(tokens):
+        pattern = re.compile(u'(?<!\\w)%s(?!\\w)' % re.escape(token), re.UNICODE | re.IGNORECASE)
+        if len(pattern.findall(translation)) != 1:
             return None
+        translation = pattern.sub(lambda match: u'%s%d' % (SEGMENT_PLACEHOLDER, index), translation)
+    return translation
+
+def cacheSegment(segment, item, source=None):
+    """Cache one segment's backend result under its masked key and return its (language, translation) or None"""
+    key, segment_text, tokens = segment
+    if not item:
+        return None
+    
+    cached = resultValue(segment_text, item, source)
+    if cached and tokens:
+        # Only reusable for other tokens if the translation kept every token verbatim
+        template = maskTranslation(cached[1], tokens)
+        if template is not None:
+            cacheTranslation(segment_text, (cached[0], template), key=key)
+    else:
+        cacheTranslation(segment_text, cached, key=key)
+    return cached
+
+def assembleSegments(segments, translations):
+    """Join segment translations, keeping the original of untranslated ones; None if nothing was translated"""
+    language = None
+    parts = []
+    for (key, segment_text, tokens), cached in zip(segments, translations):
+        if cached:
+            language = language or cached[0]
+            parts.append(cached[1])
+        else:
+            parts.append(segment_text)
+    return (language, u' '.join(parts)) if language else None
+
+def planTranslation(texts):
+    """Work out which texts the API still has to see: return (API texts, one plan per text)
+    
+    A plan is (None, API index) for a message sent whole, or (segments,
+    parts) with one (True, API index) or (False, cached value) per segment.
+    Identical texts are sent once.
+    """
+    api_texts = []
+    positions = {}
+    plans = []
+    for text in texts:
+        segments = segmentMessage(text)
+        if not segments:
+            if text not in positions:
+                positions[text] = len(api_texts)
+                api_texts.append(text)
+            plans.append((None, positions[text]))
+            continue
         
-        logDebug('Quick translating: %s' % text)
+        parts = []
+        sent_chars = 0
+        for key, segment_text, tokens in segments:
+            cached = lookupSegment(key)
+            if cached is not CACHE_MISS:
+                parts.append((False, fillSegment(cached, tokens)))
+                continue
+            if segment_text not in positions:
+                positions[segment_text] = len(api_texts)
+                api_texts.append(segment_text)
+                sent_chars += len(segment_text)
+            parts.append((True, positions[segment_text]))
+        plans.append((segments, parts))
         
-        # Prepare Microsoft API request
-        url = '%s?api-version=%s&to=%s' % (API_URL, API_VERSION, TARGET_LANG)
+        with segment_lock:
+            segment_stats['split'] += 1
+            segment_stats['sent'] += sum(1 for sent, part in parts if sent)
+            segment_stats['reused'] += sum(1 for sent, part in parts if not sent)
+            segment_stats['chars_saved'] += sum(len(segment[1]) for segment in segments) - sent_chars
+    return api_texts, plans
+
+def resolveTranslations(texts, plans, results, player_names, source=None):
+    """Cache the backend results for planTranslation's API texts and return one value per text"""
+    resolved = []
+    for text, (segments, plan), player_name in zip(texts, plans, player_names):
+        # The API only reports a language when no from= was sent; it counts towards the player's profile
+        items = [results[plan]] if segments is None else [results[part] for sent, part in plan if sent]
+        for item in items:
+            if item and item[0]:
+                recordPlayerLanguage(player_name, item[0])
+                break
         
-        # Request body is an array of text objects
-        body = json.dumps([{'Text': text}])
+        if segments is None:
+            resolved.append(processTranslation(text, results[plan], player_name, source))
+            continue
         
-        logDebug('Microsoft API request: %s' % body)
+        translations = []
+        complete = True
+        for segment, (sent, part) in zip(segments, plan):
+            if sent:
+                complete = complete and bool(results[part])
+                translations.append(cacheSegment(segment, results[part], source))
+            else:
+                translations.append(part)
         
-        request = urllib2.Request(url, body)
-        request.add_header('Ocp-Apim-Subscription-Key', API_KEY)
-        request.add_header('Ocp-Apim-Subscription-Region', API_REGION)
-        request.add_header('Content-Type', 'application/json; charset=UTF-8')
+        cached = assembleSegments(segments, translations)
+        if complete:
+            cacheTranslation(text, cached, persist=False)
+        if cached:
+            recordTranslation(player_name)
+        resolved.append(cached)
+    return resolved
+
+def logSegmentStatus():
+    """Log how much of the split messages came from cached segments"""
+    with segment_lock:
+        logInfo('Status - Segments: %d messages assembled from cache, %d split (%d segments sent, %d reused), '
+                '%d characters not sent', segment_stats['assembled'], segment_stats['split'],
+                segment_stats['sent'], segment_stats['reused'], segment_stats['chars_saved'])
+
+def translateQuick(text, player_name=None, source=None, channel=None):
+    """Quick sync translation on the first backend that answers (callers check the rate limit)"""
+    try:
+        # Check cache
+        cached = lookupTranslation(text)
+        if cached is not CACHE_MISS:
+            return formatTranslation(cached, text) if cached else None
         
-        response = urllib2.urlopen(request, timeout=QUICK_TIMEOUT)
-        response_text = response.read()
-        logDebug('Microsoft API response: %s' % response_text[:200])
+        logDebug('Quick translating: %s', text)
         
-        result = json.loads(response_text)
+        backends = routeBackends(quotaAllows(channel))
+        if not backends:
+            return None
         
-        if result and len(result) > 0:
-            item = result[0]
-            
-            # Get detected language
-            detected_lang = '??'
-            confidence = 0.0
-            if 'detectedLanguage' in item:
-                detected_lang = item['detectedLanguage'].get('language', '??').upper()
-                confidence = item['detectedLanguage'].get('score', 0.0)
-                logDebug('Detected language: %s (confidence: %.2f)' % (detected_lang, confidence))
-            
-            # Get translation
-            if 'translations' in item and len(item['translations']) > 0:
-                translated_text = item['translations'][0]['text']
-                
-                # Check if translation is identical (untranslatable)
-                if translated_text.lower() == text.lower():
-                    logDebug('Translation identical to original, skipping')
-                    with cache_lock:
-                        translation_cache[text] = None
-                        cache_timestamps[text] = time.time()
-                    return None
-                
-                # Don't translate if detected as English with high confidence
-                if detected_lang == 'EN' and confidence > 0.85:
-                    logDebug('Detected as English with high confidence, skipping')
-                    with cache_lock:
-                        translation_cache[text] = None
-                        cache_timestamps[text] = time.time()
-                    return None
-                
-                # Format and cache
-                formatted = '[%s→en] %s | %s' % (detected_lang, translated_text, text)
-                
-                with cache_lock:
-                    translation_cache[text] = formatted
-                    cache_timestamps[text] = time.time()
-                    
-                    # Clean old cache entries if too many
-                    if len(translation_cache) > 200:
-                        cleanExpiredCache()
-                
-                # Record successful translation
-                recordTranslation(player_name)
-                
-                return formatted
+        # Blocks the game thread, so QUICK_TIMEOUT stays the ceiling
+        api_texts, plans = planTranslation([text])
+        backend, results = translateTexts(backends, api_texts, min(requestTimeout(QUICK_TIMEOUT), QUICK_TIMEOUT),
+                                          source)
+        cached = resolveTranslations([text], plans, results, [player_name], source)[0]
+        if cached:
+            return formatTranslation(cached, text)
             
     except urllib2.HTTPError as e:
         error_body = e.read() if hasattr(e, 'read') else ''
-        logDebug('Microsoft HTTP error %s: %s. Body: %s' % (e.code, str(e), error_body))
+        logError('Translation HTTP error %s: %s. Body: %s', e.code, str(e), error_body)
     except Exception as e:
-        logDebug('Microsoft translation error: %s' % str(e))
+        logError('Translation error: %s', str(e))
     
     return None
 
-def translateAsyncDelayed(text, message_id, player_name=None):
-    """Async translation for standard chat using Microsoft API"""
-    try:
-        # Re-check rate limit before API call
-        allowed, error_msg = checkRateLimit(player_name)
-        if not allowed:
-            logDebug('Rate limit hit for async translation')
-            BigWorld.callback(0.1, lambda: displayMessage(message_id, text))
+class TranslationJob(object):
+    """One text for the API and the held-back messages waiting on it
+    
+    Identical messages (same cacheKey) arriving while a job is queued or in
+    flight become extra waiters instead of new API texts. A job is as urgent
+    as its most urgent waiter (nearest_deadline) and stays useful until its
+    last waiter's deadline.
+    """
+    __slots__ = ('key', 'text', 'player_name', 'source', 'queued_at', 'priority', 'nearest_deadline', 'deadline',
+                 'waiters', 'cancelled')
+    
+    def __init__(self, key, text, player_name, source):
+        self.key = key
+        self.text = text
+        self.player_name = player_name
+        self.source = source
+        self.queued_at = time.time()
+        self.priority = None
+        self.nearest_deadline = None
+        self.deadline = None
+        self.waiters = []  # (message_id, text, channel)
+        self.cancelled = False
+    
+    def addWaiter(self, message_id, text, channel, deadline):
+        """Attach a held-back message (caller holds inflight_lock)"""
+        priority = SCHEDULER_CONFIG['PRIORITY'].get(channel, len(SCHEDULER_CONFIG['PRIORITY']))
+        self.waiters.append((message_id, text, channel))
+        if self.priority is None or priority < self.priority:
+            self.priority = priority
+        if self.nearest_deadline is None or deadline < self.nearest_deadline:
+            self.nearest_deadline = deadline
+        if self.deadline is None or deadline > self.deadline:
+            self.deadline = deadline
+    
+    def urgency(self):
+        """Sort key: channel priority first, then the nearest waiter's deadline"""
+        return (self.priority, self.nearest_deadline)
+    
+    def isStale(self, now):
+        """Check if nobody would see the translation by the time it came back"""
+        return self.cancelled or self.deadline - now < SCHEDULER_CONFIG['MIN_TIME_LEFT']
+
+def queueBatchTranslation(text, message_id, player_name=None, source=None, channel=None, deadline=None):
+    """Queue a message for the next batched translation request
+    
+    A message whose cache key is already queued or in flight is attached to
+    that job instead and released together with it by finishJob.
+    """
+    global batch_thread
+    key = cacheKey(text)
+    if deadline is None:
+        deadline = time.time() + BATCH_CONFIG['TIMEOUT']
+    
+    with inflight_lock:
+        job = inflight_requests.get(key)
+        if job is not None:
+            job.addWaiter(message_id, text, channel, deadline)
+            inflight_stats['coalesced'] += 1
+            logDebug('Coalesced with in-flight translation: %s', text[:50])
             return
+        job = inflight_requests[key] = TranslationJob(key, text, player_name, source)
+        job.addWaiter(message_id, text, channel, deadline)
+    
+    with batch_condition:
+        batch_queue.append(job)
         
-        print('[MSTranslator] Async translating: %s' % text[:30])
-        
-        # Prepare Microsoft API request
-        url = '%s?api-version=%s&to=%s' % (API_URL, API_VERSION, TARGET_LANG)
-        
-        # Request body is an array of text objects
-        body = json.dumps([{'Text': text}])
-        
-        logDebug('Async Microsoft API request: %s' % body)
-        
-        request = urllib2.Request(url, body)
-        request.add_header('Ocp-Apim-Subscription-Key', API_KEY)
-        request.add_header('Ocp-Apim-Subscription-Region', API_REGION)
-        request.add_header('Content-Type', 'application/json; charset=UTF-8')
+        if batch_thread is None:
+            batch_thread = threading.Thread(target=batchLoop)
+            batch_thread.daemon = True
+            batch_thread.start()
         
-        response = urllib2.urlopen(request, timeout=5.0)
-        response_text = response.read()
-        logDebug('Async Microsoft API response: %s' % response_text[:300])
+        batch_condition.notify()
+
+def batchCapReached():
+    """Check if queued texts already fill a request (caller holds batch_condition)"""
+    if len(batch_queue) >= BATCH_CONFIG['MAX_TEXTS']:
+        return True
+    return sum(len(job.text) for job in batch_queue) >= BATCH_CONFIG['MAX_CHARS']
+
+def takeBatch():
+    """Pop the most urgent jobs up to the size and character caps (caller holds batch_condition)
+    
+    Jobs nobody would see in time are dropped first. Jobs are batched by
+    urgency alone; the request gets a from= language only if every job in
+    it agrees on one (see batchSource).
+    """
+    now = time.time()
+    live = []
+    for job in batch_queue:
+        if job.isStale(now):
+            dropJob(job)
+        else:
+            live.append(job)
+    live.sort(key=TranslationJob.urgency)
+    
+    batch = []
+    batch_chars = 0
+    del batch_queue[:]
+    for job in live:
+        fits = (len(batch) < BATCH_CONFIG['MAX_TEXTS']
+                and (not batch or batch_chars + len(job.text) <= BATCH_CONFIG['MAX_CHARS']))
+        if fits:
+            batch.append(job)
+            batch_chars += len(job.text)
+        else:
+            batch_queue.append(job)
+    return batch
+
+def batchLoop():
+    """Collect queued messages over a short window and send the most urgent as one request"""
+    while True:
+        with batch_condition:
+            while not batch_queue:
+                batch_condition.wait()
+            
+            # Wait out the window measured from the oldest queued message
+            deadline = min(job.queued_at for job in batch_queue) + BATCH_CONFIG['WINDOW']
+            while not batchCapReached():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                batch_condition.wait(remaining)
+            
+            batch = takeBatch()
         
-        result = json.loads(response_text)
+        if batch:
+            submitWork(translateAsyncDelayed, (batch,), failBatchOverload, batch[0].urgency())
+
+def batchSource(jobs):
+    """The from= language for a request, or None unless every job has the same one"""
+    sources = set(job.source for job in jobs)
+    return sources.pop() if len(sources) == 1 else None
+
+def translateAsyncDelayed(batch):
+    """Async translation of a batch of queued messages on the first backend that answers"""
+    accepted = []
+    now = time.time()
+    for job in batch:
+        # Waiting for a worker may have used up the time left to show it
+        if job.isStale(now):
+            dropJob(job)
+            continue
         
-        if result and len(result) > 0:
-            item = result[0]
-            
-            # Get detected language
-            detected_lang = '??'
-            confidence = 0.0
-            if 'detectedLanguage' in item:
-                detected_lang = item['detectedLanguage'].get('language', '??').upper()
-                confidence = item['detectedLanguage'].get('score', 0.0)
+        # Re-check rate limit before API call
+        allowed, error_msg = checkRateLimit(job.player_name)
+        if not allowed:
+            logWarning('Rate limit hit for async translation')
+            finishJob(job, None, 'rate_limited')
+            continue
+        accepted.append(job)
+    
+    if not accepted:
+        return
+    
+    # Sentences cached since the message was queued are not sent again
+    texts = [job.text for job in accepted]
+    api_texts, plans = planTranslation(texts)
+    
+    # Metered backends only if every waiting channel is within its character budget
+    backends = routeBackends(all(quotaAllows(waiter[2]) for job in accepted for waiter in job.waiters))
+    if api_texts and not backends:
+        for job in accepted:
+            finishJob(job, None, 'quota_paused')
+        return
+    
+    logDebug('Async translating batch of %d: %s', len(texts), texts[0][:30])
+    source = batchSource(accepted)
+    
+    start_time = time.time()
+    try:
+        results = []
+        if api_texts:
+            timeout = requestTimeout(BATCH_CONFIG['TIMEOUT'], max(job.deadline for job in accepted))
+            backend, results = translateTexts(backends, api_texts, timeout, source)
             
-            # Get translation
-            if 'translations' in item and len(item['translations']) > 0:
-                translated_text = item['translations'][0]['text']
-                
-                print('[MSTranslator] Lang: %s (%.2f), Original: %s, Translated: %s' % 
-                      (detected_lang, confidence, text, translated_text))
-                
-                # Check if translation is identical (untranslatable)
-                if translated_text.lower() == text.lower():
-                    logDebug('Translation identical to original, displaying as-is')
-                    with cache_lock:
-                        translation_cache[text] = None
-                        cache_timestamps[text] = time.time()
-                    BigWorld.callback(0.1, lambda: displayMessage(message_id, text))
-                    return
-                
-                # Don't translate if English with high confidence
-                if detected_lang == 'EN' and confidence > 0.85:
-                    logDebug('Detected as English by API, displaying original')
-                    with cache_lock:
-                        translation_cache[text] = None
-                        cache_timestamps[text] = time.time()
-                    BigWorld.callback(0.1, lambda: displayMessage(message_id, text))
-                    return
-                
-                # Format and cache
-                formatted = '[%s→en] %s | %s' % (detected_lang, translated_text, text)
-                
-                with cache_lock:
-                    translation_cache[text] = formatted
-                    cache_timestamps[text] = time.time()
-                    
-                    # Clean old cache entries if too many
-                    if len(translation_cache) > 200:
-                        cleanExpiredCache()
-                
-                # Record successful translation
-                recordTranslation(player_name)
-                
-                BigWorld.callback(0.1, lambda: displayMessage(message_id, formatted))
+            latency_ms = (time.time() - start_time) * 1000
+            oldest_wait_ms = (start_time - min(job.queued_at for job in accepted)) * 1000
+            logDebug('Batch translated by %s: %d texts, %d chars, %.0f ms API, %.0f ms queued',
+                     backend.name, len(api_texts), sum(len(text) for text in api_texts), latency_ms, oldest_wait_ms)
         
+        resolved = resolveTranslations(texts, plans, results, [job.player_name for job in accepted], source)
+        for job, cached in zip(accepted, resolved):
+            finishJob(job, cached, 'api_success' if cached else 'identical')
+    
     except urllib2.HTTPError as e:
         error_body = e.read() if hasattr(e, 'read') else ''
-        print('[MSTranslator] Async HTTP error %s: %s. Body: %s' % (e.code, str(e), error_body[:200]))
-        logDebug('Async HTTP error: %s' % error_body)
-        with cache_lock:
-            translation_cache[text] = None
-            cache_timestamps[text] = time.time()
-        BigWorld.callback(0.1, lambda: displayMessage(message_id, text))
-        
+        logError('Async HTTP error %s for batch of %d: %s', e.code, len(texts), error_body)
+        # A rejected request fails the same way again; throttling (429) and server errors pass
+        failBatch(accepted, 'http_error', 400 <= e.code < 500 and e.code != 429)
+    
     except Exception as e:
-        print('[MSTranslator] Async translation error: %s' % str(e))
-        with cache_lock:
-            translation_cache[text] = None
-            cache_timestamps[text] = time.time()
-        BigWorld.callback(0.1, lambda: displayMessage(message_id, text))
+        logError('Async translation error for batch of %d: %s', len(texts), str(e))
+        failBatch(accepted, 'error')
+
+def failBatchOverload(batch):
+    """Show the originals of a batch the worker pool had no room for"""
+    for job in batch:
+        finishJob(job, None, 'overload')
+
+def failBatch(batch, outcome, permanent=False):
+    """Show the originals of a failed batch, caching them as untranslatable only if the failure is permanent
+    
+    Timeouts, throttling and server errors are transient: the next message
+    with the same text gets a fresh attempt instead of NEGATIVE_EXPIRE_MINUTES
+    of untranslated repeats.
+    """
+    for job in batch:
+        if permanent:
+            cacheTranslation(job.text, None, persist=False)
+        finishJob(job, None, outcome)
+
+def releaseJob(job):
+    """Stop coalescing onto a job and return its waiters"""
+    with inflight_lock:
+        if inflight_requests.get(job.key) is job:
+            del inflight_requests[job.key]
+        return list(job.waiters)
+
+def dropJob(job):
+    """Forget a job without an API call; its waiters' fallback shows the originals"""
+    releaseJob(job)
+    if not job.cancelled:
+        with inflight_lock:
+            inflight_stats['expired'] += 1
+        logDebug('Dropped translation past its deadline: %s', job.text[:50])
+
+def finishJob(job, cached, outcome):
+    """Display a job's message and every identical one that coalesced onto it"""
+    for message_id, text, channel in releaseJob(job):
+        if cached:
+            scheduleDisplay(message_id, formatTranslation(cached, text), outcome, cached)
+        else:
+            scheduleDisplay(message_id, text, outcome)
+
+def cancelTranslations(channels):
+    """Forget held-back messages from channels that are gone, and jobs only they wait on"""
+    cancelled = [message_id for message_id, msg_data in pending_messages.items() if msg_data['channel'] in channels]
+    for message_id in cancelled:
+        msg_data = pending_messages.pop(message_id)
+        recordOutcome(msg_data['channel'], 'cancelled', msg_data['started_at'])
+    
+    with inflight_lock:
+        for key, job in inflight_requests.items():
+            job.waiters = [waiter for waiter in job.waiters if waiter[2] not in channels]
+            if not job.waiters:
+                job.cancelled = True
+                del inflight_requests[key]
+                inflight_stats['cancelled'] += 1
+    
+    with batch_condition:
+        batch_queue[:] = [job for job in batch_queue if not job.cancelled]
+    
+    logInfo('Cancelled %d pending %s messages', len(cancelled), '/'.join(channels))
+
+def scheduleDisplay(message_id, text, outcome, cached=None):
+    """Hand a result back to the game thread; the next dispatcher tick displays it"""
+    completed_queue.append((message_id, text, outcome, cached))
+
+def armDispatcher(delay=None):
+    """Schedule a dispatcher tick unless one is already scheduled (game thread only)"""
+    global dispatch_armed
+    if not dispatch_armed:
+        dispatch_armed = True
+        callLater(DISPATCH_CONFIG['TICK'] if delay is None else delay, dispatchTick, 'dispatchTick')
+
+def dispatchTick():
+    """Display finished translations, then originals past their deadline, within the tick budget
+    
+    Results go first so a translation that lands just before its deadline
+    still wins. Deadlines of messages already displayed or cancelled are
+    dropped without a call. The tick reschedules itself only while messages
+    are held back, and for the next frame when the budget cut it short.
+    """
+    global dispatch_armed
+    dispatch_armed = False
+    dispatch_stats['ticks'] += 1
+    started = stall_clock()
+    budget = DISPATCH_CONFIG['TICK_BUDGET_MS'] / 1000.0
+    exhausted = False
+    
+    while completed_queue:
+        message_id, text, outcome, cached = completed_queue.popleft()
+        displayMessage(message_id, text, outcome, cached)
+        dispatch_stats['results'] += 1
+        if stall_clock() - started > budget:
+            exhausted = True
+            break
+    stallMark('results')
+    
+    now = time.time()
+    while not exhausted and fallback_deadlines and fallback_deadlines[0][0] <= now:
+        message_id = heapq.heappop(fallback_deadlines)[1]
+        msg_data = pending_messages.get(message_id)
+        if msg_data is None:
+            dispatch_stats['stale'] += 1
+            continue
+        fallbackDisplay(message_id, msg_data['original_text'])
+        dispatch_stats['fallbacks'] += 1
+        exhausted = stall_clock() - started > budget
+    stallMark('fallbacks')
+    
+    if not pending_messages:
+        # Every deadline left belongs to a message that is already shown
+        dispatch_stats['stale'] += len(fallback_deadlines)
+        del fallback_deadlines[:]
+    if exhausted:
+        dispatch_stats['over_budget'] += 1
+    if completed_queue or pending_messages:
+        armDispatcher(0.0 if exhausted else None)
+
+def logDispatchStatus():
+    logInfo('Status - Dispatcher: %d ticks, %d results, %d fallbacks, %d stale deadlines skipped, '
+            '%d results after their fallback, %d ticks over budget', dispatch_stats['ticks'], dispatch_stats['results'],
+            dispatch_stats['fallbacks'], dispatch_stats['stale'], dispatch_stats['late'], dispatch_stats['over_budget'])
+
+def submitWork(func, args, on_drop, urgency):
+    """Queue work for the translation pool, applying the overload policy when full
+    
+    Workers take the most urgent work first (lowest urgency tuple).
+    """
+    dropped = None
+    entry = (urgency, next(work_sequence), func, args, on_drop, time.time())
+    with work_condition:
+        if len(work_threads) < WORKER_CONFIG['WORKERS']:
+            startWorkers()
+        
+        if len(work_queue) >= WORKER_CONFIG['QUEUE_DEPTH']:
+            work_stats['dropped'] += 1
+            dropped = entry
+            if WORKER_CONFIG['OVERLOAD_POLICY'] == 'drop_least_urgent':
+                least_urgent = max(work_queue)
+                if entry < least_urgent:
+                    work_queue.remove(least_urgent)
+                    heapq.heapify(work_queue)
+                    heapq.heappush(work_queue, entry)
+                    dropped = least_urgent
+        else:
+            heapq.heappush(work_queue, entry)
+        
+        work_stats['peak_depth'] = max(work_stats['peak_depth'], len(work_queue))
+        work_condition.notify()
+    
+    if dropped:
+        logWarning('Worker queue full (%d), overload policy %s dropped work',
+                   WORKER_CONFIG['QUEUE_DEPTH'], WORKER_CONFIG['OVERLOAD_POLICY'])
+        try:
+            dropped[4](*dropped[3])
+        except Exception as e:
+            logError('Overload handler error: %s', str(e))
+
+def startWorkers():
+    """Start pool threads up to the configured count (caller holds work_condition)"""
+    while len(work_threads) < WORKER_CONFIG['WORKERS']:
+        thread = threading.Thread(target=workerLoop)
+        thread.daemon = True
+        thread.start()
+        work_threads.append(thread)
+    logInfo('Started %d translation workers', len(work_threads))
+
+def workerLoop():
+    """Run queued translation work until the client exits"""
+    while True:
+        with work_condition:
+            while not work_queue:
+                work_condition.wait()
+            urgency, sequence, func, args, on_drop, queued_at = heapq.heappop(work_queue)
+            
+            wait_time = time.time() - queued_at
+            work_stats['processed'] += 1
+            work_stats['wait_total'] += wait_time
+            work_stats['wait_max'] = max(work_stats['wait_max'], wait_time)
+        
+        try:
+            func(*args)
+        except Exception as e:
+            logError('Worker error: %s', str(e))
+
+def logWorkerStatus():
+    """Log queue depth and wait times since the last status line, then reset them"""
+    with work_condition:
+        processed = work_stats['processed']
+        avg_wait_ms = (work_stats['wait_total'] / processed * 1000) if processed else 0.0
+        logInfo('Status - Workers: %d, Queue: %d/%d (peak %d), Processed: %d, Avg wait: %.0f ms, Max wait: %.0f ms, Dropped: %d',
+                len(work_threads), len(work_queue), WORKER_CONFIG['QUEUE_DEPTH'], work_stats['peak_depth'], processed,
+                avg_wait_ms, work_stats['wait_max'] * 1000, work_stats['dropped'])
+    
+        work_stats.update({'processed': 0, 'dropped': 0, 'wait_total': 0.0, 'wait_max': 0.0,
+                           'peak_depth': len(work_queue)})
+    
+    with inflight_lock:
+        logInfo('Status - In flight: %d, API calls saved by coalescing: %d, past deadline: %d, cancelled: %d',
+                len(inflight_requests), inflight_stats['coalesced'], inflight_stats['expired'],
+                inflight_stats['cancelled'])
 
 def fallbackDisplay(message_id, original_text):
-    """Fallback display for timeout"""
-    if message_id in pending_messages:
-        print('[MSTranslator] Fallback display for message %s: %s' % (message_id, original_text))
-        displayMessage(message_id, original_text)
+    """Show the original once its translation is overdue"""
+    msg_data = pending_messages.get(message_id)
+    if msg_data is not None:
+        if not msg_data['shown']:
+            logDebug('Fallback display for message %s: %s', message_id, original_text)
+        displayMessage(message_id, original_text, 'timeout')
 
-def displayMessage(message_id, text):
-    """Display the message"""
+def displayMessage(message_id, text, outcome, cached=None):
+    """Display the message and record how its translation ended"""
     try:
         if message_id not in pending_messages:
-            print('[MSTranslator] Warning: Message %s not found in pending' % message_id)
+            # Normal once the fallback showed the original first; counted, not warned about
+            dispatch_stats['late'] += 1
+            logDebug('Message %s already shown, dropping its late result', message_id)
             return
             
-        msg_data = pending_messages[message_id]
-        
+        msg_data = pending_messages.pop(message_id)
         message = msg_data['message']
-        controller = msg_data['controller']
-        args = msg_data.get('args', ())
-        kwargs = msg_data.get('kwargs', {})
-        orig_method = msg_data['orig_method']
-        
-        message.text = text
-        print('[MSTranslator] Displaying: %s' % text[:50])
         
-        try:
-            orig_method(controller, message, *args, **kwargs)
-        except Exception as e:
-            print('[MSTranslator] Error calling original method: %s' % str(e))
+        if msg_data['shown']:
+            # The original is already in chat; add the translation under it, or nothing
+            recordOutcome(msg_data['channel'], outcome, msg_data['started_at'] if cached else None)
+            if not cached:
+                return
             try:
-                controller.addMessage(message, *args, **kwargs)
-            except:
-                print('[MSTranslator] Fallback display also failed')
+                message = copy.copy(message)
+            except Exception:
+                pass  # Not copyable, reuse the displayed message object
+            text = '%s[%s→en] %s' % (DISPLAY_CONFIG['FOLLOW_UP_PREFIX'], cached[0], cached[1])
+        else:
+            recordOutcome(msg_data['channel'], outcome, msg_data['started_at'])
         
-        del pending_messages[message_id]
+        message.text = text
+        logDebug('Displaying: %s', text[:50])
+        showMessage(message, msg_data['show'])
         
     except Exception as e:
-        print('[MSTranslator] Display message error: %s' % str(e))
+        logError('Display message error: %s', str(e))
+
+def showMessage(message, show):
+    """Pass a message to the controller method the hook replaced"""
+    # Keep backup hooks further down the chain from translating it again
+    try:
+        released_messages[message] = True
+    except TypeError:
+        pass
+    
+    try:
+        show(message)
+    except Exception as e:
+        logError('Error calling original method: %s', str(e))
+
+# BEGIN LANGID MODEL (generated by tools/train_langid.py, do not edit)
+LANGID_TRIGRAMS = {
+    'cs': (
+        u' je| po|te | na|ou | ta| do| ne| pr| za|e n|na |to | to|je |jed|me |se | by| js|'
+        u' se|pro| mě|ank|do |e s|tan| st|ci |e t|em |o t|tře|za | má| tě|e m|hle|ky |le |'
+        u'stř|u t|řeb| a | hr| kd| kř| př| sk| tý| zá|a j|a m|a n|byl|dob|dou|drž|du |dy |'
+        u'e j|e p|e z|ed |edo|ej |eme|i p|jse|kdo|li |lo |mi |moc|mu |nu |omo|pom|pot|sem|'
+        u'til|tým|tě |u j|ště| ar| ch| le| mi| mů| ně| te| v |a s|a z|adn|art|bit|buj|dnu|'
+        u'děl|e a|e h|e v|ebu|ede|edu|eri|eď |hrá|i j|ie |ile|jte|ju |jí |kla|lad|ler|mám|'
+        u'mě |měl|můž|nky|nou|obr|oje|otř|pře|rie|rti|rý |ste|ter|těž|u d|uju|ust|y j|ych|'
+        u'zák|ákl|ám |ím |ý t|ďte|ě j|ěl |ěžk|řed|ší |ůže|žké| bi| bo| de| dr| dí| dě| ho|'
+        u' ja| k | kl| kt| ma| mo| my| ni| no| ná| sp| té| už| vr| vš|a k|a p|ahl|aje|ak |'
+        u'am |ase|ba |boj|brá|byc|ce |ct |de |dej|dlo|dík|ebo|ejt|en |epř|epš|erý|est|et |'
+        u'eďt|ešt|hra|i b|i z|ici|idě|it |itv|j n|jak|jem|jeď|ješ|jst|k t|kdy|klu|kte|ku |'
+        u'ké |ký |křo|kří|ků |l b|la |led|lep|luc|m p|m t|map|miň|nej|nep|nes|nk |nků|ná |'
+        u'ní |ně |něk|o b|o d|o m|o n|o s|o v|oc |oct|oj |omi|osí|oví|očk|poj|poz|poč|pří|'
+        u'pší|rať|ro |rom|ros|roz|ru |rá |rán|rží|s p|sou|spo|sta|stí|sím|t k|t s|ta |tam|'
+        u'tel|teď|ti |tét|těs|tří|u p|u z|uci|udr|uje|už |v k|vid|vra|vé |ví |vě |vše|y p'
+    ),
+    'da': (
+        u'er |en | de|et |de | vi|ge |ar |ig |til| ha| je| ka| mi| fo|e k|for|lle| er| i |'
+        u' ti|der|det|eg |jeg|nge|vi | på|amp|den|il |mme|ne |or |på |re |te | ho| hv| ko|'
+        u' kø|an |e d|har|hol|ill|kam|kør|old|r i|r t| ba| ve|ed |g k|gen|ke |ler|mer|r d|'
+        u' me| og| sp| ta|age|bag|e h|e t|em |ger|ken|kke|kom|ld |mig|n d|n v|nde|og | di|'
+        u' go| sk| va|amm|dig|god|i b|lde|lig|mpv|od |ogn|omm|pil|pvo|r b|r e|r f|sky|spi|'
+        u't v|ten|tte|var|vog|vor|øre| ar| bu| en| fl| hj| in| la| no| st|ak |d i|dem|dt |'
+        u'e e|e o|e s|ere|eri|es |g e|g v|hjæ|i h|ikk|ilb|ing|it |jæl|kan|lba|let|med|nd |'
+        u'r h|r p|r s|rer|ste|t d|t s|tak|ter|tun|ung|ven|vil|ælp| at| be| br| du| he| ik|'
+        u' li| nu| se| si| tr| tu|ang|art|ase|at |bas|bru|d j|d m|del|dre|du |e m|e p|e v|'
+        u'end|enn|ens|g f|gne|han|hvi|hvo|i d|i k|i s|ind|iv |k f|men|mit|mp |n f|n n|n t|'
+        u'ng |nne|nog|odt|oge|om |ort|pen|r o|r v|rde|ren|res|rie|rte|rti|rug|sam|se |und|'
+        u'å m| al| bl| dr| et| fj| fø| hø| kl| ly| ma| mo| ny| næ| om| op| os| pa| ra| ud|'
+        u' un| vo|ad |ag |all|ank|are|bar|bed|bli|bur|bus|d a|d d|d f|d o|dsk|e a|e b|e f|'
+        u'e g|e i|ej |eli|ell|ene|eng|ent|ern|esa|ett|fje|fla|føl|g h|g j|g m|g n|gge|gn |'
+        u'gt |høj|ide|idt|ier|iet|ige|igt|ilk|in |ion|iti|j d|jde|je |jen|jer|kor|kyd|kyl'
+    ),
+    'de': (
+        u'en |er |ch |ie |ich| di|sch|die| da|st |te | ge|ir | de|cht|ein| sc| wi|in |auf|'
+        u' au| ha|n d| ic| mi| un| wa| zu|as |t d|uf | is| me| si|den|ht |iel|ist|wir|das|'
+        u'ine|n w|nd |r d|ren|ten| in| ka| pa|anz|art|e i|e s|ne |nze|pan|r i|war|zer| bi|'
+        u' ei| fü| we|che|el |ere|für|hab|hr |is |ler|lle|n b|nen|pie|r s|sie|spi|und|ück|'
+        u'ür | be| fa| hi| so| sp|ach|ahr|ank|da |der|e a|e d|e h|ech|es |ese|fah|ges|hen|'
+        u'hte|lei|lte|mei|ng |nke|r e|r l|rte|rüc|s s|s w|ser|ste|t i|t m|ter|uch|ung|wer|'
+        u' ar| er| ih| im| je| ko| ni| no| te|abe|am |ar |ass|ck |e f|e g|e w|eam|eit|em |'
+        u'eri|f d|g s|h b|hal|hre|ill|im |itt|ke |kom|len|m h|men|mir|mme|n g|n i|n n|n s|'
+        u'ner|nic|nte|omm|on |r k|rau|s f|sse|t a|t g|t s|tea|tte|uns|urü|ute|zur| al| ba|'
+        u' br| dr| du| es| eu| fo| gl| gu| he| ke| le| ma| na| se| st| ve| vi| vo|all|alt|'
+        u'asi|auc|bas|be |ben|bra|bt |chu|chw|dan|du |e b|e k|e m|e n|e u|ehe|ehr|ei |est|'
+        u'et |f m|fe |ft |gef|geg|gt |gut|h d|he |hie|hle|hne|hrt|hwe|ier|ies|int|lfe|meh|'
+        u'mic|mit|n u|nac|nne|ns |oll|r a|r h|r p|r w|re |rie|rt |rti|sen|sis|sol|t t|til|'
+        u'um |ver|vie|was| bl| fe| fl| fä| kö| la| li| ne|a k|abt|amm|amp|and|ann|bei|bes|'
+        u'bin|bis|bit|ble|chi|chl|chs|chö|de |dem|dig|dir|dt |e p|e z|eck|efe|egn|eht|eib'
+    ),
+    'en': (
+        u' th|the|he |is |re | he|ing|ng | ar| is| no| wa|me |t t| go| to| yo|ank|you| fo|'
+        u'at |to |e i|ou |ve | ba| i | we|e g|e t|hat| wh|are|e b|e h|for|her|ld |ne |or |'
+        u'ot |ow |r t|se |tha|we | ca| ha| me| on| sh| ta|ave|er |ere|hel|ll |my |nd |nk |'
+        u'on |s a|s t|sho|tan|thi|e s|ed |ght|hav|ht |igh|ill|it |one|ty | in| le| my| ne|'
+        u' ri| te| wi|am |art|ase|e a|e c|e n|elp|g t|in |ks |lp |n t|nks|oin|ter|y a| a |'
+        u' an| be| co| gu| ho| li| pl| re|as |ce |ck |com|d t|e m|go |hin|his|not|now|o g|'
+        u'o t|old|ome|rty|st |t w|y t| do| hi| lo| ma| mo| ni| se|ait|an |ay |bas|can|d h|'
+        u'd i|e e|e f|e r|e w|e y|eam|eav|eed|eft|ell|em |et |ey |ft |goi|guy|hem|hey|hol|'
+        u'ice|k t|k w|lef|nee|nic|oul|our|rig|ry |t f|t s|tea|uld|ur |ush|wai|was|wha| am|'
+        u' de| di| ev| ok| ou| so| st| wo|ack|ad |and|ap |avy|cap|ch |did|e o|ee |en |ery|'
+        u'es |eve|goo|han|hea|hot|hou|i w|id |ind|le |lea|llo|low|mor|n s|ob |od |ok |ood|'
+        u'ore|orr|ort|out|p m|pla|rry|s b|s l|see|sh |t i|t m|th |ut |uys|ver|vy |wat|wil|'
+        u'y w|ys | ab| af| ag| br| bu| ci| dr| en| fl| ga| gl| gr| hf| it| of| pu| sp| ti|'
+        u' up| us| vi| wp| ye|abo|aga|ain|ame|any|atc|ate|att|aye|bac|bad|bat|beh|bou|bus|'
+        u'd l|d w|doi|e d|eas|ehi|emy|ene|ese|est|ew |f e|fla|fol|g a|g i|g o|gai|gam|ge '
+    ),
+    'es': (
+        u'os | es|en |est| de|la |que| el| la|do |or | qu| po|ue | en|a a|el |es |los|mos|'
+        u'por| lo| no| pe|a p|de |stá|ado|as |da |ien|n e|qui|se |tan| al| va|anq|ar |e v|'
+        u'go |na |nqu|par|ra |s e|te |uen|ues|ón | a | ba| co| ma| me| ta| vi|a b|a n|aci|'
+        u'amo|art|e e|ene|n l|ndo|s p|to | ar| bu| di| mi| re| te|al |an |bue|con|dos|e d|'
+        u'er |erí|ida|ier|igo|ión|lo |me |mi |no |o e|o l|on |po |r e|rti|ría|s m|s t|ta |'
+        u'ás | ay| ca| cu| eq| fu| gr| ha| mu| pa| si| un| y |a l|ata|cia|e m|e p|emo|equ|'
+        u'fue|gan|gra|ipo|l e|lle|mig|n a|n c|n t|qué|res|ro |rte|s d|sta|ten|tra|tro|tá |'
+        u'tán|uda|uie|uip|va |van|án | ag| ju| ne| nu| se| to| ve| vu| ya|a c|a e|a r|a v|'
+        u'agu|all|anc|and|ant|ara|ase|ayu|bas|ber|ces|ció|co |dad|deb|det|dis|dón|e c|e l|'
+        u'e y|ebe|ece|ell|emi|ena|ent|erd|esa|esi|esp|gua|hac|ias|ill|isi|isp|l a|ler|llo|'
+        u'n p|nco|nec|nem|nos|nto|nue|o c|o d|o n|o p|o s|o t|otr|oy |per|pes|r d|rac|ram|'
+        u'ran|s a|s v|sad|sit|spa|sto|til|tod|ued|uel|uga|una|ué |vue|ya |yud|ía | cr| da|'
+        u' dó| fa| fl| ho| má| pr| pu| ra| ro| ti| tr|a m|a q|a s|a t|alg|ame|apa|aqu|arb|'
+        u'aro|avo|baj|bat|bus|ca |cre|cui|cul|dej|dem|den|der|des|die|e h|e t|e u|ede|eja|'
+        u'ejo|elv|end|eng|era|ere|ero|ert|ese|ete|eti|etr|ez |fav|fla|gad|gui|gun|i m|ici'
+    ),
+    'fi': (
+        u'en |aa | me| mi| on| ta|on |än |ää |in |kaa|me |ssa|taa| pa| tu|inu|ta | ka| se|'
+        u'tä | jo|ist|le |lä |mme|n p|n t|sin| ol| pe|ais|aka|an |ans|ill|itä|n k|nss| he|'
+        u' si| va|at |e o|een|i t|li |lle|min|n s|se |si |ska|sta|tak|tää|ua |ä k|ään| ke|'
+        u' pi| tä|a o|iko|isi|kai|kii|len|llä|nua|ole|pan|pel|sar|tta|tul|ukk|ä t| en| ki|'
+        u' ku| nä| vi|a h|a p|a t|aan|eil|emm|i k|idä|iit|itt|ja |jou|ka |kku|ko |kue|kää|'
+        u'la |lla|mei|men|n j|n m|ni |os |ouk|pit|ras|s p|tee|tel|ttä|tyk|ule|un | aj| ha|'
+        u' hy| ja| la| ty| vo|a m|ari|ask|e t|eid|eli|ell|ene|ett|he |hyv|i o|ito|kan|ksi|'
+        u'män|n h|nää|oit|oli|oll|sa |sem|sen|t m|tai|ti |tos|täm|uee|uol|vat|vit|voi|ä p|'
+        u'ämä| et| hu| ko| lu| pu| pä| ra| te| yh|a j|a l|a n|a s|a v|aja|amm|are|art|arv|'
+        u'ast|ava|den|dän|e m|ela|elu|esk|etä|hta|huo|iel|imm|ita|its|jan|jok|kes|kik|kis|'
+        u'koh|ku |lai|lat|lis|mik|n a|n e|n l|n v|nun|näh|ota|päi|rvi|ste|stö|t p|tar|tse|'
+        u'tte|tuk|täi|uki|unt|ust|yki|yt |yvä|ä e|ä o|ä v|äis|ät | am| an| au| ei| hä| jä|'
+        u' li| no| od| po| py| ti| äl|a a|a e|a k|a r|aam|aht|aik|ait|ala|all|alu|ama|ani|'
+        u'ann|ant|as |ase|ata|atk|aus|aut|dot|e a|e h|e n|e p|e v|eek|ees|eet|ei |elä|ens|'
+        u'enä|ess|et |ete|eur|evä|hal|hde|hei|hol|hti|i h|i j|i m|i p|ia |iho|iin|ika|iki'
+    ),
+    'fr': (
+        u' le|le |us | de|on |ez |re |our|ur | il| qu|ne |r l|de |es |ous|cha|e c|ent|er |'
+        u'est|nt |te | ch| es| la| po| su| vo|il |la |lle|ns |st | l |e t|ill|qui| en| mo|'
+        u' no| pa| pe|e e|e s|har|les|pou|que|ut |vou| ai| ar| av| ce| ma| me| on| to| un|'
+        u'art|e b|e m|e p|is |nne|s c|s p|tte| a | co| re| ti|a p|ait|ars|ien|it |r d|rri|'
+        u'rs |s a|s l|se |sur|tai|ten|tou|tre|ue |un | ba| be| bo| c | ca| da| fa| je| pl|'
+        u'ais|anc|ans|ave|ce |che|dan|e v|en |et |ie |ir |ire|ive|je |l e|oi |pe |qu |rti|'
+        u's d|t l|tie|ui | dé| et| j | ne| te| va| y | à | éq| ét|aid|ar |arr|au |c é|cet|'
+        u'ci |con|e d|e f|e j|e q|eau|ens|ett|eut|ide|ils|ipe|j a|jou|l a|ls |ma |me |moi|'
+        u'n a|nce|nou|onn|ont|par|pas|peu|son|sui|t a|t d|t m|til|tir|uel|uip|uis|urd|va |'
+        u'z l|z v|équ|éta| at| au| ga| jo| lo| pr| si| tu| vi| vu|a b|a c|ai |ail|as |ase|'
+        u'ass|att|auc|bas|bat|bea|bon|cor|der|des|ds |e l|e r|ec |emi|enc|end|eni|enn|erc|'
+        u'eri|err|eux|fai|i p|ion|ise|l é|ler|lou|lus|mer|n d|n p|nco|nde|ntr|ond|ons|ore|'
+        u'otr|out|per|plu|r s|rai|rci|rd |rie|riv|rne|s i|s m|s v|sse|t n|tu |ux |vec|vez|'
+        u'ée | bi| bu| do| fl| in| mi| où| ro| s | sa| se| so| tr|a a|a t|a v|ain|air|ata|'
+        u'aut|ava|avo|aît|bes|bie|ble|bui|c l|cap|car|cen|com|dev|dez|dre|dés|e g|e i|e o'
+    ),
+    'hr': (
+        u'je |te | na| je|ti | te| po|ite|mo |na |ati|ije| bi| do|li | mi| ne| vi|a m|a n|'
+        u'e s| li| mo| tr| u | za|e n|e t|enk|im |ju |mi |reb|rij|ten| bo| gr| pu| se| st|'
+        u' ti|eba|i b|i n|i t|jed|ji |la |ne |no |tre| id| ov| pr| sa|a b|du |e b|e d|ija|'
+        u'ja |ki |ko |kov|lje|ni |nko|o j|o s|ost|pom|rat|se |sti|tit|to |vid| br| da| de|'
+        u' ko| to|a i|a j|a s|am |ani|as |azi|bil|da |dob|e l|e m|emo|ešk|ga |gra|i i|i j|'
+        u'i k|i s|igr|ih |ima|ira|iti|mož|o v|oji|omo|ova|ože|pri|ra |ran|til|tim|u s|ći |'
+        u' ar| ba| hv| i | ig| ka| me| ni| od| op| sr| vo|a o|a p|ad |aj |ajt|aju|ako|ala|'
+        u'amo|ao |art|azu|baz|bit|bok|bra|dje|dol|drž|e a|e i|edn|eli|ene|eri|etk|hva|i l|'
+        u'i p|i v|idi|ilj|io |iše|jer|jte|koj|laz|lim|lji|ma |moć|mu |net|nit|nje|nu |o n|'
+        u'obr|ok |ola|om |ozi|pro|raj|rti|sam|sre|sta|ste|svi|teš|tko|u d|u g|va |val|vi |'
+        u'viš|za |zim|zit|zu |še | dr| gu| ih| im| in| iz| jo| kr| la| lo| ma| nj| no| os|'
+        u' pa| s | su| sv| va| vr| će| če|a k|a t|a v|ate|av |avi|ače|ba |bam|bol|ca |caj|'
+        u'cij|d p|dan|des|deč|dit|dlj|e j|e p|e u|edi|eka|elj|epr|er |ese|esn|est|et |eti|'
+        u'eći|ečk|god|gre|grm|i d|i m|i u|i z|ica|ici|ide|idl|idu|iju|ila|ilo|imo|imu|ini|'
+        u'it |itk|ivo|j m|jat|jel|jen|jes|jev|jiv|još|k t|k u|ka |kak|ke |kog|kor|ku |lij'
+    ),
+    'hu': (
+        u' a |ek | me|ok | sz|k a|an | kö| ne| ta| va|nk |nek|t m|tek| cs|meg|t a|tan|tok|'
+        u' mi|a b|a t|egy|ell|et |gy |ni |st |ség|unk| bo| el| le|agy|ank|csa|em |lt |sza|'
+        u'tt |éte| az| eg| ke| lá| se| vi| vo|a c|a j|ato|az |bb |gyo|gít|ját|ki |len|men|'
+        u'ne |ssz|ég | ha| já| jö| lő| má| tu|a k|a l|a n|apa|at |ban|egí|i a|int|iss|k e|'
+        u'k l|k s|kel|ll |lle|lát|m a|min|nne|olt|on |ott|pat|ros|sap|seg|sze|szi|sét|tal|'
+        u'tud|van|vol|zer|ége|ép |és |önn| bá| ez| fo| ho| jó| ké| ma| rá| tü| vá| és|a s|'
+        u'a v|ak |aki|ala|am |art|asz|b t|be |báz|cs |csi|dja|e v|eg |ehé|ele|en |eni|enj|'
+        u'enk|ere|ete|ez |héz|inc|ind|job|jét|jó |jön|k h|k k|k t|kok|kös|köz|l a|leg|m m|'
+        u'már|n v|ncs|neh|nem|nki|nko|nál|obb|ot |re |rsé|rt |s a|sin|sz |szé|t v|tar|ten|'
+        u'tsé|tta|ték|tüz|uk |vag|val|vis|vár|z e|zis|zép|zér|ám |ár |árn|áto|áté|ázi|érs|'
+        u'éz |íte|íts|ösz|öze|ünk|üzé| ak| am| gy| há| je| jo| ki| mo| mé| na| ny| ot| sr|'
+        u' té| tö| ve| új| ők|a a|a d|a g|a m|adj|agg|aka|al |alá|ani|ara|ata|ba |ben|boc|'
+        u'bok|cet|cok|cso|den|e k|e m|ebb|el |elj|enn|ens|epe|eri|es |ett|fog|g k|get|gye|'
+        u'gyt|ha |hoz|i f|igy|ik |ine|iná|ist|it |j e|j f|jat|jel|juk|k j|k v|ket|kin|kot|'
+        u'koz|kun|kép|kör|köv|lak|lek|lál|löv|lőj|m s|m t|mit|még|n a|n e|n k|n m|nag|nak'
+    ),
+    'id': (
+        u'an |ng |ya |ang| sa| me|aya|say| se| ba| pe|tan| be| ka| ki| ma| te|ak |kit|ta |'
+        u' di|ber|nya| da| ke|a s|ita|men| ta| ya|a m|kan|us | ti|ah |at |ata|di |eka|nga|'
+        u'per|tu |yan|ank|ema|eng|i s|tem|a k|a t|as |bag|da |emb|ena|ere|gi |mba|mer|n t|'
+        u'nk |ntu|pa | ak| in| la|ada|agu|aka|ali|apa|era|eri|g s|gan|gus|ka |mu |ran|rek|'
+        u'ri |ung| ad| bu| ha| pu|a b|a d|a p|a y|amu|asi|ban|dan|g b|ih |ini|k b|kas|ke |'
+        u'man|n m|nan|ni |sem|ter|uh |uk | at| bi| si|a l|agi|aku|ant|any|ar |h b|han|hat|'
+        u'k a|kal|kam|lag|ma |n b|n k|si |ti |tim|u k|uan| de| it| ja|aha|ai |ain|ala|ana|'
+        u'ara|aru|ati|atu|bak|bis|but|dak|dat|dia|ela|erg|ert|eta|g k|i a|i b|i k|i m|ia |'
+        u'ida|im |ing|ir |isa|isi|itu|k t|ku |mai|nah|ngg|ngi|pun|rka|s t|sa |sih|tar|tas|'
+        u'tid|u a|u p|unt|utu| ap| ar| le| mu| pa| un|a a|a i|ama|ann|ap |ari|ark|art|au |'
+        u'awa|bal|bar|ene|ers|ggu|h d|h p|h s|i i|ian|iap|iha|ile|ima|k d|k m|k s|kem|lah|'
+        u'ler|li |lih|mak|mar|mas|n d|na |nny|ong|put|r k|rat|rgi|rim|rti|s b|s s|sam|sat|'
+        u'sek|sia|t m|til|tuh|tuk|u m|u s|uny|ur |uta| du| su| to|aaf|af |aik|amp|and|asa|'
+        u'bai|bih|buk|bur|dah|dar|den|e d|e k|eba|ebi|emp|emu|epa|erh|erm|ern|eru|et |g d|'
+        u'g m|g p|ga |gah|ger|gu |h a|har|i d|i h|i j|i l|i u|ik |ikn|iku|in |ina|it |jan'
+    ),
+    'it': (
+        u'to |la | la| co| pe| è |re |te |ro |sta|ta |no | il| mi| no| qu|arr|ate|ia |il |'
+        u'mo |per|ti | ca| di| ne|car|e p|gli|qua|rri|rti| ch| se| st|a m|a p|art|con|er |'
+        u'est|i c|ne |o l|on |ra |tro| fa|a c|amo|att|che|e a|he |i s|mi |o a|one|par|tat|'
+        u' ar| su|a n|ato|e i|e v|iam|ion|l c|na |o s|ri |tta|è s| ba| l | un| vi|ant|are|'
+        u'co |col|di |do |e s|ere|igl|l a|le |ndo|non|o c|que|ten|tti| ai| an| be| ce| ci|'
+        u' da| do| gr| i | in| ma| pa| sp| sq| te| ti| tu| va|a b|a d|a t|adr|aiu|anc|and|'
+        u'ata|cia|die|dra|e d|e l|e n|el |emi|ent|ess|ete|gio|i a|i p|ie |ier|ior|iut|lla|'
+        u'mia|nco|nti|o d|o i|o r|o t|olp|ore|se |squ|ssi|str|sul|tit|uad|ual|ues|un |van|'
+        u'vis|vo |vor| a | ab| av| e | fi| gi| pi| po| pr| ra| sc| to|a a|a s|a è|abb|ai |'
+        u'ann|ano|ase|avo|azi|bas|bat|bbi|bel|bia|cat|cci|cen|ci |da |dov|e c|e m|ell|eri|'
+        u'erv|esa|etr|ett|ggi|gra|i n|ica|iet|ira|ist|ita|iù |l f|l n|li |lie|lio|me |n c|'
+        u'nel|nes|nno|ntr|o f|o m|o n|o p|o q|oi |ono|orn|ort|oss|ott|pes|più|po |pos|r l|'
+        u'rat|raz|rem|res|riv|rna|rve|san|seg|ser|sio|sto|tar|tig|ua |ul |una|uno|uov|usa|'
+        u've |zie|zio| ad| al| as| at| c | de| ho| le| me| nu| pu| ri| ro| so| ve|a r|a u|'
+        u'a v|aga|agg|agl|al |alc|app|ara|asp|ave|azz|c è|ca |ce |ces|com|cor|cun|cus|des'
+    ),
+    'lt': (
+        u'as |man| ma| pa|kit| ta|te |ai | ko|aži|is |ite|os |ti |važ| pr|au |lai| ka|aik|'
+        u'iuo|ja |s p|žiu| ge| ji| ne| tu| va| vi| į |ank|ger|kas|ms |pra|s n|tan|uoj|šau|'
+        u' ar| at| da| la| už| ši|and|ar |gal|iau|ie |iky|je |me |vo |žai| gr| mū| nu| su|'
+        u' ža|aid|art|aud|i k|ia |iki|ime|jie|nau|nka|oja|tai|tur|uos|uri|us |vie| ba| bu|'
+        u' ga| ju| na| no| se|ais|ala|ali|an |auk|ači|aša|buv|dar|eik|era|eri|i a|i j|i t|'
+        u'ies|ija|ini|kai|ko |kom|mum|nki|no |nor|o m|oma|pal|pri|rai|ras|raš|rei|rie|s g|'
+        u's m|s v|sek|uvo|už |vis|ės | ač| ir| kr| ku| mu| re| ša| že|a k|a m|a t|aba|ane|'
+        u'ano|api|atv|aug|auj|aus|azę|baz|da |dim|e a|e b|e i|e p|e s|ems|est|i b|i p|idi|'
+        u'iem|ien|ieš|ile|int|ir |isi|iū |kia|kok|kur|kys|ką |ler|mat|mo |mą |mūš|nkų|o k|'
+        u'o į|oje|ok |ri |rij|rti|s k|s s|s t|s š|sie|sim|sti|sun|tas|tav|til|tu |tva|tą |'
+        u'u t|ums|unk|vas|yra|zę |ą k|čia|čiū|į m|šio|šis|ū u|ūši| an| aš| bū| de| fl| iš|'
+        u' jo| ke| ki| me| po| pu| sa| st| tr| vy|a į|adė|aga|aim|aip|alb|ang|ant|asi|ato|'
+        u'ats|ave|avo|aš |ašv|bai|bas|deš|din|dyk|dėk|e d|e š|ebe|ei |emp|emė|en |eno|es |'
+        u'esi|eši|fla|gia|gok|grį|gą |i g|iai|ias|iek|iko|ima|imi|imo|imą|imė|ink|inė|io |'
+        u'ip |ipr|ist|ita|ito|itė|iu |ius|išl|jis|jo |juo|k m|k į|kar|kie|krū|ks |ksi|kti'
+    ),
+    'nl': (
+        u'en | de| he|de |et |er |cht| ge|het| wa|an |ank|at |ie |is | we|aar|ij |ik |ze |'
+        u' ik| mi|op |ten| be| is| me| op| vo|aan|n w|ter|we | da| er| in| te|ijn|mij| je|'
+        u' no| ta|and|ar |den|e b|e g|e t|el |heb|in |je |jn |n d|oor|t i|t w|tan| ga| ka|'
+        u' na| st| ve| ze|ben|dat|e a|e h|e k|e s|ech|een|eer|gaa|gen|ht |hte|lie|lle|or |'
+        u'r d|voo| al| go| ni| wi| zi|art|as |dig|e n|ed |eel|ema|ete|iet|ig |ill|kt |lij|'
+        u'n j|n z|naa|nd |nen|nie|nk |nne|ot |p m|r h|r i|t d|t h|t v| aa| ee| en| hi| ko|'
+        u' mo| sp|aat|ach|am |are|ate|bbe|bli|daa|dan|eam|ebb|eda|eri|eze|goe|ich|j i|kom|'
+        u'ks |men|n a|n h|n i|n r|n t|n v|nde|nks|oed|oud|p d|re |rie|rug|s e|sch|spe|t m|'
+        u'te |tea|tie|ver|war|was|wat|zwa| ar| ba| di| ho| jo| ju| ku| li| on| re| sc| to|'
+        u' va| zo| zw|ag |all|als|asi|bas|bed|d g|dez|e d|e l|e m|eb |eft|eld|eli|ere|erl|'
+        u'eru|es |eve|ft |gee|gev|hie|hij|hou|iem|ier|it |jul|k d|k z|kan|ken|kun|l e|ler|'
+        u'lli|lp |m h|maa|man|me |mee|met|moe|n g|n m|nkt|nod|ns |odi|oet|olg|om |pel|ren|'
+        u'rti|s d|s g|s o|sis|sje|sta|ste|t e|t n|t o|t z|til|ude|ug |ull|vec|vol| ac| bi|'
+        u' bl| bo| do| fo| gr| ha| hu| ie| ma| ra| ri| ro| sl| so| ti| vi|a d|aag|aak|aal|'
+        u'al |ant|b h|bij|chi|dde|del|die|e e|e i|e r|e v|e z|ebl|eef|ege|elp|end|ens|ers'
+    ),
+    'pl': (
+        u'ie | po|cie| do| je|nie| cz| pr| za|rze| na| ni|dzi|trz| ma|do |ej |my |na |czo|'
+        u'ołg|prz|za |zoł|a d|aj |cze|go |ię |jes|się|wie| ja| kt| si| st| te| wi|est|jad|'
+        u'jci|ki |rzy|ta | ci| dz| gr| to| w |a m|a n|am |asz|ać |dob|e m|ego|gra|jed|mam|'
+        u'o b|obr|str|to |uży|ze |zie|zy |ści| ba| by| ch| dr| mi| mn| tr| wy|a j|a w|adą|'
+        u'ajc|amy|art|był|ch |cię|dru|dą |dę |e c|e j|e s|em |eni|i j|ję |mi |ny |o z|pom|'
+        u'pot|pow|pra|ra |raz|ruż|st |sza|szy|tej|wid|y j|y w|yma|zym|zę |żyn| ar| bi| i |'
+        u' ju| le| mo| on| wr| ws|a p|az |baz|bra|buj|ci |czy|e b|e n|e w|e z|ebu|edź|esz|'
+        u'gi |gów|i p|i z|ia |idz|ieg|iet|ić |ięk|ięż|j d|je |już|kie|kto|któ|mni|moż|nas|'
+        u'nia|o m|o n|ocz|oni|otr|owi|ośc|oże|ras|rob|rza|sta|sz |szc|ter|tór|uje|uję|uż |'
+        u'w k|win|y c|zcz|zeb|zen|zię|ów |ą d|ę p|ę z|ężk|łgi|łgó|żki| bo| ca| co| dl| fl|'
+        u' kr| my| no| ro| sk| ta| ty| ut| ze| zo| śr|a c|a g|a t|aca|ach|acz|adn|adę|aka|'
+        u'aki|ank|apa|as |awi|azę|ał |ałe|bie|bit|bot|caj|ce |cha|chc|chł|cji|co |dla|dne|'
+        u'dy |dze|e i|e o|e p|e u|edn|edz|ek |eka|ela|emy|epr|eps|era|et |fla|ga |gło|hło|'
+        u'i n|i w|iał|ich|ied|iel|ien|im |ini|inn|isz|itw|iśc|j b|j m|j s|jak|ji |ją |kac|'
+        u'kim|ko |krz|laj|lan|lep|liś|m w|ma |map|moc|naj|ne |ni |nic|now|ną |o c|o d|o t'
+    ),
+    'pt': (
+        u'do | es|os |que|ão |em | de|est|ra | qu|es |ndo| o | pe|a p|o t|par| pa| po| se|'
+        u'ado|de |ele|or |se | a | co| el| no|a a|ar |da |mos|ue | ma| vo|e e| mi| ta| te|'
+        u'and|anq|ara|ha |nqu|tan|te |tão| at| fo| in| pr| ti| vi|art|e a|e v|egu|ess|ida|'
+        u'les|me |nha|não|o c|o d|o p|ocê|por|rti|s d|seg|stá|stã|tem|tá |voc| ba| bo| ca|'
+        u' nã| um|a b|a e|am |e s|er |foi|inh|is |lha|ma |min|o a|o n|oi |pel|pre|rec|ria|'
+        u's e|ta |ues| aj| ar| e | em| fa| me| mo| tr| va|a c|a m|a t|ais|aju|amo|ari|ase|'
+        u'com|con|des|dos|e m|e n|e p|elo|eu |gad|go |har|ia |iga|igo|im |ime|ind|ira|jud|'
+        u'le |lo |m c|m e|m p|mai|na |o e|o v|ort|ou |per|pes|r e|rar|s a|s m|sa |ssa|sto|'
+        u'tim|uem|uma|ura|ês | eu| na| nó| ob| os| re|a f|a o|al |alh|as |bas|boa|bri|cis|'
+        u'cul|cê |cês|dad|dev|e d|eci|end|era|esa|eve|gan|gur|gué|hor|ilh|lho|m a|m m|m o|'
+        u'm s|mig|mim|nda|nos|nós|o q|o s|oa |obr|ode|om |pa |pod|r f|r o|rem|rig|rta|rte|'
+        u's n|s p|s t|s v|sad|so |tid|til|tir|to |tou|tra|uda|uim|um |uém|vir|ção|ém |ós |'
+        u' ac| al| ap| be| cu| da| di| do| fi| fl| ga| ho| jo| já| mu| sa| si| to| vã| é |'
+        u'a d|a l|a q|a s|a v|ai |alg|anc|apa|ata|ati|até|avo|aze|bat|ca |co |cui|dem|e c|'
+        u'e i|ega|el |ela|elh|emo|ent|erd|ert|esc|esp|fav|faz|fla|gui|ho |i p|i u|imi|imo'
+    ),
+    'ro': (
+        u'ți |te | pe| în|să | me| să| ma|ai |ine|ntr| ce| gr|anc|ați|că |de |mai|pe |ul |'
+        u' de| ta|e d|e p|mer|ncu|ne |ta |în | tr| vi|a a|e a|e m|em |ent|erg|eți|ie |ile|'
+        u'le |re |tan|tra|tru| a | am| ar| fo| mi| mu| no| nu| vă|am |are|ast|ce |e c|ea |'
+        u'i s|in |nu |or |rea|ru |sta|tre|tă |uri| ca| es| re| te| un|art|cul|cur|e e|e g|'
+        u'e t|ei |est|gre|i a|i m|ia |la |mul|nev|nă |ost|pen|reu|ste|u m|ă b|ă p| ac| aj|'
+        u' as| ba| bu| bă| di| ec| ei| fa| in| ne| o | st| tu|a f|a n|a s|aju|ar |arc|at |'
+        u'ate|bun|car|chi|e s|e u|ech|fac|fos|ge |hip|i b|i p|int|jut|min|n t|pa |pă |rge|'
+        u'st |taț|tur|un |ut |vin|vă |ă a|ă m|ă v| ap| av| aș| ci| la| po| sp| su| vr| îm|'
+        u' și| ți|a e|ave|aza|baz|bui|ceț|ci |cin|din|ebu|el |eri|esc|eu |evo|i c|i d|i f|'
+        u'i g|i l|ipa|iți|ler|lțu|m c|m n|mes|mi |n m|oar|oie|ptă|r a|rag|reb|ri |rij|ril|'
+        u'roa|rti|sc |str|t b|til|toa|tor|ui |ulț|um |ume|und|ună|uto|voi|vre|za |ze |ă f|'
+        u'ă r|ă s|ă t|ă ș|și |ște|ști|țin|țum| aț| co| cr| cu| da| du| e | fl| fr| ha| ia|'
+        u' jo| ju| lo| lu| mă| ni| pl| pr| pu| pă| ro| sc| ur|a i|a m|a v|a î|abă|ace|acu|'
+        u'acă|age|ami|apt|apă|aș |așt|bil|bă |băi|băt|c p|cat|cel|cen|con|cre|cu |cum|cuz|'
+        u'dat|dup|dă |e f|e l|e n|e v|e î|eal|edi|ele|eni|ept|er |ere|eva|eșt|fiș|fla|fru'
+    ),
+    'sk': (
+        u'te |to | na| po| pr| do| st|me |na |str| ta| to| za|tre| je| ch| ne|ank|e n|e s|'
+        u'je |pre|tan| bo| sa| so| te|a z|kto|o t|om |sa |za | hr| id| ma| má| ni|a m|a n|'
+        u'del|em |i p|ide|li |lo |mi |som|ím | a | ak| by| de| kr| sk| tí| v | zá| ťa|a s|'
+        u'ať |bol|by |dob|drž|du |e p|eľa|hra|i s|jem|m t|m z|môž|o m|o s|obr|pom|pot|reb|'
+        u'tím|u p|uje|y s| ke| kt| mi| mô| mň| se| ve|a a|a c|a d|a k|adň|aj |ali|ažk|bit|'
+        u'brá|buj|ciu|ctv|do |dú |dňu|e j|e m|e t|e v|e z|ebu|ect|el |ele|elo|est|hoď|ia |'
+        u'iat|idú|iu |ja |ka |kla|ky |kým|lad|lec|los|mal|mu |mám|mňa|ne |ni |nie|nky|né |'
+        u'o n|ost|otr|ou |pro|ran|red|rel|ríd|rý |ste|ter|tra|tvo|vid|zák|ákl|ám |é t|íme|'
+        u'ôže|ý t|ým |ďak|ďte|ňa |ňu |ť k|ť s|ťaž|žké|žte| bi| dr| eš| in| k | my| no| ná|'
+        u' pe| ro| si| sm| sp| sú| tr| už| vi| vr| vď| vš| zl| ľa|a h|a p|a t|ad |aka|ako|'
+        u'al |ala|am |ani|ate|az |boj|cha|chc|cho|de |dem|den|dlo|dne|dy |e d|e h|ebo|ejt|'
+        u'ekn|ekt|eme|epr|epá|epš|era|etk|eď |ešt|hal|hce|ho |hľa|i b|ie |iek|ieľ|itk|iť |'
+        u'j n|jte|jto|jú |ko |kov|kro|krí|ku |ké |ký |l b|la |lan|le |lep|m v|map|moc|naj|'
+        u'nep|nes|nk |nko|ná |o b|o j|o v|oc |oj |ola|olo|omo|omô|orý|osí|ov |oví|očk|oďt|'
+        u'pek|poz|poč|pri|páč|raz|re |rep|ria|rie|ros|rov|roz|ru |rá |ráť|rží|sek|si |sme'
+    ),
+    'sv': (
+        u'en | de|er |ar |et | vi|ill|är | st|de | mi|ag |den|til| fö|an |ig |ll |ra | ja|'
+        u' på| ti|a s|för|jag|på |vi | ha| är|det|r d|str|ta |tt | va|r s|rid|tri|var|ör |'
+        u' in| ko|ken|kom|lle|n d|sva| ba| hå| i | ka| sk| sp| ta|agn|hål|ler|mig|n h|om |'
+        u'r i|r t|t v|ter|vag|åll| di| hä| la| oc| tr|art|ch |ck |dsv|eri|ga |har|här|i b|'
+        u'ids|int|itt|ka |lag|mer|mme|n s|nga|nte|och|omm|pel|spe|sta|vil| br| en| hj| me|'
+        u' se| tu| vä| åk|a p|a t|ack|bak|bra|dig|ela|hjä|ing|jäl|k f|kan|la |lla|med|mit|'
+        u'n k|n n|n v|na |nar|on |r h|r n|re |sen|tac|te |tun|ung|upp|vän|älp|å m|år |åt |'
+        u' ar| be| bo| du| er| fi| fl| fo| kö| lä| ni| nå| si| up|a v|ade|age|ara|at |att|'
+        u'bas|beh|da |du |e n|e t|e v|ed |ehö|em |era|g b|g k|g s|gen|get|gna|gon|han|höv|'
+        u'i h|i k|ilk|in |kar|ker|kul|kör|lar|lke|lls|låt|n i|n m|n t|n ä|nde|ni |nta|någ|'
+        u'ort|r a|r e|r f|r l|r m|r o|r p|rde|rie|rna|rti|t d|t f|t l|t s|ver|yck|äst|ätt|'
+        u'ågo|örl|öve| al| an| at| bu| bä| gr| he| ki| kl| ku| ly| no| nu| ny| nä| om| os|'
+        u' sn| ve| vå|a b|a d|a e|a f|a g|a o|a u|aka|all|amm|and|ank|ans|arn|ase|bba|bor|'
+        u'bus|d ä|del|dem|e h|e k|e m|e s|el |end|far|fie|fla|for|föl|g e|g j|gn |gra|gt |'
+        u'h h|hop|i d|i s|ida|ide|ien|iet|iho|ikt|inn|ion|iti|jut|kil|kju|kla|kt |l a|l o'
+    ),
+    'tr': (
+        u' ta|ar |in |lar|im | bi| ka|eri|tan|ın | ed| ha|en |yor| sa|ard|bir|edi|ir |iyi|'
+        u'yi | be| ge|an |ana|ank|e g|ede|eni|kım|ler|tak|ım |ız | ba| bu| gi| iy| se| va|'
+        u' ya|a k|ada|alı|din|eli|n b|ni |rdı|teş|var|ımı| ar| da| gö| he| iç| me| ne| on|'
+        u' te|akı|ayı|er |gör|i t|iyo|içi|n t|nla|r m|ri |u s|ye |çin| at| et| ku| oy| ve|'
+        u'a g|adı|aha|ark|ben|bil|bu |da |dah|dım|dın|e i|eki|eme|erk|eş |gel|har|i b|ili|'
+        u'iz |kad|kay|ki |kla|liy|n i|na |ne |nız|or |rka|sav|se |t e|ta |ter|tı |yar|ını|'
+        u' ağ| di| en| gü| to| tu| yo| üs|a a|a b|a t|a y|abi|ak |aki|ari|at |ate|ava|ağı|'
+        u'aşt|ban|dan|diy|e s|ekk|ele|ere|et |eti|eye|eşe|ger|gid|ha |i d|i g|ide|ini|iye|'
+        u'k i|kkü|kle|kür|la |lir|m b|m e|m h|m k|ma |may|mel|mer|mey|mi |mın|mız|n a|nad|'
+        u'nce|nkl|ok |onl|onu|opç|pçu|r b|r d|r t|ra |re |rim|rke|rla|rüş|sen|ssü|ste|sın|'
+        u'tim|top|tut|un |vaş|ve |örü|üss|ğır|ıma|ş e|şek| al| bo| de| do| dö| dü| ih| is|'
+        u' iş| ki| kö| lü| mi| or| so| sı| ça| çe| ço| şi|a d|a i|acı|ala|am |ang|anı|are|'
+        u'arı|ası|ata|aya|ayd|aşl|bek|biz|cel|ceğ|cım|daş|dec|dek|den|dik|dön|düş|dı |e a|'
+        u'e d|e k|ece|ek |ekl|el |enc|ese|etm|eyi|eği|fen|git|gün|güz|han|hem|her|hti|i e|'
+        u'i o|i s|iht|ika|ikk|ile|ip |iri|isi|ist|ita|iya|ize|k h|k t|kal|kan|kar|kat|kes'
+    ),
+    'vi': (
+        u'ng | ch| tô|tôi|ôi |g t| tr| nh| th|n đ|g n|i c|i đ|n c|ạn | gi| đi|chú|i t|ên |'
+        u'úng|đi | bạ| nà| ph| ta|bạn|g đ|hún|n t|ta | có| kh| đa|ang|ay |có |hôn|i n|i v|'
+        u'khô|nh |ông|đan|ới | vớ| xe|o c|với|ăng|ạng|ồi | bắ| cá| củ| họ| tă| đư| đồ|a t|'
+        u'của|g c|họ |n n|tăn|xe |ào |áo |úp |ận |ắn |ủa | hạ| lắ| ng| rồ| đã| độ|ai |bắn|'
+        u'chơ|e t|g b|g h|giú|hơi|hạn|i h|iúp|lắm|n l|này|rận|rồi|trậ|y l|ày |đã |đượ|đội|'
+        u'ơi |ơn |ược|ắm |ến |ội |ời |ợc | ai| bả| co| că| cứ| ha| là| lạ| nó| qu| sa| đâ|'
+        u' đế|a c|au |bản|c k|con|căn|cứ |giữ|háo|i b|i m|lại|n g|n h|nào|nó |on |phá|ánh|'
+        u'ây |đến|ười|ại |ản |ất |ọ đ|ừng|ữa | bê| cả| cầ| lỗ| mọ| mộ| nê| nặ| nữ| sẽ| và|'
+        u' đó| đừ| ơn| ở |a đ|bên|c b|ch |các|cảm|cần|gườ|hay|iữ |làm|lỗi|m n|m ơ|mọi|một|'
+        u'n b|n v|ngư|nên|nặn|nữa|o t|p t|p đ|run|sau|sẽ |t m|tru|ung|uốn|àm |ác |òn |ùng|'
+        u'ăn |đây|đó |đồ |đừn|ảm |ần |ặng|ọi |ỗi |ột |ứ c| bị| bụ| cò| cù| hơ| la| lê| mu|'
+        u' mà| mạ| so| tầ| tệ| tố| từ| vì| xi| đá| đạ| đẹ| để| đị| đợ|a b|a k|a s|anh|ao |'
+        u'bị |bụi|cho|cán|còn|cùn|em |eo |g l|g v|h c|h p|heo|hiề|ho |hé |hìn|hía|hơn|hất|'
+        u'hật|hể |hỗ |i k|i l|i s|in |iều|lên|m b|m c|m m|m t|m đ|muố|mà |mạn|n r|nha|nhi|'
+        u'nhé|nhì|nhấ|o x|o ở|oi |ong|p b|p l|phí|qua|quá|ron|soi|t l|t n|t r|the|thậ|thể'
+    ),
+}
+# END LANGID MODEL
+
+# Write out buffered log lines when the client exits
+atexit.register(saveQuota)
+atexit.register(writeMetrics)
+atexit.register(flushLog)
 
 # Initialize
 init()
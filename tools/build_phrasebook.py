@@ -0,0 +1,86 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""Compile tools/phrasebook.tsv into the phrasebook packed into the .wotmod
+
+The output is PHRASEBOOK_MAGIC followed by zlib-compressed UTF-8 lines
+"key<TAB>LANG<TAB>translation", sorted by key. Keys are normalized like
+cacheKey() in the mod so a lookup is one dict hit. build.py calls
+compilePhrasebook(); run this directly to check the corpus or to write
+the file somewhere for testing:
+
+    python tools/build_phrasebook.py [output path]
+"""
+import io
+import os
+import re
+import sys
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHRASEBOOK_SOURCE = os.path.join(ROOT, 'tools', 'phrasebook.tsv')
+PHRASEBOOK_FILE = 'microsoft_translator_phrasebook.bin'
+PHRASEBOOK_MAGIC = 'WOTPB1\n'
+
+# Must match the patterns behind cacheKey() in the mod
+ZERO_WIDTH_PATTERN = re.compile(u'[\u00ad\u200b-\u200f\u2060-\u2064\ufeff]')
+WHITESPACE_PATTERN = re.compile(r'\s+', re.UNICODE)
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+(?=[^\w\s])', re.UNICODE)
+REPEATED_PUNCTUATION_PATTERN = re.compile(r'([^\w\s])\1+', re.UNICODE)
+REPEATED_LETTER_PATTERN = re.compile(r'([^\W\d_])\1{2,}', re.UNICODE)
+EDGE_PUNCTUATION_PATTERN = re.compile(r'^[\W_]+|[\W_]+$', re.UNICODE)
+
+def phraseKey(text):
+    """Normalize a phrase; must match cacheKey() in the mod"""
+    text = ZERO_WIDTH_PATTERN.sub(u'', text).lower()
+    text = WHITESPACE_PATTERN.sub(u' ', text)
+    text = SPACE_BEFORE_PUNCTUATION_PATTERN.sub(u'', text)
+    text = REPEATED_PUNCTUATION_PATTERN.sub(r'\1', text)
+    text = REPEATED_LETTER_PATTERN.sub(r'\1\1', text)
+    return EDGE_PUNCTUATION_PATTERN.sub(u'', text) or text.strip()
+
+def loadPhrases(path=PHRASEBOOK_SOURCE):
+    """Return {key: (LANG, translation)}, warning about phrases listed twice"""
+    phrases = {}
+    with io.open(path, encoding='utf-8') as source:
+        for number, line in enumerate(source, 1):
+            line = line.rstrip(u'\n')
+            if not line.strip() or line.startswith(u'#'):
+                continue
+            fields = line.split(u'\t')
+            if len(fields) != 3 or not all(field.strip() for field in fields):
+                raise ValueError('%s:%d: expected lang<TAB>phrase<TAB>translation' % (path, number))
+            lang, phrase, translation = [field.strip() for field in fields]
+            
+            key = phraseKey(phrase)
+            entry = (lang.upper(), translation)
+            if key in phrases:
+                if phrases[key] != entry:
+                    print(('WARNING: %s:%d: "%s" already listed as %s "%s", keeping that' % (
+                        path, number, phrase, phrases[key][0], phrases[key][1])).encode('utf-8'))
+                continue
+            phrases[key] = entry
+    return phrases
+
+def packPhrases(phrases):
+    """Return the phrasebook file contents for {key: (LANG, translation)}"""
+    lines = [u'%s\t%s\t%s' % (key, lang, translation) for key, (lang, translation) in sorted(phrases.items())]
+    return PHRASEBOOK_MAGIC + zlib.compress(u'\n'.join(lines).encode('utf-8'), 9)
+
+def compilePhrasebook(path=PHRASEBOOK_SOURCE):
+    """Return the packed phrasebook for a phrase corpus"""
+    return packPhrases(loadPhrases(path))
+
+def main():
+    output = sys.argv[1] if len(sys.argv) > 1 else PHRASEBOOK_FILE
+    phrases = loadPhrases()
+    data = packPhrases(phrases)
+    with open(output, 'wb') as phrasebook_file:
+        phrasebook_file.write(data)
+    
+    languages = sorted(set(lang for lang, translation in phrases.values()))
+    print('Wrote %d phrases in %d languages (%s) to %s, %d bytes' % (
+        len(phrases), len(languages), ', '.join(languages), output, len(data)))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""Train the language identifier model embedded in mod_MicrosoftTranslator.py
+
+Reads tools/langid_corpus/<lang>.txt, ranks each language's character
+trigrams and rewrites the block between the LANGID MODEL markers in the
+mod. Run it after editing the corpus:
+
+    python tools/train_langid.py
+"""
+import io
+import os
+import re
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, 'tools', 'langid_corpus')
+MOD_PATH = os.path.join(ROOT, 'mod_MicrosoftTranslator.py')
+
+TOP_TRIGRAMS = 300
+BEGIN_MARKER = u'# BEGIN LANGID MODEL'
+END_MARKER = u'# END LANGID MODEL'
+
+def trigrams(text):
+    """Padded lowercase letter trigrams; must match langIdTrigrams() in the mod"""
+    text = u' '.join(u''.join(ch if ch.isalpha() else u' ' for ch in text.lower()).split())
+    if not text:
+        return []
+    text = u' %s ' % text
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+def rankLanguage(path):
+    """Return the language's most frequent trigrams, most frequent first"""
+    counts = Counter()
+    with io.open(path, encoding='utf-8') as corpus:
+        for line in corpus:
+            counts.update(trigrams(line))
+    
+    # Break frequency ties alphabetically so the output is stable
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [trigram for trigram, count in ranked[:TOP_TRIGRAMS]]
+
+def renderModel(model):
+    """Render the model as Python source wrapped at ~100 columns"""
+    lines = [BEGIN_MARKER + u' (generated by tools/train_langid.py, do not edit)',
+             u'LANGID_TRIGRAMS = {']
+    for lang in sorted(model):
+        joined = u'|'.join(model[lang])
+        chunks = [joined[i:i + 80] for i in range(0, len(joined), 80)]
+        lines.append(u"    '%s': (" % lang)
+        for chunk in chunks:
+            lines.append(u"        u'%s'" % chunk.replace(u"'", u"\\'"))
+        lines.append(u'    ),')
+    lines.append(u'}')
+    lines.append(END_MARKER)
+    return u'\n'.join(lines)
+
+def main():
+    model = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.txt'):
+            model[name[:-4]] = rankLanguage(os.path.join(CORPUS_DIR, name))
+    
+    with io.open(MOD_PATH, encoding='utf-8') as mod_file:
+        source = mod_file.read()
+    
+    pattern = re.compile(re.escape(BEGIN_MARKER) + u'.*?' + re.escape(END_MARKER), re.DOTALL)
+    if not pattern.search(source):
+        print('ERROR: LANGID MODEL markers not found in %s' % MOD_PATH)
+        return 1
+    source = pattern.sub(lambda match: renderModel(model), source)
+    
+    with io.open(MOD_PATH, 'w', encoding='utf-8', newline='\n') as mod_file:
+        mod_file.write(source)
+    
+    print('Wrote %d languages x %d trigrams to %s' % (len(model), TOP_TRIGRAMS, MOD_PATH))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())